@@ -3,22 +3,57 @@ from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 import structlog
-import openai
-from typing import Optional
+from typing import AsyncIterator, Dict, List, Optional
 
 from src.core.config import settings
-from src.core.services.ai.deepseek_client_new import DeepseekClient
 from src.bot.utils.keyboards import back_keyboard
+from src.bot.utils.streaming import MessageStreamer
+from src.core.cache.ai_cache import ai_response_cache
+from src.core.cache.singleflight import SingleFlight, StreamFlight
+from src.core.cache.user_cache import CachedUser
+from src.core.services.ai.dispatcher import BACKGROUND_TIER, AIQueueTimeout, ai_dispatcher
+from src.core.services.ai.router import ai_router
+from src.core.services.ai.conversation import Conversation, ConversationStore
 
 router = Router()
 logger = structlog.get_logger()
 
-# Initialize AI clients based on configuration
-ai_client = None
-if settings.ai_provider == "deepseek" and settings.deepseek_api_key:
-    ai_client = DeepseekClient()
-elif settings.ai_provider == "openai" and settings.openai_api_key:
-    openai.api_key = settings.openai_api_key
+# Summaries share one dispatcher identity, so at most `ai_per_user_concurrency`
+# run at once, and wait longer than interactive requests for a slot
+SUMMARY_USER_ID = 0
+SUMMARY_QUEUE_DEADLINE = 60.0
+
+async def summarize_turns(summary: str, turns: List[tuple]) -> str:
+    """Fold turns leaving the conversation buffer into the rolling summary
+    
+    Runs through the AI dispatcher on the background tier, behind every
+    interactive request.
+    """
+    transcript = "\n".join(f"{role}: {content}" for role, content in turns)
+    messages = [
+        {
+            "role": "system",
+            "content": "Résume la conversation en 5 phrases maximum, en français, "
+                       "en gardant les faits et préférences utiles pour la suite."
+        },
+        {
+            "role": "user",
+            "content": f"Résumé actuel : {summary or '(aucun)'}\n\nNouveaux échanges :\n{transcript}"
+        }
+    ]
+    async with ai_dispatcher.slot(SUMMARY_USER_ID, BACKGROUND_TIER, deadline=SUMMARY_QUEUE_DEADLINE):
+        return await _get_provider_response(messages)
+
+# Identical prompts in flight at the same time share one provider call
+# (or, when streaming, one provider stream)
+ai_flight = SingleFlight("ai")
+ai_stream_flight = StreamFlight("ai_stream")
+
+conversation_store = ConversationStore(
+    max_turns=settings.ai_memory_max_turns,
+    ttl=settings.ai_memory_ttl,
+    summarizer=summarize_turns if settings.ai_memory_summarize else None
+)
 
 class AIStates(StatesGroup):
     chatting = State()
@@ -80,7 +115,11 @@ async def start_ai_chat(callback: types.CallbackQuery, state: FSMContext):
     await callback.answer()
 
 @router.message(AIStates.chatting)
-async def process_ai_chat(message: types.Message, state: FSMContext):
+async def process_ai_chat(
+    message: types.Message,
+    state: FSMContext,
+    db_user: Optional[CachedUser] = None
+):
     """Process AI chat messages"""
     if message.text and message.text.lower() in ['/stop', 'stop', 'arrêt']:
         await message.answer(
@@ -89,6 +128,7 @@ async def process_ai_chat(message: types.Message, state: FSMContext):
             "Utilisez `/ai` pour recommencer.",
             parse_mode="Markdown"
         )
+        await conversation_store.clear(message.chat.id)
         await state.clear()
         return
 
@@ -103,11 +143,38 @@ async def process_ai_chat(message: types.Message, state: FSMContext):
     # Show typing indicator
     await message.bot.send_chat_action(message.chat.id, "typing")
     
+    tier = db_user.subscription_tier if db_user else None
+    
     try:
-        if ai_client or settings.openai_api_key:
-            # Use configured AI provider
-            response = await get_ai_response(message.text)
-            await message.answer(f"🤖 {response}", parse_mode="Markdown")
+        if ai_router:
+            conversation = await conversation_store.load(message.chat.id)
+            # Cache hits are answered without taking an AI dispatcher slot
+            response = await get_cached_ai_response(message.text, conversation)
+            if settings.ai_streaming:
+                # Stream tokens into a progressively edited message
+                streamer = MessageStreamer(message, min_interval=settings.ai_stream_edit_interval)
+                if response is not None:
+                    await streamer.feed(response)
+                else:
+                    chunks = []
+                    async with ai_dispatcher.slot(message.from_user.id, tier):
+                        async for chunk in stream_ai_response(
+                            message.text, use_cache=True, conversation=conversation, check_cache=False
+                        ):
+                            chunks.append(chunk)
+                            await streamer.feed(chunk)
+                    response = "".join(chunks).strip()
+                await streamer.finish()
+            else:
+                if response is None:
+                    async with ai_dispatcher.slot(message.from_user.id, tier):
+                        response = await get_ai_response(
+                            message.text, use_cache=True, conversation=conversation, check_cache=False
+                        )
+                await message.answer(f"🤖 {response}", parse_mode="Markdown")
+            await conversation_store.append(
+                message.chat.id, ("user", message.text), ("assistant", response)
+            )
         else:
             # Fallback response
             response = get_fallback_ai_response(message.text)
@@ -118,6 +185,16 @@ async def process_ai_chat(message: types.Message, state: FSMContext):
                 parse_mode="Markdown"
             )
             
+    except AIQueueTimeout:
+        # Backpressure: the provider queue is saturated, degrade gracefully
+        response = get_fallback_ai_response(message.text)
+        await message.answer(
+            "⏳ *Assistant IA très sollicité*\n"
+            "Voici une réponse simplifiée en attendant, réessayez dans un instant.\n\n"
+            f"🤖 {response}",
+            parse_mode="Markdown"
+        )
+            
     except ValueError as ve:
         # Erreur de configuration
         logger.warning(
@@ -150,43 +227,157 @@ async def process_ai_chat(message: types.Message, state: FSMContext):
             parse_mode="Markdown"
         )
 
-async def get_ai_response(user_message: str) -> str:
-    """Get response from configured AI provider"""
-    messages = [
-        {
-            "role": "system", 
-            "content": "Tu es Linklet, un assistant IA spécialisé dans l'automatisation et les workflows. "
-                      "Réponds de manière concise et utile en français. "
-                      "Tu peux aider avec l'automatisation, les intégrations d'APIs, et les conseils techniques."
-        },
+SYSTEM_PROMPT = (
+    "Tu es Linklet, un assistant IA spécialisé dans l'automatisation et les workflows. "
+    "Réponds de manière concise et utile en français. "
+    "Tu peux aider avec l'automatisation, les intégrations d'APIs, et les conseils techniques."
+)
+
+AI_TEMPERATURE = 0.7
+AI_MAX_TOKENS = 500
+
+# History-free prompts are sampled at the cache's temperature bound so the
+# common one-off questions can be answered from the response cache
+CACHED_TEMPERATURE = min(AI_TEMPERATURE, ai_response_cache.max_temperature)
+
+def build_messages(
+    user_message: str,
+    conversation: Optional[Conversation] = None
+) -> List[Dict[str, str]]:
+    """Build the chat payload sent to the AI provider
+    
+    History from `conversation` is trimmed to the memory token budget so the
+    prompt stays bounded.
+    """
+    history = conversation.to_messages(settings.ai_memory_token_budget) if conversation else []
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        *history,
         {"role": "user", "content": user_message}
     ]
 
+def _is_standalone(messages: List[Dict[str, str]]) -> bool:
+    """Whether the prompt carries no conversation history"""
+    return len(messages) == 2
+
+def _temperature(messages: List[Dict[str, str]]) -> float:
+    """Sampling temperature: deterministic for standalone prompts"""
+    return CACHED_TEMPERATURE if _is_standalone(messages) else AI_TEMPERATURE
+
+def _cache_key(messages: List[Dict[str, str]]) -> Optional[str]:
+    """Response cache key, or None when the request must not be cached
+    
+    Only standalone prompts are cached: with history the answer depends on
+    the chat, and the key would never repeat.
+    """
+    temperature = _temperature(messages)
+    if not _is_standalone(messages) or not ai_response_cache.is_cacheable(temperature):
+        return None
+    return ai_response_cache.make_key(
+        messages,
+        providers=[provider.model for provider in ai_router.providers],
+        temperature=temperature,
+        max_tokens=AI_MAX_TOKENS
+    )
+
+async def get_cached_ai_response(
+    user_message: str,
+    conversation: Optional[Conversation] = None
+) -> Optional[str]:
+    """Cached response for this prompt, or None (also when not cacheable)"""
+    cache_key = _cache_key(build_messages(user_message, conversation))
+    if not cache_key:
+        return None
+    return await ai_response_cache.get(cache_key)
+
+async def stream_ai_response(
+    user_message: str,
+    use_cache: bool = False,
+    conversation: Optional[Conversation] = None,
+    check_cache: bool = True
+) -> AsyncIterator[str]:
+    """Stream the response from the configured AI provider chunk by chunk
+    
+    With use_cache, a cached response is yielded in one chunk and a fresh
+    one is stored once the stream completes; check_cache=False skips the
+    lookup when the caller already missed with `get_cached_ai_response`.
+    Identical prompts streamed concurrently share one provider stream.
+    """
+    messages = build_messages(user_message, conversation)
+    cache_key = _cache_key(messages) if use_cache else None
+    if cache_key and check_cache:
+        cached = await ai_response_cache.get(cache_key)
+        if cached is not None:
+            yield cached
+            return
+
+    temperature = _temperature(messages)
+    flight = cache_key or ai_response_cache.make_key(messages, temperature=temperature)
+    chunks = []
+    async for chunk in ai_stream_flight.stream(
+        flight, lambda: _stream_provider_response(messages, temperature)
+    ):
+        chunks.append(chunk)
+        yield chunk
+
+    if cache_key:
+        await ai_response_cache.set(cache_key, messages, "".join(chunks).strip())
+
+async def _stream_provider_response(
+    messages: List[Dict[str, str]],
+    temperature: float = AI_TEMPERATURE
+) -> AsyncIterator[str]:
+    """Stream chunks from the healthiest configured AI provider"""
     try:
-        if settings.ai_provider == "deepseek":
-            if not ai_client:
-                raise ValueError("Client Deepseek non configuré. Vérifiez votre clé API.")
-            return await ai_client.generate_chat_response(
-                messages=messages,
-                max_tokens=500,
-                temperature=0.7,
-                model="deepseek-chat"
-            )
+        async for chunk in ai_router.stream(messages, temperature, AI_MAX_TOKENS):
+            yield chunk
             
-        elif settings.ai_provider == "openai":
-            if not settings.openai_api_key:
-                raise ValueError("Clé API OpenAI non configurée.")
-            response = await openai.ChatCompletion.acreate(
-                model="gpt-3.5-turbo",
-                messages=messages,
-                max_tokens=500,
-                temperature=0.7
-            )
-            return response.choices[0].message.content.strip()
-            
-        else:
-            raise ValueError(f"Fournisseur d'IA '{settings.ai_provider}' non supporté. "
-                           "Options valides : 'deepseek' ou 'openai'")
+    except ValueError as ve:
+        logger.error(f"Configuration error: {str(ve)}", 
+                    provider=settings.ai_provider)
+        raise ValueError(str(ve))
+        
+    except Exception as e:
+        logger.error(f"AI provider stream error", 
+                    provider=settings.ai_provider,
+                    error=str(e),
+                    error_type=type(e).__name__)
+        raise RuntimeError(f"Erreur lors de la génération de la réponse : {str(e)}")
+
+async def get_ai_response(
+    user_message: str,
+    use_cache: bool = False,
+    conversation: Optional[Conversation] = None,
+    check_cache: bool = True
+) -> str:
+    """Get response from configured AI provider
+    
+    use_cache opts this call site into the shared response cache (see
+    `stream_ai_response` for check_cache); conversation adds the chat's
+    (budget-trimmed) history to the prompt.
+    """
+    messages = build_messages(user_message, conversation)
+    cache_key = _cache_key(messages) if use_cache else None
+    if cache_key and check_cache:
+        cached = await ai_response_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    temperature = _temperature(messages)
+    flight = cache_key or ai_response_cache.make_key(messages, temperature=temperature)
+    response = await ai_flight.do(flight, lambda: _get_provider_response(messages, temperature))
+
+    if cache_key:
+        await ai_response_cache.set(cache_key, messages, response)
+    return response
+
+async def _get_provider_response(
+    messages: List[Dict[str, str]],
+    temperature: float = AI_TEMPERATURE
+) -> str:
+    """Request a completion from the healthiest configured AI provider"""
+    try:
+        return await ai_router.complete(messages, temperature, AI_MAX_TOKENS)
             
     except ValueError as ve:
         # Erreurs de configuration
@@ -2,11 +2,23 @@ from aiogram import Router, types, F
 from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
+from typing import Dict, List, Optional
+from uuid import UUID
 import structlog
 
 from src.bot.utils.keyboards import back_keyboard
-from src.core.database.connection import get_db
-from src.core.database.models import User, Workflow
+from src.bot.utils.workflow_keyboards import (
+    confirm_bulk_delete_keyboard,
+    workflow_list_keyboard,
+    workflow_select_keyboard
+)
+from src.core.cache.user_cache import CachedUser
+from src.core.database.connection import get_async_db
+from src.core.database.models import Workflow
+from src.core.services.stats_service import StatsService
+from src.core.services.workflow_service import BulkResult, WorkflowPage, WorkflowService
+from src.integrations.n8n.client import N8NClient
+from src.workers.executions import execution_queue
 
 router = Router()
 logger = structlog.get_logger()
@@ -79,25 +91,32 @@ async def process_workflow_name(message: types.Message, state: FSMContext):
     await state.set_state(AutomationStates.waiting_workflow_description)
 
 @router.message(AutomationStates.waiting_workflow_description)
-async def process_workflow_description(message: types.Message, state: FSMContext):
+async def process_workflow_description(
+    message: types.Message,
+    state: FSMContext,
+    db_user: Optional[CachedUser] = None
+):
     """Process workflow description and create workflow"""
     description = message.text.strip()
     data = await state.get_data()
     
-    user_id = message.from_user.id
+    if not db_user:
+        await state.clear()
+        await message.answer("❌ Utilisateur non trouvé")
+        return
     
     # Save workflow to database
-    with get_db() as db:
-        user = db.query(User).filter(User.telegram_id == user_id).first()
-        
+    async with get_async_db() as db:
         workflow = Workflow(
-            user_id=user.id,
+            user_id=db_user.id,
             name=data['workflow_name'],
             description=description,
             triggers={},  # Will be configured later
+            is_active=True
         )
         db.add(workflow)
-        db.commit()
+        await StatsService(db).adjust(db_user.id, workflows=1, active_workflows=1)
+        await db.commit()
         
         success_text = f"""
 ✅ **Workflow créé avec succès !**
@@ -117,29 +136,209 @@ Utilisez `/workflows` pour gérer vos automatisations.
         await message.answer(success_text, parse_mode="Markdown")
         await state.clear()
 
-@router.callback_query(F.data == "list_workflows")
-async def list_user_workflows(callback: types.CallbackQuery):
-    """List user's workflows"""
-    user_id = callback.from_user.id
+def render_workflow_page(page: WorkflowPage) -> str:
+    """Text of one page of the workflow list"""
+    if not page.workflows:
+        return "📋 **Vos Workflows**\n\nAucun workflow créé pour le moment.\nUtilisez ➕ Créer Workflow pour commencer !"
     
-    with get_db() as db:
-        user = db.query(User).filter(User.telegram_id == user_id).first()
-        workflows = user.workflows if user else []
-        
-        if not workflows:
-            text = "📋 **Vos Workflows**\n\nAucun workflow créé pour le moment.\nUtilisez ➕ Créer Workflow pour commencer !"
+    text = "📋 **Vos Workflows**\n\n"
+    for workflow in page.workflows:
+        status = "🟢 Actif" if workflow.is_active else "🔴 Inactif"
+        text += f"• **{workflow.name}**\n"
+        text += f"   {status} • ID: {str(workflow.id)[:8]}\n"
+        if workflow.description:
+            text += f"   📝 {workflow.description[:50]}...\n"
+        text += "\n"
+    return text
+
+@router.callback_query(F.data.in_({"list_workflows", "workflow_list"}))
+@router.callback_query(F.data.startswith("wfpage:"))
+async def list_user_workflows(callback: types.CallbackQuery, db_user: Optional[CachedUser] = None):
+    """List user's workflows, one keyset page at a time"""
+    if not db_user:
+        await callback.answer("❌ Utilisateur non trouvé")
+        return
+    
+    after = before = None
+    if callback.data.startswith("wfpage:"):
+        _, direction, cursor = callback.data.split(":", 2)
+        if direction == "n":
+            after = cursor
         else:
-            text = "📋 **Vos Workflows**\n\n"
-            for i, workflow in enumerate(workflows, 1):
-                status = "🟢 Actif" if workflow.is_active else "🔴 Inactif"
-                text += f"{i}. **{workflow.name}**\n"
-                text += f"   {status} • ID: {str(workflow.id)[:8]}\n"
-                text += f"   📝 {workflow.description[:50]}...\n\n"
+            before = cursor
     
-    keyboard = [
-        [types.InlineKeyboardButton(text="◀️ Retour", callback_data="menu_automation")]
-    ]
-    markup = types.InlineKeyboardMarkup(inline_keyboard=keyboard)
+    try:
+        async with get_async_db() as db:
+            page = await WorkflowService(db).list_user_workflows_page(db_user.id, after=after, before=before)
+    except ValueError:
+        await callback.answer("❌ Page invalide")
+        return
+    
+    markup = workflow_list_keyboard(
+        page.workflows,
+        prev_cursor=page.prev_cursor,
+        next_cursor=page.next_cursor,
+        back_callback="menu_automation"
+    )
+    await callback.message.edit_text(render_workflow_page(page), reply_markup=markup, parse_mode="Markdown")
+    await callback.answer()
+
+# Past participles for the bulk action summaries
+BULK_ACTIONS = {
+    "activate": "activé(s)",
+    "deactivate": "désactivé(s)",
+    "execute": "lancé(s)",
+    "delete!": "supprimé(s)",
+}
+
+async def show_workflow_selection(
+    callback: types.CallbackQuery,
+    state: FSMContext,
+    db_user: CachedUser,
+    page_args: Optional[Dict[str, str]] = None
+):
+    """Render the multi-select list; page_args None keeps the current page"""
+    data = await state.get_data()
+    selected = data.get("wf_selected", [])
+    if page_args is None:
+        page_args = data.get("wf_page", {})
+    
+    async with get_async_db() as db:
+        page = await WorkflowService(db).list_user_workflows_page(db_user.id, **page_args)
+    await state.update_data(wf_page=page_args)
     
+    text = render_workflow_page(page).rstrip() + f"\n\n☑️ Sélectionnés : {len(selected)}"
+    markup = workflow_select_keyboard(
+        page.workflows,
+        selected,
+        prev_cursor=page.prev_cursor,
+        next_cursor=page.next_cursor
+    )
     await callback.message.edit_text(text, reply_markup=markup, parse_mode="Markdown")
+
+@router.callback_query(F.data.startswith("wfsel:"))
+async def select_workflows(
+    callback: types.CallbackQuery,
+    state: FSMContext,
+    n8n_client: N8NClient,
+    db_user: Optional[CachedUser] = None
+):
+    """Multi-select mode of the workflow list
+    
+    The selection (workflow IDs) and the current page are kept in the FSM
+    data, so it survives paging.
+    """
+    if not db_user:
+        await callback.answer("❌ Utilisateur non trouvé")
+        return
+    
+    _, kind, *rest = callback.data.split(":", 2)
+    arg = rest[0] if rest else ""
+    page_args = None
+    
+    if kind == "off":
+        await state.update_data(wf_selected=[], wf_page={})
+        await list_user_workflows(callback, db_user)
+        return
+    elif kind == "on":
+        await state.update_data(wf_selected=[])
+        page_args = {}
+    elif kind == "t":
+        try:
+            workflow_id = str(UUID(arg))
+        except ValueError:
+            await callback.answer("❌ Action invalide")
+            return
+        selected = (await state.get_data()).get("wf_selected", [])
+        if workflow_id in selected:
+            selected.remove(workflow_id)
+        else:
+            selected.append(workflow_id)
+        await state.update_data(wf_selected=selected)
+    elif kind in ("p", "n"):
+        page_args = {"before": arg} if kind == "p" else {"after": arg}
+    elif kind == "do":
+        await run_bulk_action(callback, state, n8n_client, db_user, arg)
+        return
+    
+    try:
+        await show_workflow_selection(callback, state, db_user, page_args)
+    except ValueError:
+        await callback.answer("❌ Page invalide")
+        return
     await callback.answer()
+
+async def run_bulk_action(
+    callback: types.CallbackQuery,
+    state: FSMContext,
+    n8n_client: N8NClient,
+    db_user: CachedUser,
+    action: str
+):
+    """Apply an action to every selected workflow and report per-item results"""
+    selected = (await state.get_data()).get("wf_selected", [])
+    if not selected:
+        await callback.answer("❌ Aucun workflow sélectionné")
+        return
+    if action == "delete":
+        await callback.message.edit_text(
+            f"🗑️ Supprimer {len(selected)} workflow(s) ? Cette action est irréversible.",
+            reply_markup=confirm_bulk_delete_keyboard(len(selected))
+        )
+        await callback.answer()
+        return
+    if action not in BULK_ACTIONS:
+        await callback.answer("❌ Action invalide")
+        return
+    
+    # Answered first: n8n calls may outlast the callback timeout
+    await callback.answer("⏳ Traitement en cours…")
+    workflow_ids = [UUID(workflow_id) for workflow_id in selected]
+    try:
+        async with get_async_db() as db:
+            service = WorkflowService(db, n8n_client)
+            if action == "activate":
+                results = await service.activate_many(workflow_ids, db_user.id)
+            elif action == "deactivate":
+                results = await service.deactivate_many(workflow_ids, db_user.id)
+            elif action == "execute":
+                results = await enqueue_executions(service, workflow_ids, db_user, callback.message.chat.id)
+            else:
+                results = await service.delete_many(workflow_ids, db_user.id)
+    except Exception as e:
+        logger.error("Bulk workflow action failed", error=str(e), action=action, user_id=db_user.id)
+        await callback.message.answer("❌ Une erreur est survenue")
+        return
+    
+    await state.update_data(wf_selected=[])
+    succeeded = sum(result.ok for result in results)
+    # Plain text: workflow names are user input, not Markdown
+    text = f"{succeeded}/{len(results)} workflow(s) {BULK_ACTIONS[action]}"
+    for result in results:
+        if not result.ok:
+            name = result.workflow.name if result.workflow else str(result.workflow_id)[:8]
+            text += f"\n❌ {name} : {result.error}"
+    await callback.message.answer(text)
+    await show_workflow_selection(callback, state, db_user)
+
+async def enqueue_executions(
+    service: WorkflowService,
+    workflow_ids: List[UUID],
+    db_user: CachedUser,
+    chat_id: int
+) -> List[BulkResult]:
+    """Queue an execution per active workflow in one batch; workers report each outcome"""
+    workflows = await service.get_user_workflows(workflow_ids, db_user.id)
+    results = []
+    runnable = []
+    for workflow_id in workflow_ids:
+        workflow = workflows.get(workflow_id)
+        if workflow is None:
+            results.append(BulkResult(workflow_id, False, error="Workflow not found or access denied"))
+        elif not workflow.is_active:
+            results.append(BulkResult(workflow_id, False, workflow, error="Workflow is not active"))
+        else:
+            runnable.append((workflow.id, workflow.name))
+            results.append(BulkResult(workflow_id, True, workflow))
+    await execution_queue.enqueue_many(runnable, user_id=db_user.id, chat_id=chat_id)
+    return results
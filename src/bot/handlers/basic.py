@@ -1,11 +1,13 @@
 from aiogram import Router, types
 from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
+from typing import Optional
 import structlog
 
 from src.bot.utils.keyboards import main_menu_keyboard
-from src.core.database.connection import get_db
-from src.core.database.models import User
+from src.core.cache.user_cache import CachedUser
+from src.core.database.connection import get_async_db
+from src.core.services.stats_service import StatsService
 
 router = Router()
 logger = structlog.get_logger()
@@ -13,21 +15,9 @@ logger = structlog.get_logger()
 @router.message(Command("start"))
 async def start_handler(message: types.Message, state: FSMContext):
     """Handle /start command"""
+    # Registration is handled (and cached) by AuthMiddleware
     user = message.from_user
     
-    # Register user in database
-    with get_db() as db:
-        db_user = db.query(User).filter(User.telegram_id == user.id).first()
-        if not db_user:
-            db_user = User(
-                telegram_id=user.id,
-                username=user.username,
-                first_name=user.first_name
-            )
-            db.add(db_user)
-            db.commit()
-            logger.info("New user registered", telegram_id=user.id, username=user.username)
-    
     welcome_text = f"""
 🚀 **Bienvenue sur Linklet, {user.first_name}!**
 
@@ -76,21 +66,18 @@ Besoin d'aide ? Utilisez `/ai` pour poser vos questions !
     await message.answer(help_text, parse_mode="Markdown")
 
 @router.message(Command("status"))
-async def status_handler(message: types.Message):
+async def status_handler(message: types.Message, db_user: Optional[CachedUser] = None):
     """Handle /status command"""
-    user_id = message.from_user.id
+    # The user row comes from AuthMiddleware (user cache)
+    user = db_user
     
-    with get_db() as db:
-        user = db.query(User).filter(User.telegram_id == user_id).first()
-        
-        if not user:
-            await message.answer("❌ Utilisateur non trouvé. Utilisez /start pour vous inscrire.")
-            return
-        
-        # Get user statistics
-        workflows_count = len(user.workflows)
-        tasks_count = len([t for t in user.tasks if not t.completed_at])
-        integrations_count = len([i for i in user.integrations if i.is_active])
+    if not user:
+        await message.answer("❌ Utilisateur non trouvé. Utilisez /start pour vous inscrire.")
+        return
+    
+    async with get_async_db() as db:
+        # Get user statistics (maintained counters, one primary-key lookup)
+        stats = await StatsService(db).get(user.id)
         
         status_text = f"""
 📊 **Statut de votre compte**
@@ -100,13 +87,13 @@ async def status_handler(message: types.Message):
 📅 **Membre depuis :** {user.created_at.strftime('%d/%m/%Y')}
 
 📈 **Statistiques :**
-• 🤖 Workflows actifs : {workflows_count}
-• 📋 Tâches en cours : {tasks_count}  
-• 🔗 Intégrations : {integrations_count}
+• 🤖 Workflows actifs : {stats.active_workflows}/{stats.workflows}
+• 📋 Tâches en cours : {stats.pending_tasks}  
+• 🔗 Intégrations : {stats.integrations}
 
 **Limites du plan gratuit :**
-• Workflows : {workflows_count}/10
-• Intégrations : {integrations_count}/3
+• Workflows : {stats.workflows}/10
+• Intégrations : {stats.integrations}/3
 • Requêtes IA : Usage normal
 """
         
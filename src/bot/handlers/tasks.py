@@ -0,0 +1,67 @@
+from aiogram import Router, types
+from aiogram.filters import Command
+from datetime import datetime, timedelta
+from sqlalchemy import select
+from typing import Optional
+import structlog
+
+from src.core.cache.user_cache import CachedUser
+from src.core.database.connection import get_async_db
+from src.core.database.models import Task
+from src.core.services.recurrence import occurrences_between
+
+router = Router()
+logger = structlog.get_logger()
+
+# Upcoming reminders shown by /tasks
+AGENDA_DAYS = 7
+AGENDA_MAX_TASKS = 50
+AGENDA_MAX_LINES = 30
+
+@router.message(Command("tasks"))
+async def tasks_handler(message: types.Message, db_user: Optional[CachedUser] = None):
+    """Handle /tasks command: reminders due in the coming week"""
+    if not db_user:
+        await message.answer("❌ Utilisateur non trouvé. Utilisez /start pour vous inscrire.")
+        return
+    
+    now = datetime.utcnow()
+    end = now + timedelta(days=AGENDA_DAYS)
+    async with get_async_db() as db:
+        result = await db.execute(
+            select(Task.id, Task.title, Task.scheduled_at, Task.recurrence_rule)
+            .where(
+                Task.user_id == db_user.id,
+                Task.completed_at.is_(None),
+                Task.reminder_sent_at.is_(None),
+                Task.scheduled_at < end
+            )
+            .order_by(Task.scheduled_at)
+            .limit(AGENDA_MAX_TASKS)
+        )
+        tasks = result.all()
+    
+    titles = {task.id: task.title for task in tasks}
+    occurrences = occurrences_between(
+        ((task.id, task.recurrence_rule, task.scheduled_at) for task in tasks),
+        now,
+        end
+    )
+    agenda = sorted(
+        (when, titles[task_id])
+        for task_id, times in occurrences.items()
+        for when in times
+    )
+    
+    if not agenda:
+        await message.answer(f"📋 Aucun rappel prévu dans les {AGENDA_DAYS} prochains jours.")
+        return
+    
+    lines = [f"📋 Rappels des {AGENDA_DAYS} prochains jours (UTC) :", ""]
+    for when, title in agenda[:AGENDA_MAX_LINES]:
+        lines.append(f"• {when.strftime('%d/%m %H:%M')} - {title}")
+    if len(agenda) > AGENDA_MAX_LINES:
+        lines.append(f"… et {len(agenda) - AGENDA_MAX_LINES} autres")
+    
+    # Plain text: titles are user input
+    await message.answer("\n".join(lines))
@@ -1,21 +1,28 @@
 """Workflow management command handlers."""
 from aiogram import Router, F, types
 from aiogram.filters import Command, CommandObject
+from aiogram.exceptions import TelegramBadRequest
 from aiogram.types import Message, CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
+from typing import Optional
+from urllib.parse import urljoin
+from uuid import UUID
 import structlog
 
+from src.core.cache.user_cache import CachedUser
 from src.core.config import settings
-from src.core.database.connection import get_db
+from src.core.database.connection import get_async_db
 from src.core.services.workflow_service import WorkflowService
 from src.integrations.n8n.client import N8NClient
-from src.bot.utils.keyboards import (
+from src.workers.executions import execution_queue
+from src.bot.utils.workflow_keyboards import (
     create_workflow_keyboard,
     workflow_list_keyboard,
     workflow_actions_keyboard,
     back_keyboard,
-    workflow_template_keyboard
+    workflow_template_keyboard,
+    job_status_keyboard
 )
 
 router = Router()
@@ -30,10 +37,7 @@ class WorkflowStates(StatesGroup):
     waiting_webhook = State()
     waiting_action = State()
 
-@router.message(Command("workflow"))
-async def workflow_menu(message: Message):
-    """Show workflow management menu."""
-    text = """
+WORKFLOW_MENU_TEXT = """
 🔄 **Menu des Workflows**
 
 Commandes disponibles :
@@ -43,12 +47,27 @@ Commandes disponibles :
 
 Utilisez les boutons ci-dessous pour naviguer.
 """
+
+# Bare /workflow only: subcommands are matched on their argument below
+@router.message(Command("workflow", magic=~F.args))
+async def workflow_menu(message: Message):
+    """Show workflow management menu."""
     await message.answer(
-        text,
+        WORKFLOW_MENU_TEXT,
         reply_markup=create_workflow_keyboard()
     )
 
-@router.message(Command("workflow", "create"))
+@router.callback_query(F.data == "workflow_menu")
+async def workflow_menu_callback(callback: CallbackQuery, state: FSMContext):
+    """Back to the workflow menu, leaving any configuration in progress."""
+    await state.clear()
+    await callback.message.edit_text(
+        WORKFLOW_MENU_TEXT,
+        reply_markup=create_workflow_keyboard()
+    )
+    await callback.answer()
+
+@router.message(Command("workflow", magic=F.args == "create"))
 async def workflow_create_start(message: Message, state: FSMContext):
     """Start workflow creation process."""
     await state.set_state(WorkflowStates.waiting_name)
@@ -70,16 +89,24 @@ async def workflow_name_received(message: Message, state: FSMContext):
     )
 
 @router.message(WorkflowStates.waiting_description)
-async def workflow_description_received(message: Message, state: FSMContext):
+async def workflow_description_received(
+    message: Message,
+    state: FSMContext,
+    n8n_client: N8NClient,
+    db_user: Optional[CachedUser] = None
+):
     """Handle workflow description and create workflow."""
     user_data = await state.get_data()
     await state.clear()
+    if not db_user:
+        await message.answer("❌ Utilisateur non trouvé")
+        return
 
     try:
-        with get_db() as db:
-            service = WorkflowService(db)
+        async with get_async_db() as db:
+            service = WorkflowService(db, n8n_client)
             workflow = await service.create_workflow(
-                user_id=message.from_user.id,
+                user_id=db_user.id,
                 name=user_data["name"],
                 description=message.text
             )
@@ -93,7 +120,7 @@ async def workflow_description_received(message: Message, state: FSMContext):
         logger.error(
             "Failed to create workflow",
             error=str(e),
-            user_id=message.from_user.id
+            user_id=db_user.id
         )
         await message.answer(
             "❌ Désolé, une erreur est survenue lors de la création du workflow.\n"
@@ -101,13 +128,23 @@ async def workflow_description_received(message: Message, state: FSMContext):
             reply_markup=back_keyboard()
         )
 
-@router.message(Command("workflow", "list"))
-async def list_workflows(message: Message):
+@router.message(Command("workflow", magic=F.args == "list"))
+async def list_workflows(
+    message: Message,
+    db_user: Optional[CachedUser] = None,
+    n8n_client: Optional[N8NClient] = None
+):
     """List user's workflows."""
+    if not db_user:
+        await message.answer("❌ Utilisateur non trouvé")
+        return
+    
     try:
-        with get_db() as db:
-            service = WorkflowService(db)
-            workflows = await service.list_user_workflows(message.from_user.id)
+        async with get_async_db() as db:
+            service = WorkflowService(db, n8n_client)
+            # First page; next/previous pages are served by the wfpage: callbacks
+            page = await service.list_user_workflows_page(db_user.id)
+        workflows = page.workflows
         
         if not workflows:
             await message.answer(
@@ -126,19 +163,32 @@ async def list_workflows(message: Message):
         
         await message.answer(
             text,
-            reply_markup=workflow_list_keyboard(workflows)
+            reply_markup=workflow_list_keyboard(
+                workflows,
+                prev_cursor=page.prev_cursor,
+                next_cursor=page.next_cursor
+            )
         )
     except Exception as e:
         logger.error(
             "Failed to list workflows",
             error=str(e),
-            user_id=message.from_user.id
+            user_id=db_user.id
         )
         await message.answer("❌ Erreur lors de la récupération des workflows.")
 
 @router.callback_query(F.data.startswith("workflow:"))
-async def workflow_action(callback: CallbackQuery):
+async def workflow_action(
+    callback: CallbackQuery,
+    state: FSMContext,
+    n8n_client: N8NClient,
+    db_user: Optional[CachedUser] = None
+):
     """Handle workflow action buttons."""
+    if not db_user:
+        await callback.answer("❌ Utilisateur non trouvé")
+        return
+
     action = callback.data.split(":")
     if len(action) != 3:
         await callback.answer("❌ Action invalide")
@@ -146,28 +196,72 @@ async def workflow_action(callback: CallbackQuery):
 
     _, workflow_id, action_type = action
     try:
-        with get_db() as db:
-            service = WorkflowService(db)
+        workflow_id = UUID(workflow_id)
+    except ValueError:
+        await callback.answer("❌ Action invalide")
+        return
+
+    try:
+        async with get_async_db() as db:
+            service = WorkflowService(db, n8n_client)
             
-            if action_type == "activate":
-                workflow = await service.activate_workflow(int(workflow_id), callback.from_user.id)
+            if action_type == "details":
+                workflow = await service.get_user_workflow(workflow_id, db_user.id)
+                await callback.message.edit_text(
+                    render_workflow_details(workflow),
+                    reply_markup=workflow_actions_keyboard(workflow.id)
+                )
+                await callback.answer()
+                return
+            
+            elif action_type == "configure":
+                workflow = await service.get_user_workflow(workflow_id, db_user.id)
+                # Read by the trigger configuration steps
+                await state.update_data(
+                    workflow_id=str(workflow.id),
+                    n8n_workflow_id=workflow.n8n_workflow_id
+                )
+                await configure_trigger(callback, state)
+                return
+            
+            elif action_type == "activate":
+                workflow = await service.activate_workflow(workflow_id, db_user.id)
                 await callback.answer("✅ Workflow activé")
             
             elif action_type == "deactivate":
-                workflow = await service.deactivate_workflow(int(workflow_id), callback.from_user.id)
+                workflow = await service.deactivate_workflow(workflow_id, db_user.id)
                 await callback.answer("⏸️ Workflow désactivé")
             
             elif action_type == "delete":
-                # TODO: Ajouter confirmation avant suppression
-                await service.delete_workflow(int(workflow_id), callback.from_user.id)
+                await service.delete_workflow(workflow_id, db_user.id)
                 await callback.answer("🗑️ Workflow supprimé")
             
             elif action_type == "execute":
-                result = await service.execute_workflow(int(workflow_id), callback.from_user.id)
-                await callback.answer("▶️ Workflow exécuté")
+                # Runs on the execution workers; the status message gets the result
+                workflow = await service.get_user_workflow(workflow_id, db_user.id)
+                if not workflow.is_active:
+                    raise ValueError("Workflow is not active")
+                job = await execution_queue.enqueue(
+                    workflow_id=workflow.id,
+                    workflow_name=workflow.name,
+                    user_id=db_user.id,
+                    chat_id=callback.message.chat.id
+                )
+                await callback.answer("▶️ Exécution lancée")
+                status_message = await callback.message.answer(
+                    job.describe(),
+                    reply_markup=job_status_keyboard(job.id),
+                    parse_mode="Markdown"
+                )
+                await execution_queue.attach_message(job.id, status_message.message_id)
+                return
+            
+            else:
+                await callback.answer("❌ Action invalide")
+                return
             
             # Mettre à jour le message avec le nouvel état
-            await list_workflows(callback.message)
+            await list_workflows(callback.message, db_user, n8n_client)
             
     except ValueError as e:
         await callback.answer(f"❌ Erreur : {str(e)}")
@@ -180,20 +274,64 @@ async def workflow_action(callback: CallbackQuery):
         )
         await callback.answer("❌ Une erreur est survenue")
 
-async def finish_trigger_config(callback: types.CallbackQuery, state: FSMContext):
+def render_workflow_details(workflow) -> str:
+    """Plain-text summary shown above a workflow's action buttons."""
+    status = "✅ Actif" if workflow.is_active else "⏸️ Inactif"
+    text = f"⚙️ {workflow.name}\n\nStatut : {status}"
+    if workflow.description:
+        text += f"\n\n{workflow.description}"
+    return text
+
+@router.callback_query(F.data.startswith("job:"))
+async def job_status(callback: CallbackQuery, db_user: Optional[CachedUser] = None):
+    """Refresh the status of a workflow execution."""
+    job_id = callback.data.split(":", 1)[1]
+    job = await execution_queue.get(job_id)
+    if job is None or db_user is None or job.user_id != db_user.id:
+        await callback.answer("❌ Exécution introuvable ou expirée")
+        return
+
+    try:
+        await callback.message.edit_text(
+            job.describe(),
+            reply_markup=None if job.finished else job_status_keyboard(job.id),
+            parse_mode="Markdown"
+        )
+    except TelegramBadRequest:
+        # Unchanged status
+        pass
+    await callback.answer()
+
+@router.message(Command("jobs"))
+async def list_jobs(message: Message, db_user: Optional[CachedUser] = None):
+    """List the user's recent workflow executions."""
+    if not db_user:
+        await message.answer("❌ Utilisateur non trouvé")
+        return
+    jobs = await execution_queue.list_for_user(db_user.id)
+    if not jobs:
+        await message.answer("Aucune exécution récente.")
+        return
+
+    icons = {"queued": "⏳", "running": "⚙️", "succeeded": "✅", "failed": "❌"}
+    text = "**Exécutions récentes**\n\n"
+    for job in jobs:
+        text += f"{icons.get(job.status, '•')} {job.workflow_name} - `{job.id}`\n"
+    await message.answer(text, parse_mode="Markdown")
+
+async def finish_trigger_config(callback: types.CallbackQuery, state: FSMContext, n8n_client: N8NClient):
     """Finish trigger configuration."""
     data = await state.get_data()
     workflow_id = data.get("workflow_id")
     
-    async with N8NClient() as n8n:
-        workflow = await n8n.update_workflow(
-            workflow_id,
-            {
-                "trigger": {
-                    "type": "manual"
-                }
+    workflow = await n8n_client.update_workflow(
+        data.get("n8n_workflow_id"),
+        {
+            "trigger": {
+                "type": "manual"
             }
-        )
+        }
+    )
     
     await callback.message.edit_text(
         "✅ Configuration terminée!\n\n"
@@ -202,7 +340,7 @@ async def finish_trigger_config(callback: types.CallbackQuery, state: FSMContext
     )
     await state.clear()
 
-@router.message(Command("workflow", "templates"))
+@router.message(Command("workflow", magic=F.args == "templates"))
 async def list_templates(message: types.Message):
     """List available workflow templates."""
     templates = [
@@ -282,7 +420,7 @@ Choisissez quand le workflow doit s'exécuter:
     await callback.answer()
 
 @router.callback_query(F.data.startswith("trigger:"))
-async def set_trigger_type(callback: types.CallbackQuery, state: FSMContext):
+async def set_trigger_type(callback: types.CallbackQuery, state: FSMContext, n8n_client: N8NClient):
     """Handle trigger type selection."""
     trigger_type = callback.data.split(":")[1]
     data = await state.get_data()
@@ -302,8 +440,9 @@ async def set_trigger_type(callback: types.CallbackQuery, state: FSMContext):
     elif trigger_type == "webhook":
         await state.set_state(WorkflowStates.waiting_webhook)
         # Generate webhook URL
-        if workflow_id:
-            webhook_url = f"{settings.n8n_webhook_base_url}/workflow/{workflow_id}"
+        n8n_workflow_id = data.get("n8n_workflow_id")
+        if n8n_workflow_id and settings.n8n_base_url:
+            webhook_url = urljoin(settings.n8n_base_url, f"/webhook/{n8n_workflow_id}")
             await callback.message.edit_text(
                 f"🔗 **Webhook URL**\n\n"
                 f"`{webhook_url}`\n\n"
@@ -318,12 +457,12 @@ async def set_trigger_type(callback: types.CallbackQuery, state: FSMContext):
             )
     else:
         # Manual trigger - no additional config needed
-        await finish_trigger_config(callback, state)
+        await finish_trigger_config(callback, state, n8n_client)
     
     await callback.answer()
 
 @router.message(WorkflowStates.waiting_schedule)
-async def process_schedule(message: types.Message, state: FSMContext):
+async def process_schedule(message: types.Message, state: FSMContext, n8n_client: N8NClient):
     """Process schedule input and configure cron trigger."""
     schedule = message.text.strip().lower()
     data = await state.get_data()
@@ -338,18 +477,17 @@ async def process_schedule(message: types.Message, state: FSMContext):
     
     try:
         # Convert natural language to cron
-        cron = parse_schedule_to_cron(schedule)
+        cron = await parse_schedule_to_cron(schedule)
         
-        async with N8NClient() as n8n:
-            workflow = await n8n.update_workflow(
-                workflow_id,
-                {
-                    "trigger": {
-                        "type": "schedule",
-                        "cron": cron
-                    }
+        workflow = await n8n_client.update_workflow(
+            data.get("n8n_workflow_id"),
+            {
+                "trigger": {
+                    "type": "schedule",
+                    "cron": cron
                 }
-            )
+            }
+        )
         
         await message.answer(
             "✅ Planning configuré avec succès!\n\n"
@@ -1,17 +1,33 @@
 import asyncio
 import logging
+import os
+import signal
 from aiogram import Bot, Dispatcher
 from aiogram.fsm.storage.memory import MemoryStorage
 from aiogram.fsm.storage.redis import RedisStorage
 from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
 from aiohttp import web
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, generate_latest, start_http_server
 import structlog
 
 from src.core.config import settings
-from src.core.database.connection import create_tables
-from src.bot.handlers import basic, automation, ai
+from src.core.cache.ai_cache import ai_response_cache
+from src.core.cache.redis_client import close_redis
+from src.core.cache.user_cache import user_cache
+from src.core.database.connection import create_tables, dispose_engines
+from src.bot.handlers import basic, automation, ai, tasks, workflows
 from src.bot.middleware.auth import AuthMiddleware
-from src.bot.middleware.rate_limit import RateLimitMiddleware
+from src.bot.middleware.metrics import MetricsMiddleware
+from src.bot.middleware.profiling import ProfilingMiddleware, telegram_timing_middleware
+from src.bot.middleware.rate_limit import RateLimitMiddleware, RedisRateLimiter
+from src.bot.utils.storage import InstrumentedStorage
+from src.core.metrics import StatsCollector, serve_metrics
+from src.core.services.ai.dispatcher import ai_dispatcher
+from src.core.services.ai.router import ai_router
+from src.core.services.workflow_service import n8n_flight
+from src.integrations.n8n.client import N8NClient
+from src.workers.executions import ExecutionWorker, LocalExecutionQueue, execution_queue
+from src.workers.update_queue import QueueingRequestHandler
 
 # Configure structured logging
 structlog.configure(
@@ -28,45 +44,186 @@ logger = structlog.get_logger()
 async def create_bot():
     """Initialize bot and dispatcher"""
     bot = Bot(token=settings.telegram_bot_token)
+    bot.session.middleware(telegram_timing_middleware)
     
     # Storage selection based on environment
-    if settings.environment == "production":
+    # (multi-process serving and queue consumers always need the shared Redis storage)
+    if (settings.environment == "production" or settings.web_workers != 1
+            or settings.update_queue_enabled):
         storage = RedisStorage.from_url(settings.redis_url)
     else:
         storage = MemoryStorage()
     
-    dp = Dispatcher(storage=storage)
+    dp = Dispatcher(storage=InstrumentedStorage(storage))
     
     # Register middleware
+    rate_limit_middleware = RateLimitMiddleware()
+    dp.update.outer_middleware(ProfilingMiddleware())
+    dp.message.middleware(MetricsMiddleware())
+    dp.callback_query.middleware(MetricsMiddleware())
     dp.message.middleware(AuthMiddleware())
-    dp.message.middleware(RateLimitMiddleware())
+    dp.callback_query.middleware(AuthMiddleware())
+    dp.message.middleware(rate_limit_middleware)
+    
+    if settings.metrics_enabled:
+        register_stats_collector(rate_limit_middleware.limiter)
     
     # Register handlers
     dp.include_router(basic.router)
     dp.include_router(automation.router)
+    dp.include_router(workflows.router)
+    dp.include_router(tasks.router)
     dp.include_router(ai.router)
     
     return bot, dp
 
-async def on_startup(bot: Bot):
+def register_stats_collector(limiter):
+    """Export component stats() counters as Prometheus gauges"""
+    memory_limiter = limiter.fallback if isinstance(limiter, RedisRateLimiter) else limiter
+    
+    def router_stats():
+        stats = ai_router.stats()
+        return {
+            field: {name: provider[field] for name, provider in stats.items()}
+            for field in ("p50", "p95", "ttft_p50", "ttft_p95", "error_rate", "in_rotation")
+        }
+    
+    REGISTRY.register(StatsCollector({
+        "user_cache": user_cache.stats,
+        "ai_cache": ai_response_cache.stats,
+        "ai_dispatcher": ai_dispatcher.stats,
+        "ai_router": router_stats,
+        "ai_singleflight": ai.ai_flight.stats,
+        "ai_stream_singleflight": ai.ai_stream_flight.stats,
+        "n8n_singleflight": n8n_flight.stats,
+        "rate_limiter": memory_limiter.stats,
+    }))
+
+async def metrics_handler(request: web.Request) -> web.Response:
+    """Prometheus scrape endpoint"""
+    return web.Response(body=generate_latest(REGISTRY), headers={"Content-Type": CONTENT_TYPE_LATEST})
+
+async def on_startup(bot: Bot, dispatcher: Dispatcher):
     """Bot startup handler"""
     logger.info("Bot starting up...")
+    primary = dispatcher.workflow_data.get("primary", True)
     
     # Create database tables
-    create_tables()
+    if primary:
+        create_tables()
+    
+    # Application-lifetime HTTP pools, injected into handlers by name
+    dispatcher["n8n_client"] = await N8NClient().start()
+    await ai_router.start()
+    
+    if isinstance(execution_queue, LocalExecutionQueue):
+        # No Redis: execution jobs run as tasks of this process
+        execution_queue.start(bot, dispatcher["n8n_client"])
+    elif settings.execution_worker_embedded:
+        # In-process execution worker (dedicated worker processes may run alongside)
+        worker = ExecutionWorker(bot, dispatcher["n8n_client"])
+        dispatcher["execution_worker"] = worker
+        dispatcher["execution_worker_task"] = asyncio.create_task(worker.run())
     
     # Set webhook if configured
-    if settings.telegram_webhook_url:
+    if settings.telegram_webhook_url and primary:
         await bot.set_webhook(settings.telegram_webhook_url)
         logger.info("Webhook set", url=settings.telegram_webhook_url)
     
     logger.info("Bot started successfully")
 
-async def on_shutdown(bot: Bot):
+async def on_shutdown(bot: Bot, dispatcher: Dispatcher):
     """Bot shutdown handler"""
     logger.info("Bot shutting down...")
+    worker = dispatcher.workflow_data.get("execution_worker")
+    if worker:
+        # Lets in-flight executions finish before the n8n client closes
+        worker.stop()
+        try:
+            await dispatcher["execution_worker_task"]
+        except Exception as e:
+            # Died earlier (e.g. Redis unreachable): the cleanup below still runs
+            logger.error("Execution worker failed", error=str(e))
+    if isinstance(execution_queue, LocalExecutionQueue):
+        await execution_queue.close()
+    n8n_client = dispatcher.workflow_data.get("n8n_client")
+    if n8n_client:
+        await n8n_client.close()
+    await ai_router.close()
+    await dispose_engines()
+    await close_redis()
     await bot.session.close()
 
+def build_webhook_app(bot: Bot, dp: Dispatcher, metrics: bool = True) -> web.Application:
+    """aiohttp application serving the Telegram webhook
+    
+    With `metrics`, it also serves /metrics; multi-process workers pass
+    False since their shared port would answer from a random worker.
+    """
+    app = web.Application()
+    
+    # Setup webhook handling: inline, or enqueue for the update workers
+    if settings.update_queue_enabled:
+        webhook_requests_handler = QueueingRequestHandler(bot=bot)
+    else:
+        webhook_requests_handler = SimpleRequestHandler(
+            dispatcher=dp,
+            bot=bot,
+        )
+    webhook_requests_handler.register(app, path="/webhook")
+    setup_application(app, dp, bot=bot)
+    if metrics and settings.metrics_enabled:
+        app.router.add_get("/metrics", metrics_handler)
+    return app
+
+async def run_webhook(app: web.Application, reuse_port: bool = False, ready=None):
+    """Serve `app` until SIGTERM/SIGINT, then shut down gracefully
+    
+    `ready` (an Event-like object) is set once startup has run and the
+    port accepts connections.
+    """
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, settings.web_host, settings.web_port, reuse_port=reuse_port)
+    await site.start()
+    logger.info("Webhook server listening", host=settings.web_host, port=settings.web_port, pid=os.getpid())
+    if ready is not None:
+        ready.set()
+    
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+    try:
+        await stop.wait()
+    finally:
+        # Stops accepting, drains in-flight requests, then runs on_shutdown
+        await runner.cleanup()
+
+async def run_worker(index: int, ready=None):
+    """Entry point of one webhook worker process (see src/bot/server.py)
+    
+    `ready` is set once the worker serves the webhook port.
+    """
+    bot, dp = await create_bot()
+    
+    # Only the first worker performs one-off startup work
+    dp["primary"] = index == 0
+    dp.startup.register(on_startup)
+    dp.shutdown.register(on_shutdown)
+    
+    metrics_server = None
+    if settings.metrics_enabled:
+        # Each worker has its own registry: expose it on its own port, bound
+        # in the background since a worker being replaced may still hold it
+        metrics_server = asyncio.create_task(serve_metrics(settings.metrics_port + index))
+    
+    try:
+        await run_webhook(build_webhook_app(bot, dp, metrics=False), reuse_port=True, ready=ready)
+    finally:
+        if metrics_server:
+            metrics_server.cancel()
+
 async def main():
     """Main application entry point"""
     bot, dp = await create_bot()
@@ -77,22 +234,23 @@ async def main():
     
     if settings.telegram_webhook_url:
         # Webhook mode
-        app = web.Application()
-        
-        # Setup webhook handling
-        webhook_requests_handler = SimpleRequestHandler(
-            dispatcher=dp,
-            bot=bot,
-        )
-        webhook_requests_handler.register(app, path="/webhook")
-        setup_application(app, dp, bot=bot)
-        
-        # Start webhook server
-        web.run_app(app, host="0.0.0.0", port=8000)
+        await run_webhook(build_webhook_app(bot, dp))
     else:
         # Polling mode (development)
         logger.info("Starting bot in polling mode")
+        if settings.metrics_enabled:
+            # No web app in polling mode: serve metrics on a side port
+            start_http_server(settings.metrics_port)
+            logger.info("Metrics server started", port=settings.metrics_port)
         await dp.start_polling(bot)
 
+def run():
+    """Start the bot: multi-process webhook server or single process"""
+    if settings.telegram_webhook_url and settings.web_workers != 1:
+        from src.bot.server import serve
+        serve()
+    else:
+        asyncio.run(main())
+
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    run()
@@ -1,10 +1,12 @@
 from typing import Callable, Dict, Any, Awaitable
 from aiogram import BaseMiddleware
 from aiogram.types import TelegramObject, User
+import time
 import structlog
 
-from src.core.database.connection import get_db
-from src.core.database.models import User as DBUser
+from src.core.cache.user_cache import user_cache
+from src.core.metrics import MIDDLEWARE_LATENCY
+from src.core.services.user_service import user_registrar
 
 logger = structlog.get_logger()
 
@@ -23,22 +25,18 @@ class AuthMiddleware(BaseMiddleware):
         if not user:
             return await handler(event, data)
         
-        # Check if user exists in database
-        with get_db() as db:
-            db_user = db.query(DBUser).filter(DBUser.telegram_id == user.id).first()
-            
-            if not db_user:
-                # Create new user
-                db_user = DBUser(
-                    telegram_id=user.id,
-                    username=user.username,
-                    first_name=user.first_name
-                )
-                db.add(db_user)
-                db.commit()
-                logger.info("New user auto-registered", telegram_id=user.id)
-            
-            # Add user to data context
-            data["db_user"] = db_user
+        started = time.perf_counter()
+        
+        # Hot path: served from the user cache without touching the database
+        cached_user = await user_cache.get(user.id)
+        if cached_user is None:
+            # Cold miss: race-free upsert, batched with concurrent registrations
+            cached_user = await user_registrar.register(user)
+            await user_cache.set(cached_user)
+        
+        MIDDLEWARE_LATENCY.labels("auth").observe(time.perf_counter() - started)
+        
+        # Add user to data context
+        data["db_user"] = cached_user
         
         return await handler(event, data)
\ No newline at end of file
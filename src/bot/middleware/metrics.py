@@ -0,0 +1,34 @@
+from typing import Callable, Dict, Any, Awaitable
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+import time
+
+from src.core.metrics import HANDLER_LATENCY, UPDATES_TOTAL
+
+class MetricsMiddleware(BaseMiddleware):
+    """Counts updates and times handlers (register as inner middleware)"""
+    
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        
+        event_type = type(event).__name__
+        handler_object = data.get("handler")
+        name = (
+            f"{handler_object.callback.__module__}.{handler_object.callback.__name__}"
+            if handler_object else "unhandled"
+        )
+        
+        started = time.perf_counter()
+        status = "ok"
+        try:
+            return await handler(event, data)
+        except Exception:
+            status = "error"
+            raise
+        finally:
+            HANDLER_LATENCY.labels(event_type, name).observe(time.perf_counter() - started)
+            UPDATES_TOTAL.labels(event_type, name, status).inc()
@@ -0,0 +1,96 @@
+from typing import Callable, Dict, Any, Awaitable, List, Optional
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+import cProfile
+import io
+import pstats
+import random
+import time
+import structlog
+
+from src.core.config import settings
+from src.core.profiling import record_io, start_io_breakdown
+
+logger = structlog.get_logger()
+
+class ProfilingMiddleware(BaseMiddleware):
+    """Times each update end to end and reports slow ones (outer update middleware).
+    
+    Awaited I/O is attributed per update through a context variable that
+    the DB session, HTTP clients, AI router and Telegram session feed, so
+    the breakdown is exact even with many updates in flight. A sampled
+    fraction of updates additionally runs under cProfile; since cProfile
+    sees every coroutine scheduled on the thread, only one update is
+    profiled at a time and its frames may include interleaved work.
+    """
+    
+    def __init__(
+        self,
+        sample_rate: float = settings.profile_sample_rate,
+        slow_threshold: float = settings.slow_update_threshold,
+        top_n: int = settings.profile_top_n
+    ):
+        self.sample_rate = sample_rate
+        self.slow_threshold = slow_threshold
+        self.top_n = top_n
+        self._profiling = False
+    
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        
+        breakdown = start_io_breakdown()
+        profiler = None
+        if self.sample_rate and not self._profiling and random.random() < self.sample_rate:
+            profiler = cProfile.Profile()
+            self._profiling = True
+            profiler.enable()
+        
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            duration = time.perf_counter() - started
+            if profiler is not None:
+                profiler.disable()
+                self._profiling = False
+            if duration >= self.slow_threshold:
+                self._report(event, duration, breakdown, profiler)
+    
+    def _report(self, event: TelegramObject, duration: float,
+                breakdown: Dict[str, float], profiler: Optional[cProfile.Profile]) -> None:
+        io_total = sum(breakdown.values())
+        logger.warning(
+            "Slow update",
+            update_id=getattr(event, "update_id", None),
+            update_type=getattr(event, "event_type", type(event).__name__),
+            duration=round(duration, 4),
+            io={kind: round(seconds, 4) for kind, seconds in breakdown.items()},
+            cpu_or_other=round(max(0.0, duration - io_total), 4),
+            top_frames=self._top_frames(profiler) if profiler else None
+        )
+    
+    def _top_frames(self, profiler: cProfile.Profile) -> List[Dict[str, Any]]:
+        """Most expensive functions by cumulative time, as compact dicts"""
+        stats = pstats.Stats(profiler, stream=io.StringIO())
+        rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)
+        return [
+            {
+                "func": f"{filename.rsplit('/', 1)[-1]}:{line}:{name}",
+                "calls": calls,
+                "tottime": round(tottime, 4),
+                "cumtime": round(cumtime, 4)
+            }
+            for (filename, line, name), (_, calls, tottime, cumtime, _) in rows[:self.top_n]
+        ]
+
+async def telegram_timing_middleware(make_request, bot, method):
+    """Bot session middleware attributing Telegram API time to the update"""
+    started = time.perf_counter()
+    try:
+        return await make_request(bot, method)
+    finally:
+        record_io("telegram", time.perf_counter() - started)
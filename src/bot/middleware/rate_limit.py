@@ -1,46 +1,203 @@
-from typing import Callable, Dict, Any, Awaitable
+from collections import OrderedDict
+from typing import Callable, Dict, Any, Awaitable, Optional
 from aiogram import BaseMiddleware
 from aiogram.types import TelegramObject, Message
+import os
+import sys
 import time
 import structlog
-from collections import defaultdict, deque
 
+from src.core.cache.redis_client import get_redis
 from src.core.config import settings
+from src.core.metrics import MIDDLEWARE_LATENCY, RATE_LIMIT_REJECTIONS
 
 logger = structlog.get_logger()
 
+# Sliding-log limiter executed atomically on the Redis server.
+# Uses the server clock so every replica shares the same time base.
+SLIDING_WINDOW_SCRIPT = """
+local key = KEYS[1]
+local window = tonumber(ARGV[1])
+local limit = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000000 + tonumber(t[2])
+redis.call('ZREMRANGEBYSCORE', key, 0, now - window)
+if redis.call('ZCARD', key) >= limit then
+    return 0
+end
+redis.call('ZADD', key, now, now .. '-' .. ARGV[3])
+redis.call('PEXPIRE', key, math.ceil(window / 1000))
+return 1
+"""
+
+class _Bucket:
+    """Token bucket state for one user (two floats, no per-instance dict)"""
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, tokens: float, updated: float):
+        self.tokens = tokens
+        self.updated = updated
+
+class MemoryRateLimiter:
+    """Per-process token-bucket limiter (single replica / fallback).
+
+    Buckets refill at `limit / window` tokens per second up to `limit`. A
+    bucket idle for a full window is back at capacity, i.e. identical to an
+    absent one, so periodic sweeps drop it. Buckets are kept in LRU order
+    (moved to the end on every hit), so sweeps only look at the idle front
+    and `max_tracked` is enforced by evicting the least recently active
+    user, never one that is currently sending.
+    """
+
+    def __init__(self, limit: int, window: float, max_tracked: int = 100000,
+                 sweep_interval: float = 60.0):
+        self.limit = limit
+        self.window = window
+        self.rate = limit / window
+        self.max_tracked = max_tracked
+        self.sweep_interval = sweep_interval
+        self._buckets: "OrderedDict[int, _Bucket]" = OrderedDict()
+        self._next_sweep = time.monotonic() + sweep_interval
+        self.evictions = 0
+
+    async def hit(self, user_id: int) -> bool:
+        """Record a request; return False if the user is over the limit"""
+        now = time.monotonic()
+        if now >= self._next_sweep:
+            self.sweep(now)
+
+        bucket = self._buckets.get(user_id)
+        if bucket is None:
+            if len(self._buckets) >= self.max_tracked:
+                self._evict()
+            self._buckets[user_id] = _Bucket(self.limit - 1, now)
+            return True
+        self._buckets.move_to_end(user_id)
+
+        # Refill, then try to take a token
+        tokens = min(self.limit, bucket.tokens + (now - bucket.updated) * self.rate)
+        bucket.updated = now
+        if tokens < 1:
+            bucket.tokens = tokens
+            return False
+        bucket.tokens = tokens - 1
+        return True
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        """Drop buckets idle long enough to be full again; return count removed"""
+        now = now if now is not None else time.monotonic()
+        self._next_sweep = now + self.sweep_interval
+        # LRU order: idle buckets are all at the front, stop at the first active one
+        removed = 0
+        while self._buckets:
+            bucket = next(iter(self._buckets.values()))
+            if now - bucket.updated < self.window:
+                break
+            self._buckets.popitem(last=False)
+            removed += 1
+        if removed:
+            logger.debug("Rate limiter sweep", removed=removed, **self.stats())
+        return removed
+
+    def _evict(self) -> None:
+        """Make room under the hard cap, dropping the least recently active users"""
+        while len(self._buckets) >= self.max_tracked:
+            self._buckets.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, int]:
+        """Tracked users and approximate memory footprint in bytes"""
+        tracked = len(self._buckets)
+        footprint = sys.getsizeof(self._buckets)
+        if tracked:
+            sample = next(iter(self._buckets.values()))
+            footprint += tracked * (sys.getsizeof(sample) + 2 * sys.getsizeof(0.0))
+        return {
+            "tracked_users": tracked,
+            "footprint_bytes": footprint,
+            "evictions": self.evictions
+        }
+
+class RedisRateLimiter:
+    """Distributed sliding-window limiter shared by all replicas.
+
+    Each check is a single EVALSHA round trip; if Redis is unavailable the
+    check is delegated to an in-memory limiter so the bot keeps working.
+    """
+
+    def __init__(self, limit: int, window: float, prefix: str = "ratelimit:",
+                 fallback: Optional[MemoryRateLimiter] = None):
+        self.limit = limit
+        self.window_us = int(window * 1_000_000)
+        self.prefix = prefix
+        self.fallback = fallback or _memory_limiter()
+        self._script = None
+        # Unique per process, disambiguates members with the same timestamp
+        self._token = os.urandom(4).hex()
+        self._seq = 0
+
+    async def hit(self, user_id: int) -> bool:
+        """Record a request; return False if the user is over the limit"""
+        if self._script is None:
+            self._script = get_redis().register_script(SLIDING_WINDOW_SCRIPT)
+
+        self._seq += 1
+        try:
+            allowed = await self._script(
+                keys=[f"{self.prefix}{user_id}"],
+                args=[self.window_us, self.limit, f"{self._token}{self._seq}"]
+            )
+        except Exception as e:
+            logger.warning("Redis rate limiter unavailable, using memory fallback", error=str(e))
+            return await self.fallback.hit(user_id)
+
+        return bool(allowed)
+
+def _memory_limiter() -> MemoryRateLimiter:
+    return MemoryRateLimiter(
+        settings.rate_limit_requests,
+        settings.rate_limit_window,
+        max_tracked=settings.rate_limit_max_tracked_users,
+        sweep_interval=settings.rate_limit_sweep_interval
+    )
+
+def create_rate_limiter():
+    """Build the limiter selected by `rate_limit_backend`"""
+    backend = settings.rate_limit_backend
+    if backend is None:
+        backend = "redis" if settings.environment == "production" else "memory"
+
+    if backend == "redis":
+        return RedisRateLimiter(settings.rate_limit_requests, settings.rate_limit_window)
+    return _memory_limiter()
+
 class RateLimitMiddleware(BaseMiddleware):
     """Rate limiting middleware to prevent spam"""
-    
-    def __init__(self):
-        self.user_requests = defaultdict(deque)
-    
+
+    def __init__(self, limiter=None):
+        self.limiter = limiter or create_rate_limiter()
+
     async def __call__(
         self,
         handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
         event: TelegramObject,
         data: Dict[str, Any]
     ) -> Any:
-        
+
         # Only apply to messages
         if not isinstance(event, Message):
             return await handler(event, data)
-        
+
         user_id = event.from_user.id
-        current_time = time.time()
-        
-        # Clean old requests
-        user_queue = self.user_requests[user_id]
-        while user_queue and current_time - user_queue[0] > settings.rate_limit_window:
-            user_queue.popleft()
-        
+
         # Check rate limit
-        if len(user_queue) >= settings.rate_limit_requests:
+        started = time.perf_counter()
+        allowed = await self.limiter.hit(user_id)
+        MIDDLEWARE_LATENCY.labels("rate_limit").observe(time.perf_counter() - started)
+        if not allowed:
+            RATE_LIMIT_REJECTIONS.inc()
             logger.warning("Rate limit exceeded", user_id=user_id)
             await event.answer("⚠️ Vous envoyez trop de messages. Attendez un moment avant de continuer.")
             return
-        
-        # Add current request
-        user_queue.append(current_time)
-        
+
         return await handler(event, data)
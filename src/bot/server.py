@@ -0,0 +1,119 @@
+"""Multi-process webhook server with shared-nothing workers."""
+import asyncio
+import multiprocessing
+import os
+import signal
+import socket
+import time
+from typing import Dict
+import structlog
+
+from src.core.config import settings
+
+logger = structlog.get_logger()
+
+def _worker_main(index: int, ready) -> None:
+    """Worker process entry point: one event loop, its own pools"""
+    # Imported in the child so every worker builds its own engines, Redis
+    # and HTTP pools instead of inheriting the master's
+    from src.bot.main import run_worker
+    asyncio.run(run_worker(index, ready))
+
+class WorkerSupervisor:
+    """Forks N webhook workers that share one port through SO_REUSEPORT.
+
+    The kernel balances incoming connections between workers; state is
+    shared only through Postgres and the Redis FSM storage. Crashed workers
+    are respawned. SIGHUP triggers a rolling restart (a replacement is
+    started before the old worker is asked to stop), SIGTERM/SIGINT stop
+    every worker gracefully. Workers serve metrics on their own port,
+    `metrics_port + index`, never on the shared one.
+    """
+
+    def __init__(self, workers: int, shutdown_timeout: float, startup_timeout: float = 60.0):
+        self.workers = workers
+        self.shutdown_timeout = shutdown_timeout
+        self.startup_timeout = startup_timeout
+        self._context = multiprocessing.get_context("spawn")
+        self._processes: Dict[int, multiprocessing.Process] = {}
+        self._stopping = False
+        self._reload = False
+
+    def _spawn(self, index: int) -> multiprocessing.Process:
+        ready = self._context.Event()
+        process = self._context.Process(target=_worker_main, args=(index, ready), name=f"linklet-worker-{index}")
+        process.start()
+        process.ready = ready
+        logger.info("Worker started", worker=index, pid=process.pid)
+        return process
+
+    def _wait_ready(self, process: multiprocessing.Process) -> bool:
+        """Whether `process` serves the webhook port within the startup timeout"""
+        deadline = time.monotonic() + self.startup_timeout
+        while not process.ready.wait(0.1):
+            if not process.is_alive() or time.monotonic() > deadline:
+                return False
+        return True
+
+    def _stop(self, process: multiprocessing.Process) -> None:
+        """SIGTERM, then SIGKILL after the shutdown timeout"""
+        if not process.is_alive():
+            return
+        process.terminate()
+        process.join(self.shutdown_timeout)
+        if process.is_alive():
+            logger.warning("Worker did not stop in time, killing", pid=process.pid)
+            process.kill()
+            process.join()
+
+    def _rolling_restart(self) -> None:
+        for index, old in list(self._processes.items()):
+            replacement = self._spawn(index)
+            # Drain the old worker only once the replacement serves the
+            # webhook port; it binds its metrics port once the old one frees it
+            if not self._wait_ready(replacement):
+                logger.error("Replacement worker not ready, keeping the old one", worker=index)
+                self._stop(replacement)
+                return
+            self._processes[index] = replacement
+            self._stop(old)
+        logger.info("Rolling restart complete")
+
+    def run(self) -> None:
+        signal.signal(signal.SIGTERM, self._on_stop)
+        signal.signal(signal.SIGINT, self._on_stop)
+        signal.signal(signal.SIGHUP, self._on_reload)
+
+        for index in range(self.workers):
+            self._processes[index] = self._spawn(index)
+
+        while not self._stopping:
+            if self._reload:
+                self._reload = False
+                self._rolling_restart()
+            for index, process in list(self._processes.items()):
+                if not process.is_alive() and not self._stopping:
+                    logger.error("Worker died, respawning", worker=index, exitcode=process.exitcode)
+                    self._processes[index] = self._spawn(index)
+            time.sleep(0.5)
+
+        logger.info("Stopping workers...")
+        for process in self._processes.values():
+            if process.is_alive():
+                process.terminate()
+        for process in self._processes.values():
+            self._stop(process)
+
+    def _on_stop(self, signum, frame) -> None:
+        self._stopping = True
+
+    def _on_reload(self, signum, frame) -> None:
+        self._reload = True
+
+def serve(workers: int = None) -> None:
+    """Run the webhook server with `workers` processes (blocking)"""
+    workers = workers or settings.web_workers or os.cpu_count() or 1
+    if not hasattr(socket, "SO_REUSEPORT"):
+        logger.warning("SO_REUSEPORT unavailable on this platform, running a single worker")
+        workers = 1
+    WorkerSupervisor(workers, settings.web_shutdown_timeout, settings.web_startup_timeout).run()
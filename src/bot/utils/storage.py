@@ -0,0 +1,43 @@
+"""FSM storage wrapper recording operation latency."""
+import time
+from typing import Any, Dict, Optional
+from aiogram.fsm.storage.base import BaseStorage, StorageKey, StateType
+
+from src.core.metrics import FSM_STORAGE_LATENCY
+
+class InstrumentedStorage(BaseStorage):
+    """Delegates to another storage and times every call"""
+
+    def __init__(self, storage: BaseStorage):
+        self.storage = storage
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        started = time.perf_counter()
+        try:
+            await self.storage.set_state(key, state)
+        finally:
+            FSM_STORAGE_LATENCY.labels("set_state").observe(time.perf_counter() - started)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        started = time.perf_counter()
+        try:
+            return await self.storage.get_state(key)
+        finally:
+            FSM_STORAGE_LATENCY.labels("get_state").observe(time.perf_counter() - started)
+
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        started = time.perf_counter()
+        try:
+            await self.storage.set_data(key, data)
+        finally:
+            FSM_STORAGE_LATENCY.labels("set_data").observe(time.perf_counter() - started)
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        started = time.perf_counter()
+        try:
+            return await self.storage.get_data(key)
+        finally:
+            FSM_STORAGE_LATENCY.labels("get_data").observe(time.perf_counter() - started)
+
+    async def close(self) -> None:
+        await self.storage.close()
@@ -0,0 +1,92 @@
+"""Progressive delivery of streamed text into a Telegram message."""
+import asyncio
+import time
+from typing import Optional
+from aiogram.exceptions import TelegramBadRequest, TelegramRetryAfter
+from aiogram.types import Message
+import structlog
+
+logger = structlog.get_logger()
+
+# Telegram rejects messages longer than 4096 characters
+TELEGRAM_MESSAGE_LIMIT = 4096
+
+class MessageStreamer:
+    """Sends one message on the first chunk, then edits it as text arrives.
+
+    Edits are coalesced to at most one every `min_interval` seconds (and
+    postponed on flood-control errors) to stay under Telegram's edit rate
+    limits. Intermediate renders are plain text because partial Markdown
+    usually fails to parse; the final render uses `parse_mode`. Text that
+    outgrows one message continues in a new one.
+    """
+
+    def __init__(
+        self,
+        message: Message,
+        prefix: str = "🤖 ",
+        min_interval: float = 1.0,
+        parse_mode: Optional[str] = "Markdown",
+        max_length: int = TELEGRAM_MESSAGE_LIMIT - 96
+    ):
+        self.message = message
+        self.prefix = prefix
+        self.min_interval = min_interval
+        self.parse_mode = parse_mode
+        self.max_length = max_length
+        self._text = ""
+        self._sent: Optional[Message] = None
+        self._rendered = ""
+        self._next_edit = 0.0
+
+    async def feed(self, chunk: str) -> None:
+        """Append a chunk and render if the throttle allows it."""
+        self._text += chunk
+
+        # Roll over to a new message once the current one is full
+        while len(self._text) > self.max_length:
+            head, self._text = self._text[:self.max_length], self._text[self.max_length:]
+            await self._render(head, final=True)
+            self._sent = None
+            self._rendered = ""
+
+        if self._sent is None or time.monotonic() >= self._next_edit:
+            await self._render(self._text)
+
+    async def finish(self) -> None:
+        """Render the complete text with formatting."""
+        if self._text or self._sent is None:
+            await self._render(self._text, final=True)
+
+    async def _render(self, text: str, final: bool = False) -> None:
+        body = f"{self.prefix}{text}"
+        if body == self._rendered and not final:
+            return
+
+        parse_mode = self.parse_mode if final else None
+        try:
+            await self._send(body, parse_mode)
+        except TelegramRetryAfter as e:
+            # Flood control: skip intermediate renders, wait for the final one
+            self._next_edit = time.monotonic() + e.retry_after
+            if not final:
+                return
+            await asyncio.sleep(e.retry_after)
+            await self._send(body, parse_mode)
+        except TelegramBadRequest as e:
+            if "not modified" in str(e):
+                return
+            if parse_mode is None:
+                raise
+            # Model output is not always valid Markdown
+            logger.debug("Markdown render failed, sending plain text", error=str(e))
+            await self._send(body, None)
+
+        self._rendered = body
+        self._next_edit = time.monotonic() + self.min_interval
+
+    async def _send(self, body: str, parse_mode: Optional[str]) -> None:
+        if self._sent is None:
+            self._sent = await self.message.answer(body, parse_mode=parse_mode)
+        else:
+            await self._sent.edit_text(body, parse_mode=parse_mode)
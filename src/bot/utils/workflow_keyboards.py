@@ -1,5 +1,5 @@
 """Workflow-related keyboard layouts."""
-from typing import List, Dict
+from typing import Collection, List, Dict, Optional
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from src.core.database.models import Workflow
 
@@ -18,8 +18,17 @@ def create_workflow_keyboard() -> InlineKeyboardMarkup:
         ]
     )
 
-def workflow_list_keyboard(workflows: List[Workflow]) -> InlineKeyboardMarkup:
-    """Create keyboard with workflow list."""
+def workflow_list_keyboard(
+    workflows: List[Workflow],
+    prev_cursor: Optional[str] = None,
+    next_cursor: Optional[str] = None,
+    back_callback: str = "workflow_menu"
+) -> InlineKeyboardMarkup:
+    """Create keyboard with one page of the workflow list.
+    
+    Navigation buttons carry the keyset cursor of the adjacent page
+    (`wfpage:p:<cursor>` / `wfpage:n:<cursor>`).
+    """
     buttons = []
     for workflow in workflows:
         buttons.append([
@@ -29,12 +38,82 @@ def workflow_list_keyboard(workflows: List[Workflow]) -> InlineKeyboardMarkup:
             )
         ])
     
+    navigation = []
+    if prev_cursor:
+        navigation.append(InlineKeyboardButton(text="⬅️ Précédent", callback_data=f"wfpage:p:{prev_cursor}"))
+    if next_cursor:
+        navigation.append(InlineKeyboardButton(text="Suivant ➡️", callback_data=f"wfpage:n:{next_cursor}"))
+    if navigation:
+        buttons.append(navigation)
+    
+    if workflows:
+        buttons.append([
+            InlineKeyboardButton(text="☑️ Sélection multiple", callback_data="wfsel:on")
+        ])
     buttons.append([
-        InlineKeyboardButton(text="◀️ Retour", callback_data="workflow_menu")
+        InlineKeyboardButton(text="◀️ Retour", callback_data=back_callback)
+    ])
+    
+    return InlineKeyboardMarkup(inline_keyboard=buttons)
+
+def workflow_select_keyboard(
+    workflows: List[Workflow],
+    selected: Collection[str],
+    prev_cursor: Optional[str] = None,
+    next_cursor: Optional[str] = None
+) -> InlineKeyboardMarkup:
+    """Create keyboard for selecting several workflows at once.
+    
+    Buttons toggle a workflow (`wfsel:t:<id>`), page through the list
+    keeping the selection (`wfsel:p:` / `wfsel:n:` + cursor) and run an
+    action on every selected workflow (`wfsel:do:<action>`).
+    """
+    buttons = []
+    for workflow in workflows:
+        mark = "✅" if str(workflow.id) in selected else "⬜"
+        buttons.append([
+            InlineKeyboardButton(
+                text=f"{mark} {workflow.name}",
+                callback_data=f"wfsel:t:{workflow.id}"
+            )
+        ])
+    
+    navigation = []
+    if prev_cursor:
+        navigation.append(InlineKeyboardButton(text="⬅️ Précédent", callback_data=f"wfsel:p:{prev_cursor}"))
+    if next_cursor:
+        navigation.append(InlineKeyboardButton(text="Suivant ➡️", callback_data=f"wfsel:n:{next_cursor}"))
+    if navigation:
+        buttons.append(navigation)
+    
+    if selected:
+        buttons.extend([
+            [
+                InlineKeyboardButton(text="✅ Activer", callback_data="wfsel:do:activate"),
+                InlineKeyboardButton(text="⏸️ Désactiver", callback_data="wfsel:do:deactivate")
+            ],
+            [
+                InlineKeyboardButton(text="▶️ Exécuter", callback_data="wfsel:do:execute"),
+                InlineKeyboardButton(text="🗑️ Supprimer", callback_data="wfsel:do:delete")
+            ]
+        ])
+    buttons.append([
+        InlineKeyboardButton(text="✖️ Terminer", callback_data="wfsel:off")
     ])
     
     return InlineKeyboardMarkup(inline_keyboard=buttons)
 
+def confirm_bulk_delete_keyboard(count: int) -> InlineKeyboardMarkup:
+    """Create keyboard confirming the deletion of the selected workflows."""
+    return InlineKeyboardMarkup(
+        inline_keyboard=[
+            [
+                InlineKeyboardButton(text=f"🗑️ Supprimer ({count})", callback_data="wfsel:do:delete!"),
+                InlineKeyboardButton(text="◀️ Annuler", callback_data="wfsel:show")
+            ]
+        ]
+    )
+
 def workflow_actions_keyboard(workflow_id: int) -> InlineKeyboardMarkup:
     """Create keyboard with workflow actions."""
     return InlineKeyboardMarkup(
@@ -91,6 +170,16 @@ def workflow_template_keyboard(templates: List[Dict]) -> InlineKeyboardMarkup:
     
     return InlineKeyboardMarkup(inline_keyboard=buttons)
 
+def job_status_keyboard(job_id: str) -> InlineKeyboardMarkup:
+    """Create keyboard to refresh an execution job's status."""
+    return InlineKeyboardMarkup(
+        inline_keyboard=[
+            [
+                InlineKeyboardButton(text="🔄 Statut", callback_data=f"job:{job_id}")
+            ]
+        ]
+    )
+
 def back_keyboard() -> InlineKeyboardMarkup:
     """Create back button keyboard."""
     return InlineKeyboardMarkup(
@@ -0,0 +1,132 @@
+"""Redis cache for AI completions keyed on the normalized prompt."""
+import hashlib
+import json
+import re
+import time
+import unicodedata
+from typing import Any, Dict, List, Optional
+import structlog
+
+from src.core.cache.redis_client import get_redis
+from src.core.config import settings
+
+logger = structlog.get_logger()
+
+# Store a response and evict the oldest entries beyond the size bound, in
+# one round trip. The ZSET indexes entry keys by insertion time.
+SET_AND_EVICT_SCRIPT = """
+local index = KEYS[1]
+local key = KEYS[2]
+local value = ARGV[1]
+local ttl = tonumber(ARGV[2])
+local max_entries = tonumber(ARGV[3])
+local now = tonumber(ARGV[4])
+redis.call('SET', key, value, 'EX', ttl)
+redis.call('ZADD', index, now, key)
+redis.call('ZREMRANGEBYSCORE', index, 0, now - ttl)
+local overflow = redis.call('ZCARD', index) - max_entries
+if overflow > 0 then
+    local evicted = redis.call('ZPOPMIN', index, overflow)
+    for i = 1, #evicted, 2 do
+        redis.call('DEL', evicted[i])
+    end
+end
+return 1
+"""
+
+_WHITESPACE = re.compile(r"\s+")
+_TRAILING_PUNCTUATION = re.compile(r"[\s?!.…]+$")
+
+def normalize_prompt(text: str) -> str:
+    """Canonical form of a user message for exact-match lookups"""
+    text = unicodedata.normalize("NFKC", text).lower()
+    text = _WHITESPACE.sub(" ", text).strip()
+    return _TRAILING_PUNCTUATION.sub("", text)
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token)"""
+    return max(1, (len(text) + 3) // 4)
+
+class AIResponseCache:
+    """Exact-match completion cache with TTL and a bound on entry count.
+
+    Only deterministic-enough requests are cached: temperature at or below
+    `max_temperature` and a single choice. Lookups and writes never raise;
+    Redis errors are logged and treated as misses.
+    """
+
+    def __init__(self, ttl: int, max_entries: int, max_temperature: float, prefix: str = "ai:cache:"):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_temperature = max_temperature
+        self.prefix = prefix
+        self._script = None
+        self.hits = 0
+        self.misses = 0
+        self.tokens_saved = 0
+
+    def is_cacheable(self, temperature: float, **params: Any) -> bool:
+        """Whether a request with these sampling settings may be cached"""
+        return temperature <= self.max_temperature and params.get("n", 1) == 1
+
+    def make_key(self, messages: List[Dict[str, str]], **params: Any) -> str:
+        """Hash of the normalized conversation and generation parameters"""
+        payload = json.dumps(
+            {
+                "messages": [
+                    {"role": m["role"], "content": normalize_prompt(m["content"])}
+                    for m in messages
+                ],
+                "params": params
+            },
+            sort_keys=True,
+            ensure_ascii=False
+        )
+        return self.prefix + hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    async def get(self, key: str) -> Optional[str]:
+        """Cached response for `key`, or None"""
+        try:
+            raw = await get_redis().get(key)
+        except Exception as e:
+            logger.warning("AI cache read failed", error=str(e))
+            raw = None
+
+        if raw is None:
+            self.misses += 1
+            return None
+
+        entry = json.loads(raw)
+        self.hits += 1
+        self.tokens_saved += entry["tokens"]
+        return entry["response"]
+
+    async def set(self, key: str, messages: List[Dict[str, str]], response: str) -> None:
+        """Store a response, evicting the oldest entries past `max_entries`"""
+        tokens = sum(estimate_tokens(m["content"]) for m in messages) + estimate_tokens(response)
+        value = json.dumps({"response": response, "tokens": tokens}, ensure_ascii=False)
+        try:
+            if self._script is None:
+                self._script = get_redis().register_script(SET_AND_EVICT_SCRIPT)
+            await self._script(
+                keys=[f"{self.prefix}index", key],
+                args=[value, self.ttl, self.max_entries, int(time.time())]
+            )
+        except Exception as e:
+            logger.warning("AI cache write failed", error=str(e))
+
+    def stats(self) -> Dict[str, float]:
+        """Hit ratio and estimated tokens saved since startup"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "tokens_saved": self.tokens_saved
+        }
+
+ai_response_cache = AIResponseCache(
+    ttl=settings.ai_cache_ttl,
+    max_entries=settings.ai_cache_max_entries,
+    max_temperature=settings.ai_cache_max_temperature
+)
@@ -0,0 +1,34 @@
+"""Shared Redis client for caches, rate limiting and queues."""
+from typing import Optional
+import redis.asyncio as redis
+import structlog
+
+from src.core.config import settings
+
+logger = structlog.get_logger()
+
+_client: Optional[redis.Redis] = None
+
+def get_redis() -> redis.Redis:
+    """Return the process-wide Redis client (created lazily).
+    
+    The client holds its own connection pool, so it is safe to share
+    between coroutines.
+    """
+    global _client
+    if _client is None:
+        _client = redis.Redis.from_url(
+            settings.redis_url,
+            decode_responses=True,
+            socket_timeout=settings.redis_socket_timeout,
+            socket_connect_timeout=settings.redis_socket_timeout,
+        )
+    return _client
+
+async def close_redis() -> None:
+    """Close the shared Redis client and its pool."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+        logger.info("Redis client closed")
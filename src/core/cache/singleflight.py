@@ -0,0 +1,135 @@
+"""Single-flight coalescing of duplicate in-flight calls."""
+import asyncio
+import json
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, List, Optional, TypeVar
+import structlog
+
+logger = structlog.get_logger()
+
+T = TypeVar("T")
+
+def flight_key(operation: str, *args: Any, **kwargs: Any) -> str:
+    """Stable key for an operation and its (possibly unhashable) arguments"""
+    return json.dumps([operation, args, kwargs], sort_keys=True, default=str)
+
+class SingleFlight:
+    """Shares one in-flight awaitable among concurrent callers of the same key.
+
+    The first caller starts the work; callers arriving before it finishes
+    await the same task and get the same result or exception. Nothing is
+    kept once the call completes, so this never serves stale results.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.executed = 0
+        self.collapsed = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """Run `fn()` unless an identical call is already in flight"""
+        task = self._inflight.get(key)
+        if task is not None:
+            self.collapsed += 1
+            logger.debug("Call coalesced", group=self.name, collapsed=self.collapsed)
+        else:
+            self.executed += 1
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+
+        # A cancelled caller must not cancel the call shared with the others
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict[str, int]:
+        """Executed vs collapsed calls and current in-flight count"""
+        return {
+            "executed": self.executed,
+            "collapsed": self.collapsed,
+            "inflight": len(self._inflight)
+        }
+
+class _Broadcast:
+    """Chunks of one shared stream, replayable by late subscribers"""
+
+    def __init__(self):
+        self.chunks: List[Any] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self._changed = asyncio.Event()
+
+    def publish(self, chunk: Any) -> None:
+        self.chunks.append(chunk)
+        self._notify()
+
+    def close(self, error: Optional[BaseException] = None) -> None:
+        self.done = True
+        self.error = error
+        self._notify()
+
+    def _notify(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def follow(self) -> AsyncIterator[Any]:
+        position = 0
+        while True:
+            if position < len(self.chunks):
+                yield self.chunks[position]
+                position += 1
+            elif self.done:
+                if self.error is not None:
+                    raise self.error
+                return
+            else:
+                await self._changed.wait()
+
+class StreamFlight:
+    """Shares one in-flight async stream among concurrent callers of the same key.
+
+    The first caller starts the stream in a background task; every caller,
+    including callers arriving mid-stream, gets all its chunks from the
+    start, then its end or exception. Like `SingleFlight`, nothing is kept
+    once the stream ends.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[Hashable, _Broadcast] = {}
+        self.executed = 0
+        self.collapsed = 0
+
+    def stream(self, key: Hashable, fn: Callable[[], AsyncIterator[T]]) -> AsyncIterator[T]:
+        """Iterate `fn()` unless an identical stream is already in flight"""
+        broadcast = self._inflight.get(key)
+        if broadcast is not None:
+            self.collapsed += 1
+            logger.debug("Stream coalesced", group=self.name, collapsed=self.collapsed)
+        else:
+            self.executed += 1
+            broadcast = _Broadcast()
+            self._inflight[key] = broadcast
+            # A subscriber that stops reading must not cut the stream for the others
+            asyncio.ensure_future(self._pump(key, broadcast, fn))
+        return broadcast.follow()
+
+    async def _pump(self, key: Hashable, broadcast: _Broadcast, fn: Callable[[], AsyncIterator[T]]) -> None:
+        try:
+            async for chunk in fn():
+                broadcast.publish(chunk)
+        except BaseException as e:
+            broadcast.close(e)
+            if not isinstance(e, Exception):
+                raise
+        else:
+            broadcast.close()
+        finally:
+            self._inflight.pop(key, None)
+
+    def stats(self) -> Dict[str, int]:
+        """Executed vs collapsed streams and current in-flight count"""
+        return {
+            "executed": self.executed,
+            "collapsed": self.collapsed,
+            "inflight": len(self._inflight)
+        }
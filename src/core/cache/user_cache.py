@@ -0,0 +1,144 @@
+"""Two-tier telegram_id -> user cache (in-process LRU + shared Redis)."""
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from typing import Optional, Tuple
+import structlog
+
+from src.core.cache.redis_client import get_redis
+from src.core.config import settings
+
+logger = structlog.get_logger()
+
+@dataclass(frozen=True)
+class CachedUser:
+    """Immutable snapshot of a `users` row, safe to share between updates."""
+    id: int
+    telegram_id: int
+    username: Optional[str]
+    first_name: Optional[str]
+    subscription_tier: str
+    created_at: Optional[datetime]
+
+    @classmethod
+    def from_model(cls, user) -> "CachedUser":
+        """Build a snapshot from a `User` ORM instance."""
+        return cls(
+            id=user.id,
+            telegram_id=user.telegram_id,
+            username=user.username,
+            first_name=user.first_name,
+            subscription_tier=user.subscription_tier or "free",
+            created_at=user.created_at
+        )
+
+    def to_json(self) -> str:
+        data = asdict(self)
+        data["created_at"] = self.created_at.isoformat() if self.created_at else None
+        return json.dumps(data)
+
+    @classmethod
+    def from_json(cls, raw: str) -> "CachedUser":
+        data = json.loads(raw)
+        if data.get("created_at"):
+            data["created_at"] = datetime.fromisoformat(data["created_at"])
+        return cls(**data)
+
+class UserCache:
+    """Bounded LRU with TTL in front of a shared Redis tier.
+
+    The local tier absorbs the hot path of each process; the Redis tier is
+    shared by every replica so a cold process does not hit Postgres for
+    users already seen elsewhere. The local TTL is kept short because
+    invalidations only reach other processes through the Redis tier.
+    """
+
+    def __init__(self, max_size: int, local_ttl: float, redis_ttl: int, prefix: str = "user:tg:"):
+        self.max_size = max_size
+        self.local_ttl = local_ttl
+        self.redis_ttl = redis_ttl
+        self.prefix = prefix
+        self._local: "OrderedDict[int, Tuple[float, CachedUser]]" = OrderedDict()
+        self.local_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+
+    def _key(self, telegram_id: int) -> str:
+        return f"{self.prefix}{telegram_id}"
+
+    def _get_local(self, telegram_id: int) -> Optional[CachedUser]:
+        entry = self._local.get(telegram_id)
+        if entry is None:
+            return None
+        expires_at, user = entry
+        if expires_at < time.monotonic():
+            del self._local[telegram_id]
+            return None
+        self._local.move_to_end(telegram_id)
+        return user
+
+    def _set_local(self, user: CachedUser) -> None:
+        self._local[user.telegram_id] = (time.monotonic() + self.local_ttl, user)
+        self._local.move_to_end(user.telegram_id)
+        while len(self._local) > self.max_size:
+            self._local.popitem(last=False)
+
+    async def get(self, telegram_id: int) -> Optional[CachedUser]:
+        """Look a user up in the local tier, then in Redis.
+
+        Returns None on a cold miss; Redis errors are treated as misses.
+        """
+        user = self._get_local(telegram_id)
+        if user is not None:
+            self.local_hits += 1
+            return user
+
+        try:
+            raw = await get_redis().get(self._key(telegram_id))
+        except Exception as e:
+            logger.warning("User cache Redis read failed", error=str(e))
+            raw = None
+
+        if raw is not None:
+            user = CachedUser.from_json(raw)
+            self._set_local(user)
+            self.redis_hits += 1
+            return user
+
+        self.misses += 1
+        return None
+
+    async def set(self, user: CachedUser) -> None:
+        """Store a user snapshot in both tiers."""
+        self._set_local(user)
+        try:
+            await get_redis().set(self._key(user.telegram_id), user.to_json(), ex=self.redis_ttl)
+        except Exception as e:
+            logger.warning("User cache Redis write failed", error=str(e))
+
+    async def invalidate(self, telegram_id: int) -> None:
+        """Drop a user from both tiers; call after any write to its row."""
+        self._local.pop(telegram_id, None)
+        try:
+            await get_redis().delete(self._key(telegram_id))
+        except Exception as e:
+            logger.warning("User cache Redis invalidation failed", error=str(e))
+
+    def stats(self) -> dict:
+        """Hit/miss counters and local tier occupancy."""
+        lookups = self.local_hits + self.redis_hits + self.misses
+        return {
+            "local_hits": self.local_hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "hit_ratio": (lookups - self.misses) / lookups if lookups else 0.0,
+            "local_size": len(self._local)
+        }
+
+user_cache = UserCache(
+    max_size=settings.user_cache_size,
+    local_ttl=settings.user_cache_local_ttl,
+    redis_ttl=settings.user_cache_redis_ttl
+)
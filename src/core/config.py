@@ -1,5 +1,5 @@
 import os
-from typing import Optional
+from typing import Dict, Optional
 from pydantic_settings import BaseSettings
 from pydantic import Field
 
@@ -11,15 +11,50 @@ class Settings(BaseSettings):
     # Database
     database_url: str = Field(..., env="DATABASE_URL")
     redis_url: str = Field(default="redis://localhost:6379/0", env="REDIS_URL")
+    db_pool_size: int = Field(default=10, env="DB_POOL_SIZE")
+    db_max_overflow: int = Field(default=20, env="DB_MAX_OVERFLOW")
+    redis_socket_timeout: float = Field(default=2.0, env="REDIS_SOCKET_TIMEOUT")
     
     # AI Services
     openai_api_key: Optional[str] = Field(None, env="OPENAI_API_KEY")
     deepseek_api_key: Optional[str] = Field(None, env="DEEPSEEK_API_KEY")
+    gemini_api_key: Optional[str] = Field(None, env="GOOGLE_AI_API_KEY")
     ai_provider: str = Field(default="openai", env="AI_PROVIDER")  # openai, deepseek, or gemini
+    ai_timeout: float = Field(default=60.0, env="AI_TIMEOUT")
+    ai_connect_timeout: float = Field(default=5.0, env="AI_CONNECT_TIMEOUT")
+    ai_pool_limit: int = Field(default=50, env="AI_POOL_LIMIT")
+    ai_keepalive_timeout: float = Field(default=60.0, env="AI_KEEPALIVE_TIMEOUT")
+    ai_streaming: bool = Field(default=True, env="AI_STREAMING")
+    ai_stream_edit_interval: float = Field(default=1.0, env="AI_STREAM_EDIT_INTERVAL")
+    ai_cache_ttl: int = Field(default=86400, env="AI_CACHE_TTL")
+    ai_cache_max_entries: int = Field(default=50000, env="AI_CACHE_MAX_ENTRIES")
+    ai_cache_max_temperature: float = Field(default=0.0, env="AI_CACHE_MAX_TEMPERATURE")  # sampled answers are not replayed
+    ai_memory_max_turns: int = Field(default=20, env="AI_MEMORY_MAX_TURNS")
+    ai_memory_token_budget: int = Field(default=1500, env="AI_MEMORY_TOKEN_BUDGET")
+    ai_memory_ttl: int = Field(default=86400, env="AI_MEMORY_TTL")
+    ai_memory_summarize: bool = Field(default=False, env="AI_MEMORY_SUMMARIZE")
+    ai_max_concurrency: int = Field(default=32, env="AI_MAX_CONCURRENCY")
+    ai_per_user_concurrency: int = Field(default=1, env="AI_PER_USER_CONCURRENCY")
+    ai_queue_deadline: float = Field(default=10.0, env="AI_QUEUE_DEADLINE")
+    ai_tier_weights: Dict[str, int] = Field(
+        default={"free": 1, "pro": 2, "premium": 4},
+        env="AI_TIER_WEIGHTS"
+    )
+    ai_router_window: int = Field(default=200, env="AI_ROUTER_WINDOW")
+    ai_router_max_error_rate: float = Field(default=0.5, env="AI_ROUTER_MAX_ERROR_RATE")
+    ai_router_cooldown: float = Field(default=30.0, env="AI_ROUTER_COOLDOWN")
+    ai_router_hedge: bool = Field(default=False, env="AI_ROUTER_HEDGE")
     
     # n8n Integration
     n8n_base_url: Optional[str] = Field(None, env="N8N_BASE_URL")
     n8n_api_key: Optional[str] = Field(None, env="N8N_API_KEY")
+    n8n_timeout: float = Field(default=30.0, env="N8N_TIMEOUT")
+    n8n_connect_timeout: float = Field(default=5.0, env="N8N_CONNECT_TIMEOUT")
+    n8n_pool_limit: int = Field(default=100, env="N8N_POOL_LIMIT")
+    n8n_pool_limit_per_host: int = Field(default=20, env="N8N_POOL_LIMIT_PER_HOST")
+    n8n_keepalive_timeout: float = Field(default=30.0, env="N8N_KEEPALIVE_TIMEOUT")
+    n8n_dns_cache_ttl: int = Field(default=300, env="N8N_DNS_CACHE_TTL")
+    n8n_bulk_concurrency: int = Field(default=8, env="N8N_BULK_CONCURRENCY")  # n8n calls in flight per bulk operation
     
     # Security
     jwt_secret_key: str = Field(..., env="JWT_SECRET_KEY")
@@ -27,6 +62,53 @@ class Settings(BaseSettings):
     # Performance
     rate_limit_requests: int = Field(default=30, env="RATE_LIMIT_REQUESTS")
     rate_limit_window: int = Field(default=60, env="RATE_LIMIT_WINDOW")
+    rate_limit_backend: Optional[str] = Field(None, env="RATE_LIMIT_BACKEND")  # redis or memory (default: redis in production)
+    rate_limit_max_tracked_users: int = Field(default=100000, env="RATE_LIMIT_MAX_TRACKED_USERS")
+    rate_limit_sweep_interval: float = Field(default=60.0, env="RATE_LIMIT_SWEEP_INTERVAL")
+    user_cache_size: int = Field(default=10000, env="USER_CACHE_SIZE")
+    user_cache_local_ttl: float = Field(default=30.0, env="USER_CACHE_LOCAL_TTL")
+    user_cache_redis_ttl: int = Field(default=3600, env="USER_CACHE_REDIS_TTL")
+    user_registration_batch_size: int = Field(default=200, env="USER_REGISTRATION_BATCH_SIZE")
+    user_registration_batch_window: float = Field(default=0.005, env="USER_REGISTRATION_BATCH_WINDOW")
+    
+    web_host: str = Field(default="0.0.0.0", env="WEB_HOST")
+    web_port: int = Field(default=8000, env="WEB_PORT")
+    web_workers: int = Field(default=1, env="WEB_WORKERS")  # 0 = one per CPU
+    web_shutdown_timeout: float = Field(default=30.0, env="WEB_SHUTDOWN_TIMEOUT")
+    web_startup_timeout: float = Field(default=60.0, env="WEB_STARTUP_TIMEOUT")  # rolling restart: wait for the replacement
+    update_queue_enabled: bool = Field(default=False, env="UPDATE_QUEUE_ENABLED")
+    update_queue_stream: str = Field(default="linklet:updates", env="UPDATE_QUEUE_STREAM")
+    update_queue_shards: int = Field(default=16, env="UPDATE_QUEUE_SHARDS")
+    update_queue_maxlen: int = Field(default=100000, env="UPDATE_QUEUE_MAXLEN")
+    update_queue_batch_size: int = Field(default=50, env="UPDATE_QUEUE_BATCH_SIZE")
+    update_queue_max_attempts: int = Field(default=5, env="UPDATE_QUEUE_MAX_ATTEMPTS")
+    update_queue_concurrency: int = Field(default=256, env="UPDATE_QUEUE_CONCURRENCY")  # updates in flight per consumer
+    update_queue_lease_ttl: float = Field(default=15.0, env="UPDATE_QUEUE_LEASE_TTL")
+    execution_backend: Optional[str] = Field(None, env="EXECUTION_BACKEND")  # redis or memory (default: redis whenever the FSM storage is)
+    execution_worker_embedded: bool = Field(default=True, env="EXECUTION_WORKER_EMBEDDED")  # redis backend only
+    execution_worker_concurrency: int = Field(default=8, env="EXECUTION_WORKER_CONCURRENCY")
+    execution_claim_idle: float = Field(default=300.0, env="EXECUTION_CLAIM_IDLE")
+    execution_job_ttl: int = Field(default=86400, env="EXECUTION_JOB_TTL")
+    scheduler_window: float = Field(default=300.0, env="SCHEDULER_WINDOW")
+    scheduler_refill_interval: float = Field(default=30.0, env="SCHEDULER_REFILL_INTERVAL")
+    scheduler_slice_size: int = Field(default=1000, env="SCHEDULER_SLICE_SIZE")
+    scheduler_batch_size: int = Field(default=100, env="SCHEDULER_BATCH_SIZE")
+    scheduler_send_concurrency: int = Field(default=20, env="SCHEDULER_SEND_CONCURRENCY")
+    scheduler_retry_delay: float = Field(default=30.0, env="SCHEDULER_RETRY_DELAY")  # after a failed send
+    reconcile_interval: float = Field(default=300.0, env="RECONCILE_INTERVAL")
+    reconcile_page_size: int = Field(default=250, env="RECONCILE_PAGE_SIZE")
+    reconcile_full_every: int = Field(default=12, env="RECONCILE_FULL_EVERY")  # passes between full repairs
+    
+    # Monitoring
+    metrics_enabled: bool = Field(default=True, env="METRICS_ENABLED")
+    metrics_port: int = Field(default=9100, env="METRICS_PORT")  # webhook worker N uses metrics_port + N
+    update_queue_metrics_port: int = Field(default=9201, env="UPDATE_QUEUE_METRICS_PORT")
+    execution_worker_metrics_port: int = Field(default=9202, env="EXECUTION_WORKER_METRICS_PORT")
+    scheduler_metrics_port: int = Field(default=9203, env="SCHEDULER_METRICS_PORT")
+    reconcile_metrics_port: int = Field(default=9204, env="RECONCILE_METRICS_PORT")
+    profile_sample_rate: float = Field(default=0.0, env="PROFILE_SAMPLE_RATE")
+    slow_update_threshold: float = Field(default=2.0, env="SLOW_UPDATE_THRESHOLD")
+    profile_top_n: int = Field(default=15, env="PROFILE_TOP_N")
     
     # Environment
     environment: str = Field(default="development", env="ENVIRONMENT")
@@ -1,8 +1,15 @@
-from sqlalchemy import create_engine
+import time
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker
-from contextlib import contextmanager
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from contextlib import contextmanager, asynccontextmanager
+from typing import AsyncIterator
 from src.core.config import settings
 from src.core.database.models import Base
+from src.core.metrics import DB_POOL_CHECKOUT_WAIT, DB_QUERY_LATENCY
+from src.core.profiling import record_io
 
 # Engine creation
 engine = create_engine(
@@ -15,6 +22,83 @@ engine = create_engine(
 # Session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+def _async_database_url() -> str:
+    """Build the asyncpg URL from the configured (sync) database URL"""
+    url = make_url(settings.database_url)
+    if url.drivername in ("postgresql", "postgresql+psycopg2", "postgres"):
+        url = url.set(drivername="postgresql+asyncpg")
+    return url.render_as_string(hide_password=False)
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool recording how long callers wait for a connection"""
+    
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_CHECKOUT_WAIT.observe(time.perf_counter() - started)
+
+# Async engine used by the bot (middleware, handlers, services)
+async_engine = create_async_engine(
+    _async_database_url(),
+    poolclass=InstrumentedQueuePool,
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
+    pool_pre_ping=True,
+    pool_recycle=300,
+    echo=settings.debug
+)
+
+@event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+@event.listens_for(async_engine.sync_engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_started"].pop()
+    operation = statement.lstrip().split(" ", 1)[0].upper()
+    DB_QUERY_LATENCY.labels(operation).observe(time.perf_counter() - started)
+
+@event.listens_for(async_engine.sync_engine, "handle_error")
+def _handle_error(context):
+    # after_cursor_execute does not run for failed statements
+    if context.connection is not None and context.connection.info.get("query_started"):
+        context.connection.info["query_started"].pop()
+
+class ProfiledAsyncSession(AsyncSession):
+    """AsyncSession attributing awaited database time to the current update"""
+    
+    async def execute(self, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await super().execute(*args, **kwargs)
+        finally:
+            record_io("db", time.perf_counter() - started)
+    
+    async def commit(self):
+        started = time.perf_counter()
+        try:
+            await super().commit()
+        finally:
+            record_io("db", time.perf_counter() - started)
+    
+    async def flush(self, objects=None):
+        started = time.perf_counter()
+        try:
+            await super().flush(objects)
+        finally:
+            record_io("db", time.perf_counter() - started)
+
+# Async session factory; objects stay usable after commit so handlers can
+# read attributes once the session is closed.
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    autoflush=False,
+    expire_on_commit=False,
+    class_=ProfiledAsyncSession
+)
+
 def create_tables():
     """Create all tables"""
     Base.metadata.create_all(bind=engine)
@@ -30,4 +114,20 @@ def get_db():
         db.rollback()
         raise
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+@asynccontextmanager
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    """Async database session context manager"""
+    async with AsyncSessionLocal() as db:
+        try:
+            yield db
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+
+async def dispose_engines():
+    """Close pooled connections of both engines"""
+    await async_engine.dispose()
+    engine.dispose()
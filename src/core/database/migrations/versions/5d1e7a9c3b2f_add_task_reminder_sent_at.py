@@ -0,0 +1,28 @@
+"""Add tasks.reminder_sent_at
+
+Revision ID: 5d1e7a9c3b2f
+Revises: 0b32f61a5c54
+Create Date: 2026-10-18 14:05:12.318540
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d1e7a9c3b2f'
+down_revision: Union[str, None] = '0b32f61a5c54'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('tasks', sa.Column('reminder_sent_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('tasks', 'reminder_sent_at')
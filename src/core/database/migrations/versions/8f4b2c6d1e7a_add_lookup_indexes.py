@@ -0,0 +1,47 @@
+"""Add lookup indexes
+
+Revision ID: 8f4b2c6d1e7a
+Revises: 5d1e7a9c3b2f
+Create Date: 2026-10-18 15:20:43.904127
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8f4b2c6d1e7a'
+down_revision: Union[str, None] = '5d1e7a9c3b2f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY cannot run in a transaction, and avoids locking writes
+    # on large tables while the indexes build
+    with op.get_context().autocommit_block():
+        op.create_index('ix_workflows_user_id_is_active', 'workflows', ['user_id', 'is_active'],
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_workflows_n8n_workflow_id', 'workflows', ['n8n_workflow_id'],
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_integrations_user_id_is_active', 'integrations', ['user_id', 'is_active'],
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_tasks_pending_scheduled_at', 'tasks', ['scheduled_at'],
+                        postgresql_where=sa.text('completed_at IS NULL AND reminder_sent_at IS NULL'),
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_tasks_user_id_pending', 'tasks', ['user_id', 'scheduled_at'],
+                        postgresql_where=sa.text('completed_at IS NULL'),
+                        postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_tasks_user_id_pending', table_name='tasks', postgresql_concurrently=True)
+        op.drop_index('ix_tasks_pending_scheduled_at', table_name='tasks', postgresql_concurrently=True)
+        op.drop_index('ix_integrations_user_id_is_active', table_name='integrations', postgresql_concurrently=True)
+        op.drop_index('ix_workflows_n8n_workflow_id', table_name='workflows', postgresql_concurrently=True)
+        op.drop_index('ix_workflows_user_id_is_active', table_name='workflows', postgresql_concurrently=True)
@@ -0,0 +1,58 @@
+"""Add user_stats
+
+Revision ID: c3a9d5e8f0b1
+Revises: 8f4b2c6d1e7a
+Create Date: 2026-10-18 16:02:37.561284
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3a9d5e8f0b1'
+down_revision: Union[str, None] = '8f4b2c6d1e7a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('user_stats',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('workflows_count', sa.Integer(), nullable=False),
+    sa.Column('active_workflows_count', sa.Integer(), nullable=False),
+    sa.Column('pending_tasks_count', sa.Integer(), nullable=False),
+    sa.Column('integrations_count', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    # Backfill from the current rows
+    op.execute("""
+        INSERT INTO user_stats (user_id, workflows_count, active_workflows_count,
+                                pending_tasks_count, integrations_count)
+        SELECT u.id,
+               coalesce(w.total, 0), coalesce(w.active, 0),
+               coalesce(t.pending, 0), coalesce(i.active, 0)
+        FROM users u
+        LEFT JOIN (
+            SELECT user_id, count(*) AS total, count(*) FILTER (WHERE is_active) AS active
+            FROM workflows GROUP BY user_id
+        ) w ON w.user_id = u.id
+        LEFT JOIN (
+            SELECT user_id, count(*) AS pending
+            FROM tasks WHERE completed_at IS NULL GROUP BY user_id
+        ) t ON t.user_id = u.id
+        LEFT JOIN (
+            SELECT user_id, count(*) FILTER (WHERE is_active) AS active
+            FROM integrations GROUP BY user_id
+        ) i ON i.user_id = u.id
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('user_stats')
@@ -0,0 +1,31 @@
+"""Add workflow keyset index
+
+Revision ID: e7b1f3a5c9d2
+Revises: c3a9d5e8f0b1
+Create Date: 2026-10-18 16:41:09.122873
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7b1f3a5c9d2'
+down_revision: Union[str, None] = 'c3a9d5e8f0b1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index('ix_workflows_user_id_created_at_id', 'workflows', ['user_id', 'created_at', 'id'],
+                        postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_workflows_user_id_created_at_id', table_name='workflows', postgresql_concurrently=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, BigInteger, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, BigInteger, ForeignKey, Index, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -9,6 +9,9 @@ Base = declarative_base()
 
 class User(Base):
     __tablename__ = "users"
+    # Fetch server-side defaults (created_at...) via RETURNING on insert,
+    # lazy refreshes are not possible on AsyncSession
+    __mapper_args__ = {"eager_defaults": True}
     
     id = Column(Integer, primary_key=True)
     telegram_id = Column(BigInteger, unique=True, nullable=False)
@@ -25,6 +28,12 @@ class User(Base):
 
 class Workflow(Base):
     __tablename__ = "workflows"
+    __table_args__ = (
+        Index("ix_workflows_user_id_is_active", "user_id", "is_active"),
+        Index("ix_workflows_n8n_workflow_id", "n8n_workflow_id"),
+        # Keyset pagination of a user's workflows
+        Index("ix_workflows_user_id_created_at_id", "user_id", "created_at", "id"),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -40,6 +49,18 @@ class Workflow(Base):
 
 class Task(Base):
     __tablename__ = "tasks"
+    __table_args__ = (
+        # Scheduler window scans: only tasks that can still fire
+        Index(
+            "ix_tasks_pending_scheduled_at", "scheduled_at",
+            postgresql_where=text("completed_at IS NULL AND reminder_sent_at IS NULL")
+        ),
+        # Per-user pending counts and agenda
+        Index(
+            "ix_tasks_user_id_pending", "user_id", "scheduled_at",
+            postgresql_where=text("completed_at IS NULL")
+        ),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -48,13 +69,29 @@ class Task(Base):
     scheduled_at = Column(DateTime)
     completed_at = Column(DateTime)
     recurrence_rule = Column(String(255))
+    # Set once a one-off reminder has fired; recurring tasks advance scheduled_at instead
+    reminder_sent_at = Column(DateTime)
     created_at = Column(DateTime, server_default=func.now())
     
     # Relations
     user = relationship("User", back_populates="tasks")
 
+class UserStats(Base):
+    """Per-user counters kept in step with workflow/task/integration writes"""
+    __tablename__ = "user_stats"
+    
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    workflows_count = Column(Integer, nullable=False, default=0)
+    active_workflows_count = Column(Integer, nullable=False, default=0)
+    pending_tasks_count = Column(Integer, nullable=False, default=0)
+    integrations_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
 class Integration(Base):
     __tablename__ = "integrations"
+    __table_args__ = (
+        Index("ix_integrations_user_id_is_active", "user_id", "is_active"),
+    )
     
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
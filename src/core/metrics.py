@@ -0,0 +1,187 @@
+"""Prometheus metrics shared by the bot, services and workers."""
+import asyncio
+import errno
+import time
+from typing import Callable, Dict, Iterable
+import aiohttp
+from prometheus_client import Counter, Gauge, Histogram, start_http_server
+from prometheus_client.core import GaugeMetricFamily
+
+from src.core.profiling import record_io
+
+# Buckets tuned for chat latencies: a few ms (cache hits) up to AI generations
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+UPDATES_TOTAL = Counter(
+    "linklet_updates_total",
+    "Updates handled, per event type and handler",
+    ["event_type", "handler", "status"]
+)
+HANDLER_LATENCY = Histogram(
+    "linklet_handler_duration_seconds",
+    "Handler execution time",
+    ["event_type", "handler"],
+    buckets=LATENCY_BUCKETS
+)
+MIDDLEWARE_LATENCY = Histogram(
+    "linklet_middleware_duration_seconds",
+    "Time spent in a middleware before calling the handler",
+    ["middleware"],
+    buckets=LATENCY_BUCKETS
+)
+DB_QUERY_LATENCY = Histogram(
+    "linklet_db_query_duration_seconds",
+    "Database statement execution time",
+    ["operation"],
+    buckets=LATENCY_BUCKETS
+)
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "linklet_db_pool_checkout_wait_seconds",
+    "Time waiting for a pooled database connection",
+    buckets=LATENCY_BUCKETS
+)
+HTTP_CLIENT_LATENCY = Histogram(
+    "linklet_http_client_duration_seconds",
+    "Outgoing HTTP request time",
+    ["service", "method", "status"],
+    buckets=LATENCY_BUCKETS
+)
+HTTP_CLIENT_ERRORS = Counter(
+    "linklet_http_client_errors_total",
+    "Outgoing HTTP requests that failed without a response",
+    ["service", "method", "error"]
+)
+AI_REQUEST_LATENCY = Histogram(
+    "linklet_ai_request_duration_seconds",
+    "AI provider call time (time to first chunk when streaming)",
+    ["provider", "outcome"],
+    buckets=LATENCY_BUCKETS
+)
+AI_REQUEST_ERRORS = Counter(
+    "linklet_ai_request_errors_total",
+    "Failed AI provider calls",
+    ["provider"]
+)
+RATE_LIMIT_REJECTIONS = Counter(
+    "linklet_rate_limit_rejections_total",
+    "Messages rejected by the rate limiter"
+)
+FSM_STORAGE_LATENCY = Histogram(
+    "linklet_fsm_storage_duration_seconds",
+    "FSM storage operation time",
+    ["operation"],
+    buckets=LATENCY_BUCKETS
+)
+UPDATE_QUEUE_EVENTS = Counter(
+    "linklet_update_queue_events_total",
+    "Queued updates by outcome (enqueued, processed, retried, dead_lettered)",
+    ["outcome"]
+)
+UPDATE_QUEUE_DELAY = Histogram(
+    "linklet_update_queue_delay_seconds",
+    "Time between enqueueing an update and the start of its processing",
+    buckets=LATENCY_BUCKETS
+)
+UPDATE_QUEUE_LAG = Gauge(
+    "linklet_update_queue_lag",
+    "Entries not yet delivered to the consumer group, per shard",
+    ["shard"]
+)
+UPDATE_QUEUE_PENDING = Gauge(
+    "linklet_update_queue_pending",
+    "Entries delivered but not yet acknowledged, per shard",
+    ["shard"]
+)
+EXECUTION_JOBS = Counter(
+    "linklet_execution_jobs_total",
+    "Workflow execution jobs by status (queued, succeeded, failed)",
+    ["status"]
+)
+EXECUTION_JOB_LATENCY = Histogram(
+    "linklet_execution_job_duration_seconds",
+    "Time from enqueueing a workflow execution to its outcome",
+    ["status"],
+    buckets=LATENCY_BUCKETS
+)
+REMINDERS_SENT = Counter(
+    "linklet_reminders_total",
+    "Task reminders by outcome (sent, failed, dropped)",
+    ["status"]
+)
+REMINDER_DELAY = Histogram(
+    "linklet_reminder_delay_seconds",
+    "Time between a task's scheduled time and its reminder being sent",
+    buckets=LATENCY_BUCKETS
+)
+RECONCILED_WORKFLOWS = Counter(
+    "linklet_reconciled_workflows_total",
+    "Local workflow rows changed to match n8n (updated, orphaned)",
+    ["change"]
+)
+
+async def serve_metrics(port: int, retry_interval: float = 0.5) -> None:
+    """Expose the default registry on `port` once the port is free
+    
+    During a rolling restart the replacement webhook worker starts while
+    the worker it replaces still holds the port; binding is retried until
+    that worker has drained instead of failing the replacement.
+    """
+    while True:
+        try:
+            start_http_server(port)
+            return
+        except OSError as e:
+            if e.errno != errno.EADDRINUSE:
+                raise
+        await asyncio.sleep(retry_interval)
+
+def http_trace_config(service: str, profile: bool = True) -> aiohttp.TraceConfig:
+    """aiohttp trace hooks recording latency and errors for `service`
+    
+    With `profile`, request time is also attributed to the current update.
+    """
+
+    async def on_request_start(session, ctx, params):
+        ctx.started = time.perf_counter()
+
+    async def on_request_end(session, ctx, params):
+        elapsed = time.perf_counter() - ctx.started
+        HTTP_CLIENT_LATENCY.labels(service, params.method, str(params.response.status)).observe(elapsed)
+        if profile:
+            record_io(service, elapsed)
+
+    async def on_request_exception(session, ctx, params):
+        elapsed = time.perf_counter() - ctx.started
+        HTTP_CLIENT_ERRORS.labels(service, params.method, type(params.exception).__name__).inc()
+        HTTP_CLIENT_LATENCY.labels(service, params.method, "error").observe(elapsed)
+        if profile:
+            record_io(service, elapsed)
+
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_request_start.append(on_request_start)
+    trace_config.on_request_end.append(on_request_end)
+    trace_config.on_request_exception.append(on_request_exception)
+    return trace_config
+
+class StatsCollector:
+    """Exports in-process `stats()` dicts as gauges at scrape time.
+
+    Components keep cheap plain counters; this collector reads them only
+    when Prometheus scrapes, so the hot path pays nothing extra.
+    """
+
+    def __init__(self, sources: Dict[str, Callable[[], Dict]]):
+        self.sources = sources
+
+    def collect(self) -> Iterable[GaugeMetricFamily]:
+        for component, stats in self.sources.items():
+            for key, value in stats().items():
+                name = f"linklet_{component}_{key}"
+                if isinstance(value, dict):
+                    family = GaugeMetricFamily(name, f"{component} {key}", labels=["key"])
+                    for label, item in value.items():
+                        if item is not None:
+                            family.add_metric([str(label)], float(item))
+                    yield family
+                elif isinstance(value, (int, float)):
+                    yield GaugeMetricFamily(name, f"{component} {key}", value=float(value))
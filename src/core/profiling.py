@@ -0,0 +1,18 @@
+"""Per-update attribution of awaited I/O time."""
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+# Mutable dict shared by every task spawned while handling one update
+_io_breakdown: ContextVar[Optional[Dict[str, float]]] = ContextVar("io_breakdown", default=None)
+
+def start_io_breakdown() -> Dict[str, float]:
+    """Begin collecting I/O time for the current update"""
+    breakdown: Dict[str, float] = {}
+    _io_breakdown.set(breakdown)
+    return breakdown
+
+def record_io(kind: str, seconds: float) -> None:
+    """Add `seconds` of awaited I/O of `kind` (db, n8n, ai, telegram...)"""
+    breakdown = _io_breakdown.get()
+    if breakdown is not None:
+        breakdown[kind] = breakdown.get(kind, 0.0) + seconds
@@ -0,0 +1,154 @@
+"""Token-budgeted conversation memory for AI chats."""
+import asyncio
+import json
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+import structlog
+
+from src.core.cache.ai_cache import estimate_tokens
+from src.core.cache.redis_client import get_redis
+
+logger = structlog.get_logger()
+
+# A conversation is one JSON string per chat: {"s": summary, "t": [[role, content], ...]}.
+# Appending is atomic and returns the turns pushed out of the ring buffer.
+APPEND_SCRIPT = """
+local raw = redis.call('GET', KEYS[1])
+local conv = raw and cjson.decode(raw) or {s = '', t = {}}
+local max_turns = tonumber(ARGV[1])
+for i = 3, #ARGV do
+    table.insert(conv.t, cjson.decode(ARGV[i]))
+end
+local dropped = {}
+while #conv.t > max_turns do
+    table.insert(dropped, table.remove(conv.t, 1))
+end
+redis.call('SET', KEYS[1], cjson.encode(conv), 'EX', tonumber(ARGV[2]))
+return cjson.encode(dropped)
+"""
+
+SET_SUMMARY_SCRIPT = """
+local raw = redis.call('GET', KEYS[1])
+if not raw then
+    return 0
+end
+local conv = cjson.decode(raw)
+conv.s = ARGV[1]
+redis.call('SET', KEYS[1], cjson.encode(conv), 'KEEPTTL')
+return 1
+"""
+
+Turn = Tuple[str, str]
+Summarizer = Callable[[str, List[Turn]], Awaitable[str]]
+
+class Conversation:
+    """Snapshot of a chat's memory: rolling summary plus recent turns"""
+
+    def __init__(self, summary: str = "", turns: Optional[List[Turn]] = None):
+        self.summary = summary
+        self.turns = turns or []
+
+    def __bool__(self) -> bool:
+        return bool(self.summary or self.turns)
+
+    def to_messages(self, token_budget: int) -> List[Dict[str, str]]:
+        """Most recent turns (and the summary) that fit in `token_budget`.
+
+        Turns are taken newest first, so the prompt stays bounded however
+        long the chat runs.
+        """
+        messages = []
+        remaining = token_budget
+        if self.summary:
+            remaining -= estimate_tokens(self.summary)
+
+        for role, content in reversed(self.turns):
+            cost = estimate_tokens(content)
+            if cost > remaining:
+                break
+            messages.append({"role": role, "content": content})
+            remaining -= cost
+        messages.reverse()
+
+        if self.summary and remaining >= 0:
+            messages.insert(0, {
+                "role": "system",
+                "content": f"Résumé de la conversation précédente : {self.summary}"
+            })
+        return messages
+
+class ConversationStore:
+    """Per-chat ring buffer of turns in a single Redis key.
+
+    The buffer keeps at most `max_turns` turns. When a summarizer is given,
+    turns pushed out of the buffer are folded into a rolling summary in the
+    background instead of being forgotten.
+    """
+
+    def __init__(self, max_turns: int, ttl: int, summarizer: Optional[Summarizer] = None,
+                 prefix: str = "ai:conv:"):
+        self.max_turns = max_turns
+        self.ttl = ttl
+        self.summarizer = summarizer
+        self.prefix = prefix
+        self._append_script = None
+        self._summary_script = None
+        self._tasks = set()
+
+    def _key(self, chat_id: int) -> str:
+        return f"{self.prefix}{chat_id}"
+
+    async def load(self, chat_id: int) -> Conversation:
+        """Load a chat's memory; an unreadable store yields an empty one"""
+        try:
+            raw = await get_redis().get(self._key(chat_id))
+        except Exception as e:
+            logger.warning("Conversation load failed", error=str(e), chat_id=chat_id)
+            raw = None
+        if not raw:
+            return Conversation()
+
+        data = json.loads(raw)
+        # cjson encodes empty arrays as objects
+        turns = data.get("t") or []
+        return Conversation(data.get("s") or "", [tuple(turn) for turn in turns])
+
+    async def append(self, chat_id: int, *turns: Turn) -> None:
+        """Append turns, trimming the buffer to `max_turns`"""
+        redis = get_redis()
+        if self._append_script is None:
+            self._append_script = redis.register_script(APPEND_SCRIPT)
+        try:
+            raw_dropped = await self._append_script(
+                keys=[self._key(chat_id)],
+                args=[self.max_turns, self.ttl] + [
+                    json.dumps([role, content], ensure_ascii=False) for role, content in turns
+                ]
+            )
+        except Exception as e:
+            logger.warning("Conversation append failed", error=str(e), chat_id=chat_id)
+            return
+
+        dropped = json.loads(raw_dropped) or []
+        if dropped and self.summarizer:
+            task = asyncio.create_task(self._fold(chat_id, [tuple(turn) for turn in dropped]))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _fold(self, chat_id: int, dropped: List[Turn]) -> None:
+        """Fold turns leaving the buffer into the rolling summary"""
+        try:
+            conversation = await self.load(chat_id)
+            summary = await self.summarizer(conversation.summary, dropped)
+            redis = get_redis()
+            if self._summary_script is None:
+                self._summary_script = redis.register_script(SET_SUMMARY_SCRIPT)
+            await self._summary_script(keys=[self._key(chat_id)], args=[summary])
+        except Exception as e:
+            logger.warning("Conversation summary failed", error=str(e), chat_id=chat_id)
+
+    async def clear(self, chat_id: int) -> None:
+        """Forget a chat's memory"""
+        try:
+            await get_redis().delete(self._key(chat_id))
+        except Exception as e:
+            logger.warning("Conversation clear failed", error=str(e), chat_id=chat_id)
@@ -1,10 +1,12 @@
 """Deepseek AI client for chat and text generation."""
 import aiohttp
+import asyncio
 import json
 import structlog
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, AsyncIterator, Optional
 
 from src.core.config import settings
+from src.core.metrics import http_trace_config
 
 logger = structlog.get_logger()
 
@@ -16,39 +18,81 @@ class DeepseekClient:
         self.api_key = api_key or settings.deepseek_api_key
         self.base_url = "https://api.deepseek.com/v1"
         self.session = None
+        self._session_lock = asyncio.Lock()
+        
+    async def start(self) -> "DeepseekClient":
+        """Open the long-lived pooled session (idempotent, coroutine-safe).
+        
+        A single client instance is shared by all chats; the session and its
+        keep-alive connections persist until close() is called.
+        """
+        async with self._session_lock:
+            if self.session is None or self.session.closed:
+                connector = aiohttp.TCPConnector(
+                    limit=settings.ai_pool_limit,
+                    keepalive_timeout=settings.ai_keepalive_timeout,
+                    ttl_dns_cache=300
+                )
+                self.session = aiohttp.ClientSession(
+                    connector=connector,
+                    trace_configs=[http_trace_config("deepseek", profile=False)],
+                    headers={
+                        "Authorization": f"Bearer {self.api_key}",
+                        "Content-Type": "application/json"
+                    }
+                )
+        return self
+        
+    async def close(self) -> None:
+        """Close the session and its connection pool."""
+        async with self._session_lock:
+            if self.session and not self.session.closed:
+                await self.session.close()
+            self.session = None
         
     async def __aenter__(self):
         """Start aiohttp session when entering context."""
-        self.session = aiohttp.ClientSession(
-            headers={
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json"
-            }
-        )
-        return self
+        return await self.start()
         
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """Close aiohttp session when exiting context."""
-        if self.session:
-            await self.session.close()
+        await self.close()
+            
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Return the shared session, opening it on first use."""
+        session = self.session
+        if session is None or session.closed:
+            session = (await self.start()).session
+        return session
+    
+    def _timeout(self, timeout: Optional[float] = None) -> aiohttp.ClientTimeout:
+        """Per-request timeout."""
+        return aiohttp.ClientTimeout(
+            total=timeout or settings.ai_timeout,
+            connect=settings.ai_connect_timeout
+        )
             
-    async def _make_request(self, endpoint: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    async def _make_request(
+        self,
+        endpoint: str,
+        data: Dict[str, Any],
+        timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
         """Make a request to the Deepseek API.
         
         Args:
             endpoint: API endpoint path
             data: Request payload
+            timeout: Total timeout in seconds for this request
             
         Returns:
             API response data
         """
-        if not self.session:
-            raise RuntimeError("Session not initialized. Use async with context.")
-            
+        session = await self._get_session()
         url = f"{self.base_url}/{endpoint}"
         
         try:
-            async with self.session.post(url, json=data) as response:
+            async with session.post(url, json=data, timeout=self._timeout(timeout)) as response:
                 if response.status != 200:
                     error_data = await response.json()
                     raise ValueError(
@@ -64,6 +108,7 @@ class DeepseekClient:
         model: str = "deepseek-chat-7b",
         temperature: float = 0.7,
         max_tokens: Optional[int] = None,
+        timeout: Optional[float] = None,
         **kwargs
     ) -> str:
         """Generate response using Deepseek chat model.
@@ -73,6 +118,7 @@ class DeepseekClient:
             model: Model name to use
             temperature: Sampling temperature
             max_tokens: Maximum tokens in response
+            timeout: Total timeout in seconds for this request
             **kwargs: Additional parameters
             
         Returns:
@@ -88,19 +134,77 @@ class DeepseekClient:
             data["max_tokens"] = max_tokens
             
         try:
-            async with self as client:
-                response = await self._make_request("chat/completions", data)
-                return response["choices"][0]["message"]["content"].strip()
+            response = await self._make_request("chat/completions", data, timeout)
+            return response["choices"][0]["message"]["content"].strip()
         except Exception as e:
             logger.error("Chat completion failed", error=str(e))
             raise
             
+    async def stream_chat_response(
+        self,
+        messages: List[Dict[str, str]],
+        model: str = "deepseek-chat-7b",
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        timeout: Optional[float] = None,
+        **kwargs
+    ) -> AsyncIterator[str]:
+        """Stream a chat completion (SSE) as it is generated.
+        
+        Args:
+            messages: List of message dictionaries with role and content
+            model: Model name to use
+            temperature: Sampling temperature
+            max_tokens: Maximum tokens in response
+            timeout: Total timeout in seconds for this request
+            **kwargs: Additional parameters
+            
+        Yields:
+            Content deltas, in order
+        """
+        data = {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "stream": True,
+            **kwargs
+        }
+        if max_tokens:
+            data["max_tokens"] = max_tokens
+        
+        session = await self._get_session()
+        url = f"{self.base_url}/chat/completions"
+        
+        try:
+            async with session.post(url, json=data, timeout=self._timeout(timeout)) as response:
+                if response.status != 200:
+                    error_data = await response.json()
+                    raise ValueError(
+                        f"API request failed: {response.status} - {error_data.get('error', 'Unknown error')}"
+                    )
+                # Server-sent events: one "data: {json}" line per chunk
+                async for raw_line in response.content:
+                    line = raw_line.decode("utf-8").strip()
+                    if not line.startswith("data:"):
+                        continue
+                    payload = line[len("data:"):].strip()
+                    if payload == "[DONE]":
+                        break
+                    chunk = json.loads(payload)
+                    delta = chunk["choices"][0].get("delta", {}).get("content")
+                    if delta:
+                        yield delta
+        except aiohttp.ClientError as e:
+            logger.error("Chat completion stream failed", error=str(e))
+            raise RuntimeError(f"Request failed: {str(e)}")
+            
     async def generate_text(
         self,
         prompt: str,
         model: str = "deepseek-coder-33b",
         temperature: float = 0.7,
         max_tokens: Optional[int] = None,
+        timeout: Optional[float] = None,
         **kwargs
     ) -> str:
         """Generate text using Deepseek completion model.
@@ -110,6 +214,7 @@ class DeepseekClient:
             model: Model name to use
             temperature: Sampling temperature
             max_tokens: Maximum tokens in response
+            timeout: Total timeout in seconds for this request
             **kwargs: Additional parameters
             
         Returns:
@@ -125,9 +230,8 @@ class DeepseekClient:
             data["max_tokens"] = max_tokens
             
         try:
-            async with self as client:
-                response = await self._make_request("completions", data)
-                return response["choices"][0]["text"].strip()
+            response = await self._make_request("completions", data, timeout)
+            return response["choices"][0]["text"].strip()
         except Exception as e:
             logger.error("Text completion failed", error=str(e))
             raise
@@ -0,0 +1,197 @@
+"""Concurrency bulkhead and fair queueing for AI provider calls."""
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Dict, Optional
+import structlog
+
+from src.core.config import settings
+
+logger = structlog.get_logger()
+
+# Background work (conversation summaries): served only when no other tier waits
+BACKGROUND_TIER = "background"
+
+class AIQueueTimeout(Exception):
+    """Raised when a request waited longer than the queue deadline"""
+
+class AIDispatcher:
+    """Bounds in-flight AI calls globally and per user.
+
+    Requests beyond the global cap wait in one FIFO queue per
+    subscription tier; freed slots are handed out by smooth weighted
+    round robin over the non-empty tiers, so paying tiers get more
+    throughput without starving the free tier. The BACKGROUND_TIER is
+    below every other tier and only gets a freed slot when nothing
+    interactive is waiting. A request that cannot get
+    a slot within `deadline` seconds raises AIQueueTimeout so the caller
+    can degrade instead of piling more load on the provider.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        per_user_limit: int,
+        tier_weights: Dict[str, int],
+        deadline: float
+    ):
+        self.max_concurrency = max_concurrency
+        self.per_user_limit = per_user_limit
+        self.tier_weights = dict(tier_weights)
+        self.deadline = deadline
+        self._active = 0
+        self._queues: Dict[str, Deque[asyncio.Future]] = {}
+        self._current_weights: Dict[str, int] = {}
+        self._user_semaphores: Dict[int, asyncio.Semaphore] = {}
+        self._user_refs: Dict[int, int] = {}
+        # Metrics
+        self.completed = 0
+        self.rejected = 0
+        self.total_queue_time = 0.0
+        self.max_queue_time = 0.0
+
+    @asynccontextmanager
+    async def slot(self, user_id: int, tier: Optional[str] = None,
+                   deadline: Optional[float] = None) -> AsyncIterator[float]:
+        """Hold one AI call slot for the duration of the block.
+
+        Yields:
+            Time spent waiting in the queue, in seconds
+        """
+        tier = tier or "free"
+        started = time.monotonic()
+        user_semaphore = self._user_semaphore(user_id)
+        try:
+            await asyncio.wait_for(
+                self._acquire(user_semaphore, tier),
+                timeout=deadline if deadline is not None else self.deadline
+            )
+        except asyncio.TimeoutError:
+            self._release_user_semaphore(user_id)
+            self.rejected += 1
+            logger.warning(
+                "AI queue deadline exceeded",
+                user_id=user_id,
+                tier=tier,
+                waiting=self.waiting()
+            )
+            raise AIQueueTimeout()
+        except BaseException:
+            self._release_user_semaphore(user_id)
+            raise
+
+        queue_time = time.monotonic() - started
+        self.total_queue_time += queue_time
+        self.max_queue_time = max(self.max_queue_time, queue_time)
+        try:
+            yield queue_time
+        finally:
+            self.completed += 1
+            self._release_global()
+            user_semaphore.release()
+            self._release_user_semaphore(user_id)
+
+    async def _acquire(self, user_semaphore: asyncio.Semaphore, tier: str) -> None:
+        await user_semaphore.acquire()
+        try:
+            await self._acquire_global(tier)
+        except BaseException:
+            user_semaphore.release()
+            raise
+
+    async def _acquire_global(self, tier: str) -> None:
+        if self._active < self.max_concurrency and not self.waiting():
+            self._active += 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        self._queues.setdefault(tier, deque()).append(future)
+        try:
+            await future
+        except BaseException:
+            if future.done() and not future.cancelled():
+                # The slot was granted just as we were cancelled: give it back
+                self._release_global()
+            else:
+                future.cancel()
+            raise
+
+    def _release_global(self) -> None:
+        self._active -= 1
+        while self._active < self.max_concurrency:
+            tier = self._next_tier()
+            if tier is None:
+                return
+            future = self._queues[tier].popleft()
+            if future.done():
+                continue
+            self._active += 1
+            future.set_result(None)
+
+    def _next_tier(self) -> Optional[str]:
+        """Smooth weighted round robin over tiers with live waiters"""
+        candidates = []
+        for tier, queue in self._queues.items():
+            while queue and queue[0].done():
+                queue.popleft()
+            if queue:
+                candidates.append(tier)
+        if not candidates:
+            return None
+        if len(candidates) > 1 and BACKGROUND_TIER in candidates:
+            candidates.remove(BACKGROUND_TIER)
+
+        total = 0
+        for tier in candidates:
+            weight = self.tier_weights.get(tier, 1)
+            self._current_weights[tier] = self._current_weights.get(tier, 0) + weight
+            total += weight
+        chosen = max(candidates, key=lambda t: self._current_weights[t])
+        self._current_weights[chosen] -= total
+        return chosen
+
+    def _user_semaphore(self, user_id: int) -> asyncio.Semaphore:
+        semaphore = self._user_semaphores.get(user_id)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.per_user_limit)
+            self._user_semaphores[user_id] = semaphore
+        self._user_refs[user_id] = self._user_refs.get(user_id, 0) + 1
+        return semaphore
+
+    def _release_user_semaphore(self, user_id: int) -> None:
+        refs = self._user_refs.get(user_id, 0) - 1
+        if refs <= 0:
+            self._user_refs.pop(user_id, None)
+            self._user_semaphores.pop(user_id, None)
+        else:
+            self._user_refs[user_id] = refs
+
+    def waiting(self) -> int:
+        """Requests currently queued for a global slot"""
+        return sum(
+            1 for queue in self._queues.values() for future in queue if not future.done()
+        )
+
+    def stats(self) -> Dict[str, float]:
+        """In-flight, wait depth per tier and queue-time figures"""
+        depth = {
+            tier: sum(1 for future in queue if not future.done())
+            for tier, queue in self._queues.items()
+        }
+        return {
+            "active": self._active,
+            "waiting": sum(depth.values()),
+            "waiting_by_tier": depth,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_queue_time": self.total_queue_time / self.completed if self.completed else 0.0,
+            "max_queue_time": self.max_queue_time
+        }
+
+ai_dispatcher = AIDispatcher(
+    max_concurrency=settings.ai_max_concurrency,
+    per_user_limit=settings.ai_per_user_concurrency,
+    tier_weights=settings.ai_tier_weights,
+    deadline=settings.ai_queue_deadline
+)
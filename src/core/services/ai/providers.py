@@ -0,0 +1,161 @@
+"""AI provider backends behind a common chat interface."""
+from typing import AsyncIterator, Callable, Dict, List, Optional
+import structlog
+
+from src.core.config import settings
+from src.core.services.ai.deepseek_client_new import DeepseekClient
+
+logger = structlog.get_logger()
+
+class AIProvider:
+    """Chat completion backend.
+
+    Subclasses implement `complete` and `stream`; `start`/`close` manage
+    long-lived resources such as HTTP sessions.
+    """
+
+    name = "base"
+
+    def __init__(self, model: str):
+        self.model = model
+
+    async def start(self) -> None:
+        """Open long-lived resources"""
+
+    async def close(self) -> None:
+        """Release long-lived resources"""
+
+    async def complete(self, messages: List[Dict[str, str]], temperature: float,
+                       max_tokens: int) -> str:
+        raise NotImplementedError
+
+    def stream(self, messages: List[Dict[str, str]], temperature: float,
+               max_tokens: int) -> AsyncIterator[str]:
+        raise NotImplementedError
+
+class DeepseekProvider(AIProvider):
+    name = "deepseek"
+
+    def __init__(self, model: str = "deepseek-chat", client: Optional[DeepseekClient] = None):
+        super().__init__(model)
+        self.client = client or DeepseekClient()
+
+    async def start(self) -> None:
+        await self.client.start()
+
+    async def close(self) -> None:
+        await self.client.close()
+
+    async def complete(self, messages, temperature, max_tokens):
+        return await self.client.generate_chat_response(
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            model=self.model
+        )
+
+    async def stream(self, messages, temperature, max_tokens):
+        async for chunk in self.client.stream_chat_response(
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            model=self.model
+        ):
+            yield chunk
+
+class OpenAIProvider(AIProvider):
+    name = "openai"
+
+    def __init__(self, model: str = "gpt-3.5-turbo"):
+        super().__init__(model)
+        from openai import AsyncOpenAI
+        # Pooled HTTP client, shared by every call for the provider's lifetime
+        self.client = AsyncOpenAI(api_key=settings.openai_api_key, timeout=settings.ai_timeout)
+
+    async def close(self) -> None:
+        await self.client.close()
+
+    async def complete(self, messages, temperature, max_tokens):
+        response = await self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature
+        )
+        return response.choices[0].message.content.strip()
+
+    async def stream(self, messages, temperature, max_tokens):
+        response = await self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            stream=True
+        )
+        async for chunk in response:
+            # Some chunks (e.g. usage) carry no choices
+            if not chunk.choices:
+                continue
+            content = chunk.choices[0].delta.content
+            if content:
+                yield content
+
+class GeminiProvider(AIProvider):
+    name = "gemini"
+
+    def __init__(self, model: str = "gemini-1.5-flash"):
+        super().__init__(model)
+        import google.generativeai as genai
+        genai.configure(api_key=settings.gemini_api_key)
+        self._genai = genai
+
+    def _request(self, messages, temperature, max_tokens):
+        """Split the OpenAI-style payload into Gemini's system/contents"""
+        system = "\n\n".join(m["content"] for m in messages if m["role"] == "system")
+        contents = [
+            {"role": "model" if m["role"] == "assistant" else "user", "parts": [m["content"]]}
+            for m in messages if m["role"] != "system"
+        ]
+        model = self._genai.GenerativeModel(self.model, system_instruction=system or None)
+        config = self._genai.GenerationConfig(temperature=temperature, max_output_tokens=max_tokens)
+        return model, contents, config
+
+    async def complete(self, messages, temperature, max_tokens):
+        model, contents, config = self._request(messages, temperature, max_tokens)
+        response = await model.generate_content_async(contents, generation_config=config)
+        return response.text.strip()
+
+    async def stream(self, messages, temperature, max_tokens):
+        model, contents, config = self._request(messages, temperature, max_tokens)
+        response = await model.generate_content_async(
+            contents, generation_config=config, stream=True
+        )
+        async for chunk in response:
+            if chunk.text:
+                yield chunk.text
+
+# name -> (factory, is_configured); register new backends here
+PROVIDERS: Dict[str, tuple] = {
+    "deepseek": (DeepseekProvider, lambda: bool(settings.deepseek_api_key)),
+    "openai": (OpenAIProvider, lambda: bool(settings.openai_api_key)),
+    "gemini": (GeminiProvider, lambda: bool(settings.gemini_api_key)),
+}
+
+def register_provider(name: str, factory: Callable[[], AIProvider],
+                      is_configured: Callable[[], bool]) -> None:
+    """Make an additional backend available to the router"""
+    PROVIDERS[name] = (factory, is_configured)
+
+def configured_providers() -> List[AIProvider]:
+    """Instantiate every configured backend, `settings.ai_provider` first"""
+    names = sorted(PROVIDERS, key=lambda name: name != settings.ai_provider)
+    providers = []
+    for name in names:
+        factory, is_configured = PROVIDERS[name]
+        if not is_configured():
+            continue
+        try:
+            providers.append(factory())
+        except Exception as e:
+            logger.error("AI provider unavailable", provider=name, error=str(e))
+    return providers
@@ -0,0 +1,237 @@
+"""Latency-aware routing over AI providers with failover and hedging."""
+import asyncio
+import time
+from collections import deque
+from typing import AsyncIterator, Deque, Dict, List, Optional, Tuple
+import structlog
+
+from src.core.config import settings
+from src.core.metrics import AI_REQUEST_ERRORS, AI_REQUEST_LATENCY
+from src.core.profiling import record_io
+from src.core.services.ai.providers import AIProvider, configured_providers
+
+logger = structlog.get_logger()
+
+class ProviderHealth:
+    """Rolling latency and error window for one provider
+
+    Completion latencies and stream time-to-first-token are kept apart:
+    they measure different things, and the hedge delay is taken from
+    completions only.
+    """
+
+    def __init__(self, window: int):
+        self.latencies: Deque[float] = deque(maxlen=window)
+        self.ttfts: Deque[float] = deque(maxlen=window)
+        self.outcomes: Deque[bool] = deque(maxlen=window)
+        self.open_until = 0.0
+
+    def record(self, latency: Optional[float], ok: bool, streamed: bool = False) -> None:
+        self.outcomes.append(ok)
+        if ok and latency is not None:
+            self.samples(streamed).append(latency)
+
+    def samples(self, streamed: bool = False) -> Deque[float]:
+        return self.ttfts if streamed else self.latencies
+
+    def percentile(self, q: float, streamed: bool = False) -> Optional[float]:
+        samples = self.samples(streamed)
+        if not samples:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    @property
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return self.outcomes.count(False) / len(self.outcomes)
+
+class AllProvidersFailed(RuntimeError):
+    """Every candidate provider failed for this request"""
+
+class ProviderRouter:
+    """Routes each request to the healthiest configured provider.
+
+    Providers are ranked by p50 latency; those whose error rate exceeds
+    `max_error_rate` are taken out of rotation for `cooldown` seconds
+    (unless nothing else is left). Failures fail over to the next
+    provider. With hedging enabled, a completion still pending after the
+    primary's p95 latency triggers a second request to the next provider,
+    and the first answer wins.
+    """
+
+    def __init__(
+        self,
+        providers: List[AIProvider],
+        window: int = 200,
+        max_error_rate: float = 0.5,
+        min_samples: int = 10,
+        cooldown: float = 30.0,
+        hedge: bool = False
+    ):
+        self.providers = providers
+        self.max_error_rate = max_error_rate
+        self.min_samples = min_samples
+        self.cooldown = cooldown
+        self.hedge = hedge
+        self.health: Dict[str, ProviderHealth] = {
+            provider.name: ProviderHealth(window) for provider in providers
+        }
+        self.hedged_requests = 0
+
+    def __bool__(self) -> bool:
+        return bool(self.providers)
+
+    async def start(self) -> None:
+        for provider in self.providers:
+            await provider.start()
+
+    async def close(self) -> None:
+        for provider in self.providers:
+            await provider.close()
+
+    def _record(self, provider: AIProvider, started: float, ok: bool,
+                streamed: bool = False, latency: Optional[float] = None) -> None:
+        health = self.health[provider.name]
+        if latency is None:
+            latency = time.monotonic() - started
+        health.record(latency, ok, streamed)
+        AI_REQUEST_LATENCY.labels(provider.name, "ok" if ok else "error").observe(latency)
+        record_io("ai", latency)
+        if not ok:
+            AI_REQUEST_ERRORS.labels(provider.name).inc()
+        if (not ok and len(health.outcomes) >= self.min_samples
+                and health.error_rate > self.max_error_rate):
+            health.open_until = time.monotonic() + self.cooldown
+            logger.warning(
+                "AI provider taken out of rotation",
+                provider=provider.name,
+                error_rate=health.error_rate
+            )
+
+    def ranked(self, streamed: bool = False) -> List[AIProvider]:
+        """Healthy providers first, fastest (p50) first; configured order breaks ties
+
+        Streams are ranked on time to first token, completions on latency.
+        """
+        now = time.monotonic()
+
+        def key(item: Tuple[int, AIProvider]):
+            index, provider = item
+            health = self.health[provider.name]
+            enough = len(health.samples(streamed)) >= self.min_samples
+            p50 = health.percentile(0.5, streamed) if enough else None
+            # Providers without enough samples keep their configured order behind measured ones
+            return (health.open_until > now, p50 if p50 is not None else float("inf"), index)
+
+        return [provider for _, provider in sorted(enumerate(self.providers), key=key)]
+
+    async def _attempt(self, provider: AIProvider, messages, temperature, max_tokens) -> str:
+        started = time.monotonic()
+        try:
+            result = await provider.complete(messages, temperature, max_tokens)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self._record(provider, started, ok=False)
+            raise
+        self._record(provider, started, ok=True)
+        return result
+
+    async def complete(self, messages: List[Dict[str, str]], temperature: float,
+                       max_tokens: int) -> str:
+        """Completion from the best provider, failing over on errors"""
+        candidates = self.ranked()
+        if not candidates:
+            raise ValueError("Aucun fournisseur d'IA configuré.")
+
+        errors = []
+        while candidates:
+            primary = candidates.pop(0)
+            hedge_delay = self.health[primary.name].percentile(0.95)
+            if not (self.hedge and candidates and hedge_delay
+                    and len(self.health[primary.name].latencies) >= self.min_samples):
+                try:
+                    return await self._attempt(primary, messages, temperature, max_tokens)
+                except Exception as e:
+                    errors.append(e)
+                    logger.warning("AI provider failed, failing over", provider=primary.name, error=str(e))
+                    continue
+
+            # Hedged: race the primary against the next provider after p95
+            secondary = candidates.pop(0)
+            tasks = {asyncio.create_task(self._attempt(primary, messages, temperature, max_tokens)): primary}
+            try:
+                done, _ = await asyncio.wait(tasks, timeout=hedge_delay)
+                if not done or next(iter(done)).exception() is not None:
+                    self.hedged_requests += 1
+                    tasks[asyncio.create_task(
+                        self._attempt(secondary, messages, temperature, max_tokens)
+                    )] = secondary
+                pending = set(tasks)
+                while pending:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        if task.exception() is None:
+                            return task.result()
+                        errors.append(task.exception())
+            finally:
+                for task in tasks:
+                    task.cancel()
+
+        raise AllProvidersFailed(f"Tous les fournisseurs d'IA ont échoué : {errors[-1]}")
+
+    async def stream(self, messages: List[Dict[str, str]], temperature: float,
+                     max_tokens: int) -> AsyncIterator[str]:
+        """Stream from the best provider; fails over only before the first chunk"""
+        candidates = self.ranked(streamed=True)
+        if not candidates:
+            raise ValueError("Aucun fournisseur d'IA configuré.")
+
+        last_error = None
+        for provider in candidates:
+            started = time.monotonic()
+            ttft = None
+            try:
+                async for chunk in provider.stream(messages, temperature, max_tokens):
+                    if ttft is None:
+                        # Time to first token is the latency that matters when streaming
+                        ttft = time.monotonic() - started
+                    yield chunk
+            except Exception as e:
+                self._record(provider, started, ok=False, streamed=True)
+                if ttft is not None:
+                    # Chunks were already delivered: too late to fail over
+                    raise
+                last_error = e
+                logger.warning("AI provider stream failed, failing over", provider=provider.name, error=str(e))
+                continue
+            self._record(provider, started, ok=True, streamed=True, latency=ttft)
+            return
+
+        raise AllProvidersFailed(f"Tous les fournisseurs d'IA ont échoué : {last_error}")
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Rolling p50/p95 latency and time to first token, error rate and
+        rotation state per provider"""
+        now = time.monotonic()
+        return {
+            name: {
+                "p50": health.percentile(0.5),
+                "p95": health.percentile(0.95),
+                "ttft_p50": health.percentile(0.5, streamed=True),
+                "ttft_p95": health.percentile(0.95, streamed=True),
+                "error_rate": health.error_rate,
+                "in_rotation": health.open_until <= now
+            }
+            for name, health in self.health.items()
+        }
+
+ai_router = ProviderRouter(
+    configured_providers(),
+    window=settings.ai_router_window,
+    max_error_rate=settings.ai_router_max_error_rate,
+    cooldown=settings.ai_router_cooldown,
+    hedge=settings.ai_router_hedge
+)
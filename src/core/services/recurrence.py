@@ -0,0 +1,437 @@
+"""Compiled recurrence rules (RRULE subset and cron) for task schedules.
+
+A rule string is parsed once into a `Rule` (cached by text), then resolved
+against the task's anchor time (its first occurrence) into a `Schedule`:
+sorted minute/hour/day/month/weekday sets that next-occurrence lookups
+walk with bisection, so each step costs O(1) amortized instead of a
+re-parse and a minute-by-minute scan. Resolved schedules are cached too,
+and `occurrences_between` evaluates a window once per distinct schedule
+for any number of tasks.
+
+Supported:
+- RRULE: FREQ (MINUTELY..YEARLY), INTERVAL, BYMINUTE, BYHOUR, BYDAY
+  (plain weekdays), BYMONTHDAY (negative = from month end), BYMONTH, UNTIL
+- cron: five fields with lists, ranges, steps and month/day names
+- aliases: hourly, daily, weekly, monthly, yearly, @hourly, @daily...
+
+Times are naive, minute resolution.
+"""
+import calendar
+from bisect import bisect_left
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+import structlog
+
+logger = structlog.get_logger()
+
+MINUTE = timedelta(minutes=1)
+
+FREQUENCIES = ("MINUTELY", "HOURLY", "DAILY", "WEEKLY", "MONTHLY", "YEARLY")
+_WEEKDAYS = {"MO": 0, "TU": 1, "WE": 2, "TH": 3, "FR": 4, "SA": 5, "SU": 6}
+_CRON_MONTHS = {name.upper(): i for i, name in enumerate(calendar.month_abbr) if name}
+_CRON_DAYS = {"SUN": 0, "MON": 1, "TUE": 2, "WED": 3, "THU": 4, "FRI": 5, "SAT": 6}
+_ALIASES = {
+    "hourly": "FREQ=HOURLY",
+    "daily": "FREQ=DAILY",
+    "weekly": "FREQ=WEEKLY",
+    "monthly": "FREQ=MONTHLY",
+    "yearly": "FREQ=YEARLY",
+    "@hourly": "0 * * * *",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@weekly": "0 0 * * 0",
+    "@monthly": "0 0 1 * *",
+    "@yearly": "0 0 1 1 *",
+    "@annually": "0 0 1 1 *",
+}
+# Give up looking for a match after this many years (e.g. 30 February)
+_SEARCH_YEARS = 8
+
+Mask = Optional[Tuple[int, ...]]
+
+@dataclass(frozen=True)
+class Rule:
+    """Parsed rule; None fields are taken from the anchor when resolving"""
+    freq: Optional[str] = None          # None for cron rules
+    interval: int = 1
+    minutes: Mask = None
+    hours: Mask = None
+    monthdays: Mask = None
+    weekdays: Mask = None               # Monday = 0
+    months: Mask = None
+    until: Optional[datetime] = None
+    day_or: bool = False                # cron: restricted DOM *or* DOW matches
+
+    def resolve(self, anchor: datetime) -> "Schedule":
+        """Concrete schedule for a task first due at `anchor`"""
+        return _resolve(self, *_anchor_key(self, anchor))
+
+@dataclass(frozen=True)
+class Schedule:
+    minutes: Tuple[int, ...]
+    hours: Tuple[int, ...]
+    monthdays: Mask
+    weekdays: Mask
+    months: Tuple[int, ...]
+    day_or: bool = False
+    # Interval > 1: only periods `interval` apart from the anchor's qualify
+    freq: Optional[str] = None
+    interval: int = 1
+    anchor: Optional[datetime] = None
+    until: Optional[datetime] = None
+
+    def next_after(self, after: datetime) -> Optional[datetime]:
+        """First occurrence strictly after `after`"""
+        return self.at_or_after(after.replace(second=0, microsecond=0) + MINUTE)
+
+    def at_or_after(self, start: datetime) -> Optional[datetime]:
+        """First occurrence at or after `start`"""
+        t = _ceil_minute(start)
+        if self.anchor and t < self.anchor:
+            t = _ceil_minute(self.anchor)
+        limit = t.replace(year=t.year + _SEARCH_YEARS, month=1, day=1)
+        while t < limit:
+            if self.until and t > self.until:
+                return None
+
+            if t.month not in self.months:
+                i = bisect_left(self.months, t.month)
+                if i < len(self.months):
+                    t = datetime(t.year, self.months[i], 1)
+                else:
+                    t = datetime(t.year + 1, self.months[0], 1)
+                continue
+
+            if not self._day_matches(t):
+                t = datetime(t.year, t.month, t.day) + timedelta(days=1)
+                continue
+
+            i = bisect_left(self.hours, t.hour)
+            if i == len(self.hours):
+                t = datetime(t.year, t.month, t.day) + timedelta(days=1)
+                continue
+            if self.hours[i] != t.hour:
+                t = t.replace(hour=self.hours[i], minute=0)
+
+            i = bisect_left(self.minutes, t.minute)
+            if i == len(self.minutes):
+                t = t.replace(minute=0) + timedelta(hours=1)
+                continue
+            t = t.replace(minute=self.minutes[i])
+
+            if self.interval > 1 and not self._in_period(t):
+                t = self._next_period(t)
+                continue
+            return t if not self.until or t <= self.until else None
+        return None
+
+    def next_n(self, after: datetime, n: int) -> List[datetime]:
+        """The next `n` occurrences strictly after `after`"""
+        occurrences = []
+        t = self.next_after(after)
+        while t is not None and len(occurrences) < n:
+            occurrences.append(t)
+            t = self.at_or_after(t + MINUTE)
+        return occurrences
+
+    def between(self, start: datetime, end: datetime) -> List[datetime]:
+        """All occurrences in [start, end)"""
+        occurrences = []
+        t = self.at_or_after(start)
+        while t is not None and t < end:
+            occurrences.append(t)
+            t = self.at_or_after(t + MINUTE)
+        return occurrences
+
+    def _day_matches(self, t: datetime) -> bool:
+        if self.monthdays is None and self.weekdays is None:
+            return True
+        day_ok = self.monthdays is not None and _monthday_matches(self.monthdays, t)
+        weekday_ok = self.weekdays is not None and t.weekday() in self.weekdays
+        if self.monthdays is None:
+            return weekday_ok
+        if self.weekdays is None:
+            return day_ok
+        return (day_ok or weekday_ok) if self.day_or else (day_ok and weekday_ok)
+
+    def _period(self, t: datetime) -> int:
+        """Index of the FREQ period containing `t`, counted from the anchor's"""
+        a = self.anchor
+        if self.freq == "YEARLY":
+            return t.year - a.year
+        if self.freq == "MONTHLY":
+            return (t.year - a.year) * 12 + t.month - a.month
+        if self.freq == "WEEKLY":
+            return ((t.date() - timedelta(days=t.weekday())) - (a.date() - timedelta(days=a.weekday()))).days // 7
+        if self.freq == "DAILY":
+            return (t.date() - a.date()).days
+        if self.freq == "HOURLY":
+            return int((t.replace(minute=0) - a.replace(minute=0, second=0, microsecond=0)).total_seconds()) // 3600
+        return int((t - a.replace(second=0, microsecond=0)).total_seconds()) // 60
+
+    def _in_period(self, t: datetime) -> bool:
+        return self._period(t) % self.interval == 0
+
+    def _next_period(self, t: datetime) -> datetime:
+        """Start of the next qualifying period after the one containing `t`"""
+        skip = self.interval - self._period(t) % self.interval
+        if self.freq == "YEARLY":
+            return datetime(t.year + skip, 1, 1)
+        if self.freq == "MONTHLY":
+            month = t.month - 1 + skip
+            return datetime(t.year + month // 12, month % 12 + 1, 1)
+        if self.freq == "WEEKLY":
+            return datetime(t.year, t.month, t.day) + timedelta(days=7 * skip - t.weekday())
+        if self.freq == "DAILY":
+            return datetime(t.year, t.month, t.day) + timedelta(days=skip)
+        if self.freq == "HOURLY":
+            return t.replace(minute=0) + timedelta(hours=skip)
+        return t + timedelta(minutes=skip)
+
+def _ceil_minute(t: datetime) -> datetime:
+    if t.second or t.microsecond:
+        return t.replace(second=0, microsecond=0) + MINUTE
+    return t
+
+def _monthday_matches(monthdays: Tuple[int, ...], t: datetime) -> bool:
+    if t.day in monthdays:
+        return True
+    # Negative days count from the end of the month (-1 = last day)
+    last = calendar.monthrange(t.year, t.month)[1]
+    return (t.day - last - 1) in monthdays
+
+def _anchor_key(rule: Rule, anchor: datetime) -> tuple:
+    """The parts of the anchor the resolved schedule depends on.
+
+    Tasks whose keys are equal share one cached Schedule; with interval 1
+    only the calendar fields the rule takes from the anchor matter (None
+    for the others), not its date.
+    """
+    if rule.interval > 1:
+        return (anchor,)
+    if rule.freq is None:
+        return (None,) * 5
+    level = FREQUENCIES.index(rule.freq)
+    no_day_parts = rule.monthdays is None and rule.weekdays is None
+    return (
+        anchor.minute if level >= 1 and rule.minutes is None else None,
+        anchor.hour if level >= 2 and rule.hours is None else None,
+        anchor.day if rule.freq in ("MONTHLY", "YEARLY") and no_day_parts else None,
+        anchor.weekday() if rule.freq == "WEEKLY" and rule.weekdays is None else None,
+        anchor.month if rule.freq == "YEARLY" and rule.months is None and no_day_parts else None
+    )
+
+@lru_cache(maxsize=16384)
+def _resolve(rule: Rule, *key) -> Schedule:
+    if rule.interval > 1:
+        anchor = key[0]
+        minute, hour, day, weekday, month = (
+            anchor.minute, anchor.hour, anchor.day, anchor.weekday(), anchor.month
+        )
+    else:
+        anchor = None
+        minute, hour, day, weekday, month = key
+
+    every_minute = tuple(range(60))
+    every_hour = tuple(range(24))
+    every_month = tuple(range(1, 13))
+    if rule.freq is None:
+        # cron: fully specified by its fields
+        return Schedule(
+            minutes=rule.minutes or every_minute,
+            hours=rule.hours or every_hour,
+            monthdays=rule.monthdays,
+            weekdays=rule.weekdays,
+            months=rule.months or every_month,
+            day_or=rule.day_or,
+            until=rule.until
+        )
+
+    # RFC 5545 defaults: unspecified parts finer than FREQ come from DTSTART
+    level = FREQUENCIES.index(rule.freq)
+    monthdays, weekdays = rule.monthdays, rule.weekdays
+    no_day_parts = monthdays is None and weekdays is None
+    if rule.freq == "WEEKLY" and weekdays is None:
+        weekdays = (weekday,)
+    if rule.freq in ("MONTHLY", "YEARLY") and no_day_parts:
+        monthdays = (day,)
+    months = rule.months
+    if rule.freq == "YEARLY" and months is None and no_day_parts:
+        months = (month,)
+
+    return Schedule(
+        minutes=rule.minutes or (every_minute if level < 1 else (minute,)),
+        hours=rule.hours or (every_hour if level < 2 else (hour,)),
+        monthdays=monthdays,
+        weekdays=weekdays,
+        months=months or every_month,
+        freq=rule.freq,
+        interval=rule.interval,
+        anchor=anchor,
+        until=rule.until
+    )
+
+def _int_list(value: str, low: int, high: int, name: str) -> Tuple[int, ...]:
+    numbers = tuple(sorted({int(part) for part in value.split(",")}))
+    for number in numbers:
+        if not (low <= abs(number) <= high) or (number < 0 and name != "BYMONTHDAY"):
+            raise ValueError(f"{name} out of range: {value}")
+    return numbers
+
+def _parse_until(value: str) -> datetime:
+    value = value.rstrip("Z")
+    for fmt in ("%Y%m%dT%H%M%S", "%Y%m%d"):
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            pass
+    raise ValueError(f"Invalid UNTIL: {value}")
+
+def _parse_rrule(text: str) -> Rule:
+    parts = {}
+    for item in text.split(";"):
+        if not item:
+            continue
+        key, _, value = item.partition("=")
+        parts[key.strip().upper()] = value.strip().upper()
+
+    freq = parts.pop("FREQ", None)
+    if freq not in FREQUENCIES:
+        raise ValueError(f"Invalid FREQ: {freq}")
+    if "COUNT" in parts:
+        raise ValueError("COUNT is not supported, use UNTIL")
+
+    weekdays = None
+    if "BYDAY" in parts:
+        try:
+            weekdays = tuple(sorted({_WEEKDAYS[day] for day in parts.pop("BYDAY").split(",")}))
+        except KeyError as e:
+            raise ValueError(f"Unsupported BYDAY value: {e}")
+
+    rule = Rule(
+        freq=freq,
+        interval=int(parts.pop("INTERVAL", 1)),
+        minutes=_int_list(parts.pop("BYMINUTE"), 0, 59, "BYMINUTE") if "BYMINUTE" in parts else None,
+        hours=_int_list(parts.pop("BYHOUR"), 0, 23, "BYHOUR") if "BYHOUR" in parts else None,
+        monthdays=_int_list(parts.pop("BYMONTHDAY"), 1, 31, "BYMONTHDAY") if "BYMONTHDAY" in parts else None,
+        weekdays=weekdays,
+        months=_int_list(parts.pop("BYMONTH"), 1, 12, "BYMONTH") if "BYMONTH" in parts else None,
+        until=_parse_until(parts.pop("UNTIL")) if "UNTIL" in parts else None
+    )
+    parts.pop("WKST", None)
+    if parts:
+        raise ValueError(f"Unsupported RRULE parts: {', '.join(parts)}")
+    if rule.interval < 1:
+        raise ValueError("INTERVAL must be positive")
+    return rule
+
+def _cron_field(field: str, low: int, high: int, names: Dict[str, int]) -> Mask:
+    """Values allowed by one cron field; None when unrestricted (`*`)"""
+    if field == "*":
+        return None
+    values = set()
+    for part in field.split(","):
+        step = 1
+        if "/" in part:
+            part, step_text = part.split("/", 1)
+            step = int(step_text)
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            start_text, end_text = part.split("-", 1)
+            start, end = names.get(start_text.upper(), None), names.get(end_text.upper(), None)
+            start = int(start_text) if start is None else start
+            end = int(end_text) if end is None else end
+        else:
+            start = names.get(part.upper())
+            start = int(part) if start is None else start
+            end = high if step > 1 else start
+        if not (low <= start <= end <= high) or step < 1:
+            raise ValueError(f"Invalid cron field: {field}")
+        values.update(range(start, end + 1, step))
+    return tuple(sorted(values))
+
+def _parse_cron(text: str) -> Rule:
+    fields = text.split()
+    if len(fields) != 5:
+        raise ValueError(f"Cron expressions have 5 fields: {text}")
+    minute, hour, monthday, month, weekday = fields
+    cron_weekdays = _cron_field(weekday, 0, 7, _CRON_DAYS)
+    weekdays = None
+    if cron_weekdays is not None:
+        # cron: 0/7 = Sunday, 1 = Monday; Python: 0 = Monday
+        weekdays = tuple(sorted({(day - 1) % 7 for day in cron_weekdays}))
+    monthdays = _cron_field(monthday, 1, 31, {})
+    return Rule(
+        minutes=_cron_field(minute, 0, 59, {}),
+        hours=_cron_field(hour, 0, 23, {}),
+        monthdays=monthdays,
+        weekdays=weekdays,
+        months=_cron_field(month, 1, 12, _CRON_MONTHS),
+        day_or=monthdays is not None and weekdays is not None
+    )
+
+@lru_cache(maxsize=4096)
+def compile_rule(text: str) -> Rule:
+    """Parse a recurrence rule once; raises ValueError if unsupported"""
+    text = text.strip()
+    text = _ALIASES.get(text.lower(), text)
+    if text.upper().startswith("RRULE:"):
+        text = text[6:]
+    if "FREQ=" in text.upper():
+        return _parse_rrule(text)
+    return _parse_cron(text)
+
+def next_occurrence(rule: Optional[str], previous: datetime, now: datetime) -> Optional[datetime]:
+    """Next run of a task last due at `previous`, skipping runs missed before `now`
+
+    Returns:
+        None for one-off tasks, exhausted rules and unsupported rules
+    """
+    if not rule:
+        return None
+    try:
+        schedule = compile_rule(rule).resolve(previous)
+    except ValueError as e:
+        logger.warning("Unsupported recurrence rule", rule=rule, error=str(e))
+        return None
+    return schedule.next_after(max(previous, now))
+
+def occurrences_between(
+    tasks: Iterable[Tuple[Hashable, Optional[str], datetime]],
+    start: datetime,
+    end: datetime
+) -> Dict[Hashable, List[datetime]]:
+    """Occurrences in [start, end) for many tasks at once
+
+    Args:
+        tasks: (key, recurrence rule or None, next scheduled time) triples
+
+    Returns:
+        key -> occurrences; tasks sharing a schedule are evaluated once
+    """
+    results: Dict[Hashable, List[datetime]] = {}
+    by_schedule: Dict[Tuple[str, tuple], List[Tuple[Hashable, datetime]]] = {}
+    for key, rule, scheduled_at in tasks:
+        if scheduled_at is None:
+            results[key] = []
+            continue
+        if not rule:
+            results[key] = [scheduled_at] if start <= scheduled_at < end else []
+            continue
+        try:
+            compiled = compile_rule(rule)
+        except ValueError:
+            results[key] = [scheduled_at] if start <= scheduled_at < end else []
+            continue
+        by_schedule.setdefault((compiled, _anchor_key(compiled, scheduled_at)), []).append((key, scheduled_at))
+
+    for (compiled, anchor_key), members in by_schedule.items():
+        schedule = _resolve(compiled, *anchor_key)
+        window = schedule.between(start, end)
+        for key, scheduled_at in members:
+            # Shared window, cut at each task's own next run
+            results[key] = window[bisect_left(window, scheduled_at):]
+    return results
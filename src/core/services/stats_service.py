@@ -0,0 +1,150 @@
+"""Service for the per-user counters shown by /status."""
+from dataclasses import dataclass
+from typing import Dict
+from sqlalchemy import Integer, column as column_, func, literal, select, union_all, update, values
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+import structlog
+
+from src.core.database.models import Integration, Task, UserStats, Workflow
+
+logger = structlog.get_logger()
+
+@dataclass(frozen=True)
+class StatsSnapshot:
+    workflows: int = 0
+    active_workflows: int = 0
+    pending_tasks: int = 0
+    integrations: int = 0          # Active integrations
+
+class StatsService:
+    """Reads and maintains `user_stats`.
+
+    Writers call `adjust` inside their own transaction, before committing,
+    so the counters change atomically with the rows they count.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get(self, user_id: int) -> StatsSnapshot:
+        """Counters for a user: one primary-key lookup, or one aggregate
+        query (whose result is then stored) if the user has no record yet."""
+        stats = await self.db.get(UserStats, user_id)
+        if stats is not None:
+            return StatsSnapshot(
+                workflows=stats.workflows_count,
+                active_workflows=stats.active_workflows_count,
+                pending_tasks=stats.pending_tasks_count,
+                integrations=stats.integrations_count
+            )
+
+        snapshot = await self.compute(user_id)
+        await self._insert(user_id, snapshot)
+        return snapshot
+
+    async def compute(self, user_id: int) -> StatsSnapshot:
+        """Count from the source tables in a single round trip"""
+        query = union_all(
+            select(
+                literal("workflows").label("kind"),
+                func.count(),
+                func.count().filter(Workflow.is_active.is_(True))
+            ).where(Workflow.user_id == user_id),
+            select(
+                literal("tasks"),
+                func.count(),
+                literal(0)
+            ).where(Task.user_id == user_id, Task.completed_at.is_(None)),
+            select(
+                literal("integrations"),
+                func.count(),
+                func.count().filter(Integration.is_active.is_(True))
+            ).where(Integration.user_id == user_id)
+        )
+        counts = {kind: (total, active) for kind, total, active in (await self.db.execute(query)).all()}
+        return StatsSnapshot(
+            workflows=counts["workflows"][0],
+            active_workflows=counts["workflows"][1],
+            pending_tasks=counts["tasks"][0],
+            integrations=counts["integrations"][1]
+        )
+
+    async def adjust(
+        self,
+        user_id: int,
+        workflows: int = 0,
+        active_workflows: int = 0,
+        pending_tasks: int = 0,
+        integrations: int = 0
+    ) -> None:
+        """Apply counter deltas for changes made in the current transaction.
+
+        Does not commit. Pending ORM changes must describe the same change
+        as the deltas: they are flushed first, and if the user has no
+        record yet it is created by counting, which already includes them.
+        """
+        deltas = {
+            "workflows_count": workflows,
+            "active_workflows_count": active_workflows,
+            "pending_tasks_count": pending_tasks,
+            "integrations_count": integrations,
+        }
+        deltas = {column: delta for column, delta in deltas.items() if delta}
+        if not deltas:
+            return
+        if await self._apply(user_id, deltas):
+            return
+
+        await self.db.flush()
+        if not await self._insert(user_id, await self.compute(user_id)):
+            # Created concurrently from a view without our changes: add them
+            await self._apply(user_id, deltas)
+
+    async def adjust_many(self, column: str, deltas: Dict[int, int]) -> None:
+        """Apply one counter's deltas for many users in a single statement.
+        
+        Users without a record are skipped: their record is computed from
+        the source tables when first read.
+        """
+        deltas = {user_id: delta for user_id, delta in deltas.items() if delta}
+        if not deltas:
+            return
+        changes = values(
+            column_("user_id", Integer), column_("delta", Integer), name="changes"
+        ).data(list(deltas.items()))
+        counter = getattr(UserStats, column)
+        await self.db.execute(
+            update(UserStats)
+            .where(UserStats.user_id == changes.c.user_id)
+            .values({column: counter + changes.c.delta})
+            .execution_options(synchronize_session=False)
+        )
+
+    async def _apply(self, user_id: int, deltas: Dict[str, int]) -> bool:
+        """Increment existing counters; False if the user has no record"""
+        result = await self.db.execute(
+            update(UserStats)
+            .where(UserStats.user_id == user_id)
+            .values({
+                column: getattr(UserStats, column) + delta
+                for column, delta in deltas.items()
+            })
+            .execution_options(synchronize_session=False)
+        )
+        return bool(result.rowcount)
+
+    async def _insert(self, user_id: int, snapshot: StatsSnapshot) -> bool:
+        """Create the user's record unless it exists; True if created"""
+        result = await self.db.execute(
+            insert(UserStats)
+            .values(
+                user_id=user_id,
+                workflows_count=snapshot.workflows,
+                active_workflows_count=snapshot.active_workflows,
+                pending_tasks_count=snapshot.pending_tasks,
+                integrations_count=snapshot.integrations
+            )
+            .on_conflict_do_nothing(index_elements=[UserStats.user_id])
+        )
+        return bool(result.rowcount)
@@ -0,0 +1,149 @@
+"""Service for user account operations."""
+import asyncio
+from typing import Dict, List, Optional
+from sqlalchemy import update, literal_column
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+import structlog
+
+from src.core.cache.user_cache import CachedUser, user_cache
+from src.core.config import settings
+from src.core.database.connection import get_async_db
+from src.core.database.models import User
+
+logger = structlog.get_logger()
+
+class UserService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def upsert_users(self, rows: List[Dict]) -> List[CachedUser]:
+        """Register (or refresh) users with a single multi-row upsert.
+        
+        Args:
+            rows: Dicts with telegram_id, username and first_name; telegram_id
+                must be unique within the list
+            
+        Returns:
+            Snapshots of the stored rows, in no particular order
+        """
+        stmt = insert(User).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[User.telegram_id],
+            set_={
+                "username": stmt.excluded.username,
+                "first_name": stmt.excluded.first_name
+            }
+        ).returning(
+            User.id,
+            User.telegram_id,
+            User.username,
+            User.first_name,
+            User.subscription_tier,
+            User.created_at,
+            # xmax is 0 only for freshly inserted tuples
+            literal_column("(xmax = 0)").label("inserted")
+        )
+        result = await self.db.execute(stmt)
+        
+        users = []
+        for row in result.all():
+            data = dict(row._mapping)
+            if data.pop("inserted"):
+                logger.info("New user auto-registered", telegram_id=data["telegram_id"])
+            data["subscription_tier"] = data["subscription_tier"] or "free"
+            users.append(CachedUser(**data))
+        return users
+
+    async def update_subscription_tier(self, telegram_id: int, tier: str) -> Optional[int]:
+        """Change a user's plan and invalidate its cached snapshot.
+        
+        Returns:
+            The user's primary key, or None if the user does not exist
+        """
+        result = await self.db.execute(
+            update(User)
+            .where(User.telegram_id == telegram_id)
+            .values(subscription_tier=tier)
+            .returning(User.id)
+        )
+        user_id = result.scalar_one_or_none()
+        await self.db.commit()
+        
+        # Invalidate after commit so a concurrent miss cannot re-cache the old row
+        await user_cache.invalidate(telegram_id)
+        
+        logger.info("Subscription tier updated", telegram_id=telegram_id, tier=tier)
+        return user_id
+
+class UserRegistrar:
+    """Coalesces and batches user registrations into multi-row upserts.
+
+    Concurrent registrations of the same telegram_id share one future, and
+    registrations arriving within `batch_window` seconds (or until
+    `max_batch` users are queued) are written by a single statement.
+    """
+
+    def __init__(self, max_batch: int, batch_window: float):
+        self.max_batch = max_batch
+        self.batch_window = batch_window
+        self._batch: Dict[int, Dict] = {}
+        self._futures: Dict[int, asyncio.Future] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks = set()
+
+    async def register(self, telegram_user) -> CachedUser:
+        """Ensure the Telegram user exists and return its snapshot."""
+        future = self._futures.get(telegram_user.id)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._futures[telegram_user.id] = future
+            self._batch[telegram_user.id] = {
+                "telegram_id": telegram_user.id,
+                "username": telegram_user.username,
+                "first_name": telegram_user.first_name
+            }
+            if len(self._batch) >= self.max_batch:
+                self._flush_now()
+            elif self._timer is None:
+                self._timer = loop.call_later(self.batch_window, self._flush_now)
+        
+        # Shield so one cancelled caller does not cancel the shared result
+        return await asyncio.shield(future)
+
+    def _flush_now(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._batch:
+            return
+        batch, self._batch = self._batch, {}
+        task = asyncio.create_task(self._flush(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _flush(self, batch: Dict[int, Dict]) -> None:
+        try:
+            async with get_async_db() as db:
+                users = await UserService(db).upsert_users(list(batch.values()))
+        except Exception as e:
+            logger.error("User registration batch failed", error=str(e), size=len(batch))
+            for telegram_id in batch:
+                future = self._futures.pop(telegram_id, None)
+                if future is not None and not future.done():
+                    future.set_exception(e)
+            return
+        
+        if len(batch) > 1:
+            logger.info("User registration batch flushed", size=len(batch))
+        
+        for user in users:
+            future = self._futures.pop(user.telegram_id, None)
+            if future is not None and not future.done():
+                future.set_result(user)
+
+user_registrar = UserRegistrar(
+    max_batch=settings.user_registration_batch_size,
+    batch_window=settings.user_registration_batch_window
+)
@@ -1,20 +1,157 @@
 """Service for managing workflows with n8n integration."""
-from typing import List, Optional, Dict
-from sqlalchemy.orm import Session
+import asyncio
+import base64
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Iterable, List, Optional, Dict, Tuple
+from uuid import UUID
+from aiohttp import ClientResponseError
+from sqlalchemy import select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
 import structlog
 
-from src.core.database.models import Workflow, User
+from src.core.cache.singleflight import SingleFlight, flight_key
+from src.core.config import settings
+from src.core.database.models import Workflow
+from src.core.services.stats_service import StatsService
 from src.integrations.n8n.client import N8NClient
 
 logger = structlog.get_logger()
 
+# Coalesces identical concurrent n8n calls (double-tapped buttons)
+n8n_flight = SingleFlight("n8n")
+
+# Default page size of workflow listings (one keyboard button per workflow)
+PAGE_SIZE = 10
+_EPOCH = datetime(1970, 1, 1)
+
+@dataclass
+class WorkflowPage:
+    workflows: List[Workflow]
+    prev_cursor: Optional[str] = None
+    next_cursor: Optional[str] = None
+
+@dataclass
+class BulkResult:
+    """Outcome of a bulk operation for one workflow"""
+    workflow_id: UUID
+    ok: bool
+    workflow: Optional[Workflow] = None
+    error: Optional[str] = None
+
+def encode_cursor(workflow: Workflow) -> str:
+    """Compact keyset cursor (fits Telegram's 64-byte callback data)"""
+    micros = (workflow.created_at - _EPOCH) // timedelta(microseconds=1)
+    uid = base64.urlsafe_b64encode(workflow.id.bytes).decode().rstrip("=")
+    return f"{micros:x}.{uid}"
+
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    """Inverse of encode_cursor; raises ValueError if malformed"""
+    try:
+        micros, uid = cursor.split(".", 1)
+        created_at = _EPOCH + timedelta(microseconds=int(micros, 16))
+        return created_at, UUID(bytes=base64.urlsafe_b64decode(uid + "=="))
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
 class WorkflowService:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession, n8n: Optional[N8NClient] = None):
+        """
+        Args:
+            db: Async database session
+            n8n: Shared, already started n8n client (required for n8n calls)
+        """
         self.db = db
+        self.n8n = n8n
+        
+    async def get_user_workflow(self, workflow_id: int, user_id: int) -> Workflow:
+        """Load a workflow owned by the user or raise."""
+        result = await self.db.execute(
+            select(Workflow).where(
+                Workflow.id == workflow_id,
+                Workflow.user_id == user_id
+            )
+        )
+        workflow = result.scalar_one_or_none()
+        
+        if not workflow:
+            raise ValueError("Workflow not found or access denied")
+        
+        return workflow
+        
+    async def get_user_workflows(self, workflow_ids: Iterable[UUID], user_id: int) -> Dict[UUID, Workflow]:
+        """Load the given workflows owned by the user in one query, by ID.
+        
+        IDs not found or owned by another user are missing from the result.
+        """
+        result = await self.db.execute(
+            select(Workflow).where(
+                Workflow.id.in_(list(workflow_ids)),
+                Workflow.user_id == user_id
+            )
+        )
+        return {workflow.id: workflow for workflow in result.scalars().all()}
+        
+    async def get_n8n_workflow(self, workflow_id: int, user_id: int) -> Dict:
+        """Fetch the n8n definition of a user's workflow."""
+        workflow = await self.get_user_workflow(workflow_id, user_id)
+        return await n8n_flight.do(
+            flight_key("get", workflow.n8n_workflow_id),
+            lambda: self.n8n.get_workflow(workflow.n8n_workflow_id)
+        )
         
     async def list_user_workflows(self, user_id: int) -> List[Workflow]:
         """Get all workflows for a user."""
-        return self.db.query(Workflow).filter(Workflow.user_id == user_id).all()
+        result = await self.db.execute(
+            select(Workflow).where(Workflow.user_id == user_id)
+        )
+        return list(result.scalars().all())
+    
+    async def list_user_workflows_page(
+        self,
+        user_id: int,
+        after: Optional[str] = None,
+        before: Optional[str] = None,
+        limit: int = PAGE_SIZE
+    ) -> WorkflowPage:
+        """Get one page of a user's workflows, oldest first.
+        
+        Keyset pagination on (created_at, id): each page is a single
+        bounded range scan, however deep the user pages.
+        
+        Args:
+            after: Cursor of the last item of the previous page (next page)
+            before: Cursor of the first item of the following page (previous page)
+        """
+        key = tuple_(Workflow.created_at, Workflow.id)
+        query = select(Workflow).where(Workflow.user_id == user_id)
+        if before:
+            query = query.where(key < decode_cursor(before)).order_by(
+                Workflow.created_at.desc(), Workflow.id.desc()
+            )
+        else:
+            if after:
+                query = query.where(key > decode_cursor(after))
+            query = query.order_by(Workflow.created_at, Workflow.id)
+        
+        # One extra row tells whether there is a page beyond this one
+        result = await self.db.execute(query.limit(limit + 1))
+        workflows = list(result.scalars().all())
+        has_more = len(workflows) > limit
+        workflows = workflows[:limit]
+        if before:
+            workflows.reverse()
+        
+        page = WorkflowPage(workflows)
+        if workflows:
+            has_prev, has_next = (has_more, True) if before else (bool(after), has_more)
+            if has_prev:
+                page.prev_cursor = encode_cursor(workflows[0])
+            if has_next:
+                page.next_cursor = encode_cursor(workflows[-1])
+        return page
     
     async def create_workflow(
         self,
@@ -27,12 +164,11 @@ class WorkflowService:
         """Create new workflow for user."""
         try:
             # Create workflow in n8n
-            async with N8NClient() as n8n:
-                n8n_workflow = await n8n.create_workflow(
-                    name=name,
-                    nodes=nodes or [],
-                    connections=connections or {}
-                )
+            n8n_workflow = await self.n8n.create_workflow(
+                name=name,
+                nodes=nodes or [],
+                connections=connections or {}
+            )
             
             # Save to database
             workflow = Workflow(
@@ -43,7 +179,8 @@ class WorkflowService:
                 is_active=False
             )
             self.db.add(workflow)
-            self.db.commit()
+            await StatsService(self.db).adjust(user_id, workflows=1)
+            await self.db.commit()
             
             logger.info(
                 "Workflow created",
@@ -55,7 +192,7 @@ class WorkflowService:
             return workflow
             
         except Exception as e:
-            self.db.rollback()
+            await self.db.rollback()
             logger.error(
                 "Failed to create workflow",
                 error=str(e),
@@ -66,20 +203,16 @@ class WorkflowService:
     
     async def activate_workflow(self, workflow_id: int, user_id: int) -> Workflow:
         """Activate workflow for user."""
-        workflow = self.db.query(Workflow).filter(
-            Workflow.id == workflow_id,
-            Workflow.user_id == user_id
-        ).first()
-        
-        if not workflow:
-            raise ValueError("Workflow not found or access denied")
+        workflow = await self.get_user_workflow(workflow_id, user_id)
         
         try:
-            async with N8NClient() as n8n:
-                await n8n.activate_workflow(workflow.n8n_workflow_id)
+            await n8n_flight.do(
+                flight_key("activate", workflow.n8n_workflow_id),
+                lambda: self.n8n.activate_workflow(workflow.n8n_workflow_id)
+            )
             
-            workflow.is_active = True
-            self.db.commit()
+            await self._set_active([workflow], True)
+            await self.db.commit()
             
             logger.info(
                 "Workflow activated",
@@ -90,7 +223,7 @@ class WorkflowService:
             return workflow
             
         except Exception as e:
-            self.db.rollback()
+            await self.db.rollback()
             logger.error(
                 "Failed to activate workflow",
                 error=str(e),
@@ -101,20 +234,16 @@ class WorkflowService:
     
     async def deactivate_workflow(self, workflow_id: int, user_id: int) -> Workflow:
         """Deactivate workflow for user."""
-        workflow = self.db.query(Workflow).filter(
-            Workflow.id == workflow_id,
-            Workflow.user_id == user_id
-        ).first()
-        
-        if not workflow:
-            raise ValueError("Workflow not found or access denied")
+        workflow = await self.get_user_workflow(workflow_id, user_id)
         
         try:
-            async with N8NClient() as n8n:
-                await n8n.deactivate_workflow(workflow.n8n_workflow_id)
+            await n8n_flight.do(
+                flight_key("deactivate", workflow.n8n_workflow_id),
+                lambda: self.n8n.deactivate_workflow(workflow.n8n_workflow_id)
+            )
             
-            workflow.is_active = False
-            self.db.commit()
+            await self._set_active([workflow], False)
+            await self.db.commit()
             
             logger.info(
                 "Workflow deactivated",
@@ -125,7 +254,7 @@ class WorkflowService:
             return workflow
             
         except Exception as e:
-            self.db.rollback()
+            await self.db.rollback()
             logger.error(
                 "Failed to deactivate workflow",
                 error=str(e),
@@ -134,6 +263,36 @@ class WorkflowService:
             )
             raise
     
+    async def delete_workflow(self, workflow_id: int, user_id: int) -> None:
+        """Delete workflow in n8n and locally."""
+        workflow = await self.get_user_workflow(workflow_id, user_id)
+        
+        try:
+            if workflow.n8n_workflow_id:
+                await n8n_flight.do(
+                    flight_key("delete", workflow.n8n_workflow_id),
+                    lambda: self._delete_n8n_workflow(workflow.n8n_workflow_id)
+                )
+            
+            await self._delete_local([workflow])
+            await self.db.commit()
+            
+            logger.info(
+                "Workflow deleted",
+                workflow_id=workflow_id,
+                user_id=user_id
+            )
+            
+        except Exception as e:
+            await self.db.rollback()
+            logger.error(
+                "Failed to delete workflow",
+                error=str(e),
+                workflow_id=workflow_id,
+                user_id=user_id
+            )
+            raise
+    
     async def execute_workflow(
         self,
         workflow_id: int,
@@ -141,23 +300,14 @@ class WorkflowService:
         data: Optional[Dict] = None
     ) -> Dict:
         """Execute workflow with optional data."""
-        workflow = self.db.query(Workflow).filter(
-            Workflow.id == workflow_id,
-            Workflow.user_id == user_id
-        ).first()
-        
-        if not workflow:
-            raise ValueError("Workflow not found or access denied")
+        workflow = await self.get_user_workflow(workflow_id, user_id)
         
         if not workflow.is_active:
             raise ValueError("Workflow is not active")
         
         try:
-            async with N8NClient() as n8n:
-                result = await n8n.execute_workflow(
-                    workflow.n8n_workflow_id,
-                    data
-                )
+            # Never coalesced: each request is an intentional run with side effects
+            result = await self.n8n.execute_workflow(workflow.n8n_workflow_id, data)
             
             logger.info(
                 "Workflow executed",
@@ -175,3 +325,165 @@ class WorkflowService:
                 user_id=user_id
             )
             raise
+    
+    async def activate_many(self, workflow_ids: List[UUID], user_id: int) -> List[BulkResult]:
+        """Activate several workflows; see `_set_active_many`."""
+        return await self._set_active_many(workflow_ids, user_id, True)
+    
+    async def deactivate_many(self, workflow_ids: List[UUID], user_id: int) -> List[BulkResult]:
+        """Deactivate several workflows; see `_set_active_many`."""
+        return await self._set_active_many(workflow_ids, user_id, False)
+    
+    async def delete_many(self, workflow_ids: List[UUID], user_id: int) -> List[BulkResult]:
+        """Delete several workflows in n8n, then locally in one transaction.
+        
+        Returns one result per ID, in order. Workflows n8n failed to delete
+        are kept.
+        """
+        workflows, results = await self._load_many(workflow_ids, user_id)
+        
+        async def delete(workflow: Workflow) -> None:
+            if workflow.n8n_workflow_id:
+                await n8n_flight.do(
+                    flight_key("delete", workflow.n8n_workflow_id),
+                    lambda: self._delete_n8n_workflow(workflow.n8n_workflow_id)
+                )
+        
+        deleted = []
+        for workflow, _, error in await self._fan_out(workflows, delete):
+            results[workflow.id] = BulkResult(workflow.id, error is None, workflow, error=error)
+            if error is None:
+                deleted.append(workflow)
+        
+        try:
+            await self._delete_local(deleted)
+            await self.db.commit()
+        except Exception as e:
+            await self.db.rollback()
+            logger.error("Failed to delete workflows", error=str(e), user_id=user_id)
+            raise
+        
+        self._log_bulk("delete", user_id, results)
+        return [results[workflow_id] for workflow_id in workflow_ids]
+    
+    async def _set_active_many(self, workflow_ids: List[UUID], user_id: int, active: bool) -> List[BulkResult]:
+        """Switch several workflows on or off.
+        
+        Rows are loaded in one query, n8n is called with bounded
+        parallelism over the shared client, and the state changes of the
+        calls that succeeded are written in one statement and committed. Returns one
+        result per ID, in order.
+        """
+        operation = "activate" if active else "deactivate"
+        call = self.n8n.activate_workflow if active else self.n8n.deactivate_workflow
+        workflows, results = await self._load_many(workflow_ids, user_id)
+        
+        succeeded = []
+        for workflow, _, error in await self._fan_out(workflows, lambda workflow: n8n_flight.do(
+            flight_key(operation, workflow.n8n_workflow_id),
+            lambda: call(workflow.n8n_workflow_id)
+        )):
+            results[workflow.id] = BulkResult(workflow.id, error is None, workflow, error=error)
+            if error is None:
+                succeeded.append(workflow)
+        
+        try:
+            await self._set_active(succeeded, active)
+            await self.db.commit()
+        except Exception as e:
+            await self.db.rollback()
+            logger.error(f"Failed to {operation} workflows", error=str(e), user_id=user_id)
+            raise
+        
+        self._log_bulk(operation, user_id, results)
+        return [results[workflow_id] for workflow_id in workflow_ids]
+    
+    async def _set_active(self, workflows: List[Workflow], active: bool) -> int:
+        """Switch the rows' flag and adjust the owners' counters (does not commit).
+        
+        The conditional UPDATE only returns rows it actually flipped: a
+        concurrent toggle of the same row blocks on the row lock, then
+        matches nothing, so each change is counted exactly once. Returns
+        the number of rows changed.
+        """
+        if not workflows:
+            return 0
+        result = await self.db.execute(
+            update(Workflow)
+            .where(
+                Workflow.id.in_([workflow.id for workflow in workflows]),
+                Workflow.is_active.is_distinct_from(active)
+            )
+            .values(is_active=active)
+            .returning(Workflow.user_id)
+            .execution_options(synchronize_session=False)
+        )
+        changed = Counter(result.scalars().all())
+        for workflow in workflows:
+            set_committed_value(workflow, "is_active", active)
+        for owner_id, count in changed.items():
+            await StatsService(self.db).adjust(owner_id, active_workflows=count if active else -count)
+        return sum(changed.values())
+    
+    async def _load_many(
+        self,
+        workflow_ids: List[UUID],
+        user_id: int
+    ) -> Tuple[List[Workflow], Dict[UUID, BulkResult]]:
+        """The user's workflows among the IDs, and failed results for the others"""
+        found = await self.get_user_workflows(workflow_ids, user_id)
+        results = {
+            workflow_id: BulkResult(workflow_id, False, error="Workflow not found or access denied")
+            for workflow_id in workflow_ids
+            if workflow_id not in found
+        }
+        return list(found.values()), results
+    
+    async def _fan_out(
+        self,
+        workflows: List[Workflow],
+        call: Callable[[Workflow], Awaitable[Any]]
+    ) -> List[Tuple[Workflow, Any, Optional[str]]]:
+        """Run `call` for each workflow, at most `n8n_bulk_concurrency` at a time.
+        
+        Returns (workflow, output, error) triples; failures do not stop the others.
+        """
+        semaphore = asyncio.Semaphore(settings.n8n_bulk_concurrency)
+        
+        async def run(workflow: Workflow) -> Tuple[Workflow, Any, Optional[str]]:
+            async with semaphore:
+                try:
+                    return workflow, await call(workflow), None
+                except Exception as e:
+                    return workflow, None, str(e)
+        
+        return await asyncio.gather(*(run(workflow) for workflow in workflows))
+    
+    async def _delete_n8n_workflow(self, n8n_workflow_id: str) -> None:
+        """Delete in n8n; already gone counts as deleted."""
+        try:
+            await self.n8n.delete_workflow(n8n_workflow_id)
+        except ClientResponseError as e:
+            if e.status != 404:
+                raise
+    
+    async def _delete_local(self, workflows: List[Workflow]) -> None:
+        """Delete rows and adjust the owners' counters (does not commit)."""
+        deltas: Dict[int, List[int]] = {}
+        for workflow in workflows:
+            await self.db.delete(workflow)
+            counts = deltas.setdefault(workflow.user_id, [0, 0])
+            counts[0] -= 1
+            counts[1] -= 1 if workflow.is_active else 0
+        for owner_id, (count, active) in deltas.items():
+            await StatsService(self.db).adjust(owner_id, workflows=count, active_workflows=active)
+    
+    @staticmethod
+    def _log_bulk(operation: str, user_id: int, results: Dict[UUID, BulkResult]) -> None:
+        logger.info(
+            "Bulk workflow operation",
+            operation=operation,
+            user_id=user_id,
+            total=len(results),
+            failed=sum(not result.ok for result in results.values())
+        )
@@ -5,6 +5,7 @@ from typing import Dict, List, Optional
 from urllib.parse import urljoin
 
 from src.core.config import settings
+from src.core.metrics import http_trace_config
 
 class N8NClient:
     def __init__(self, base_url: str = None, api_key: str = None):
@@ -18,20 +19,48 @@ class N8NClient:
         self.api_key = api_key or settings.n8n_api_key
         self.session = None
     
+    async def start(self) -> "N8NClient":
+        """Open the pooled HTTP session.
+        
+        The connector keeps connections alive and caches DNS, so one client
+        is meant to live for the whole application and be shared by all
+        coroutines.
+        """
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=settings.n8n_pool_limit,
+                limit_per_host=settings.n8n_pool_limit_per_host,
+                keepalive_timeout=settings.n8n_keepalive_timeout,
+                ttl_dns_cache=settings.n8n_dns_cache_ttl,
+                use_dns_cache=True
+            )
+            self.session = aiohttp.ClientSession(
+                connector=connector,
+                trace_configs=[http_trace_config("n8n")],
+                timeout=aiohttp.ClientTimeout(
+                    total=settings.n8n_timeout,
+                    connect=settings.n8n_connect_timeout
+                ),
+                headers={
+                    "X-N8N-API-KEY": self.api_key,
+                    "Content-Type": "application/json"
+                }
+            )
+        return self
+    
+    async def close(self) -> None:
+        """Close the HTTP session and its connection pool."""
+        if self.session and not self.session.closed:
+            await self.session.close()
+        self.session = None
+    
     async def __aenter__(self):
         """Create aiohttp session on context enter."""
-        self.session = aiohttp.ClientSession(
-            headers={
-                "X-N8N-API-KEY": self.api_key,
-                "Content-Type": "application/json"
-            }
-        )
-        return self
+        return await self.start()
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """Close session on context exit."""
-        if self.session:
-            await self.session.close()
+        await self.close()
     
     def _url(self, path: str) -> str:
         """Build full URL for N8N API endpoint."""
@@ -43,6 +72,23 @@ class N8NClient:
             response.raise_for_status()
             return await response.json()
     
+    async def list_workflows_page(self, limit: int = 250, cursor: Optional[str] = None) -> Dict:
+        """Get one page of workflows.
+        
+        Args:
+            limit: Page size (n8n caps it at 250)
+            cursor: `nextCursor` of the previous page
+            
+        Returns:
+            Dict with `data` (workflows) and `nextCursor` (None on the last page)
+        """
+        params = {"limit": limit}
+        if cursor:
+            params["cursor"] = cursor
+        async with self.session.get(self._url("workflows"), params=params) as response:
+            response.raise_for_status()
+            return await response.json()
+    
     async def get_workflow(self, workflow_id: str) -> Dict:
         """Get workflow by ID."""
         async with self.session.get(self._url(f"workflows/{workflow_id}")) as response:
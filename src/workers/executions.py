@@ -0,0 +1,529 @@
+"""Background execution of n8n workflows with result callbacks.
+
+Handlers enqueue an execution job and answer at once; execution workers
+call n8n with bounded concurrency and edit the chat's status message with
+the outcome. Jobs live in a Redis Stream consumed by a consumer group;
+their status is kept in a Redis hash so users can check on long runs.
+
+Workers run inside the bot process (`execution_worker_embedded`) and/or
+as dedicated processes: `python -m src.workers.executions`. A single
+development process without Redis uses `LocalExecutionQueue` instead,
+which runs the jobs as tasks of the bot process.
+"""
+import asyncio
+import json
+import os
+import re
+import socket
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest
+import redis.asyncio as redis
+from redis.exceptions import RedisError, ResponseError
+import structlog
+
+from src.bot.utils.workflow_keyboards import job_status_keyboard
+from src.core.cache.redis_client import get_redis
+from src.core.config import settings
+from src.core.database.connection import get_async_db
+from src.core.metrics import EXECUTION_JOB_LATENCY, EXECUTION_JOBS
+from src.core.services.workflow_service import WorkflowService
+from src.integrations.n8n.client import N8NClient
+
+logger = structlog.get_logger()
+
+STREAM = "linklet:executions"
+GROUP = "linklet-executors"
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+# Telegram messages are capped at 4096 characters
+MAX_RESULT_CHARS = 3000
+STREAM_MAXLEN = 100000
+# Jobs whose status LocalExecutionQueue remembers
+LOCAL_MAX_JOBS = 1000
+
+@dataclass
+class ExecutionJob:
+    id: str
+    workflow_id: str
+    workflow_name: str
+    user_id: int                    # users.id (not the Telegram ID)
+    chat_id: int
+    message_id: Optional[int] = None
+    data: Optional[Dict[str, Any]] = None
+    status: str = QUEUED
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Optional[str] = None
+    error: Optional[str] = None
+
+    @classmethod
+    def new(
+        cls,
+        workflow_id: str,
+        workflow_name: str,
+        user_id: int,
+        chat_id: int,
+        message_id: Optional[int] = None,
+        data: Optional[Dict[str, Any]] = None
+    ) -> "ExecutionJob":
+        """A queued job with a fresh ID"""
+        return cls(
+            id=uuid.uuid4().hex[:12],
+            workflow_id=str(workflow_id),
+            workflow_name=workflow_name,
+            user_id=user_id,
+            chat_id=chat_id,
+            message_id=message_id,
+            data=data
+        )
+
+    def to_redis(self) -> Dict[str, str]:
+        """Hash fields; None values are omitted"""
+        return {
+            key: json.dumps(value) if key == "data" else str(value)
+            for key, value in asdict(self).items()
+            if value is not None
+        }
+
+    @classmethod
+    def from_redis(cls, fields: Dict[str, str]) -> "ExecutionJob":
+        def number(key, cast):
+            return cast(fields[key]) if key in fields else None
+
+        return cls(
+            id=fields["id"],
+            workflow_id=fields["workflow_id"],
+            workflow_name=fields.get("workflow_name", ""),
+            user_id=int(fields["user_id"]),
+            chat_id=int(fields["chat_id"]),
+            message_id=number("message_id", int),
+            data=json.loads(fields["data"]) if "data" in fields else None,
+            status=fields.get("status", QUEUED),
+            created_at=float(fields["created_at"]),
+            started_at=number("started_at", float),
+            finished_at=number("finished_at", float),
+            result=fields.get("result"),
+            error=fields.get("error")
+        )
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (SUCCEEDED, FAILED)
+
+    def describe(self, markdown: bool = True) -> str:
+        """User-facing status text
+
+        Args:
+            markdown: Escape the workflow name, output and error for
+                Telegram's Markdown parse mode
+        """
+        name = _escape_markdown(self.workflow_name) if markdown else self.workflow_name
+        if self.status == QUEUED:
+            return f"⏳ Exécution de « {name} » en file d'attente…\n\nJob : `{self.id}`"
+        if self.status == RUNNING:
+            elapsed = time.time() - (self.started_at or self.created_at)
+            return (
+                f"⚙️ Exécution de « {name} » en cours ({elapsed:.0f}s)…\n\n"
+                f"Job : `{self.id}`"
+            )
+        duration = (self.finished_at or time.time()) - (self.started_at or self.created_at)
+        if self.status == SUCCEEDED:
+            text = f"✅ Workflow « {name} » exécuté en {duration:.1f}s"
+            if self.result:
+                # In a pre block only a backtick is special, and it cannot be escaped
+                result = self.result.replace("`", "'") if markdown else self.result
+                text += f"\n\n```\n{result}\n```"
+            return text
+        error = _escape_markdown(self.error or "") if markdown else self.error
+        return f"❌ Échec de l'exécution de « {name} » : {error}"
+
+def _escape_markdown(text: str) -> str:
+    """Escape the characters Telegram's (legacy) Markdown would interpret"""
+    return re.sub(r"([_*`\[])", r"\\\1", text)
+
+class ExecutionQueue:
+    """Enqueue jobs and query their status"""
+
+    def __init__(self, client: Optional[redis.Redis] = None, job_ttl: Optional[int] = None):
+        self._client = client
+        self.job_ttl = job_ttl or settings.execution_job_ttl
+
+    @property
+    def client(self) -> redis.Redis:
+        return self._client or get_redis()
+
+    @staticmethod
+    def _job_key(job_id: str) -> str:
+        return f"{STREAM}:job:{job_id}"
+
+    @staticmethod
+    def _user_key(user_id: int) -> str:
+        return f"{STREAM}:user:{user_id}"
+
+    async def enqueue(
+        self,
+        workflow_id: str,
+        workflow_name: str,
+        user_id: int,
+        chat_id: int,
+        message_id: Optional[int] = None,
+        data: Optional[Dict[str, Any]] = None
+    ) -> ExecutionJob:
+        """Record a queued job and hand it to the workers
+
+        Args:
+            message_id: Chat message the worker edits with the outcome
+        """
+        job = ExecutionJob.new(workflow_id, workflow_name, user_id, chat_id, message_id, data)
+        await self._push([job])
+        return job
+
+    async def enqueue_many(
+        self,
+        workflows: List[Tuple[str, str]],
+        user_id: int,
+        chat_id: int
+    ) -> List[ExecutionJob]:
+        """Queue one job per (workflow_id, workflow_name), in one round trip"""
+        jobs = [
+            ExecutionJob.new(workflow_id, workflow_name, user_id, chat_id)
+            for workflow_id, workflow_name in workflows
+        ]
+        if jobs:
+            await self._push(jobs)
+        return jobs
+
+    async def _push(self, jobs: List[ExecutionJob]) -> None:
+        async with self.client.pipeline(transaction=True) as pipe:
+            for job in jobs:
+                pipe.hset(self._job_key(job.id), mapping=job.to_redis())
+                pipe.expire(self._job_key(job.id), self.job_ttl)
+                pipe.zadd(self._user_key(job.user_id), {job.id: job.created_at})
+                pipe.xadd(STREAM, {"job_id": job.id}, maxlen=STREAM_MAXLEN, approximate=True)
+            for user_id in {job.user_id for job in jobs}:
+                pipe.zremrangebyrank(self._user_key(user_id), 0, -51)
+                pipe.expire(self._user_key(user_id), self.job_ttl)
+            await pipe.execute()
+        EXECUTION_JOBS.labels(QUEUED).inc(len(jobs))
+
+    async def attach_message(self, job_id: str, message_id: int) -> None:
+        """Set the status message once it has been sent"""
+        await self.client.hset(self._job_key(job_id), "message_id", message_id)
+
+    async def get(self, job_id: str) -> Optional[ExecutionJob]:
+        fields = await self.client.hgetall(self._job_key(job_id))
+        return ExecutionJob.from_redis(fields) if fields else None
+
+    async def update(self, job: ExecutionJob) -> None:
+        await self.client.hset(self._job_key(job.id), mapping=job.to_redis())
+
+    async def list_for_user(self, user_id: int, limit: int = 10) -> List[ExecutionJob]:
+        """Most recent jobs of a user, newest first"""
+        job_ids = await self.client.zrevrange(self._user_key(user_id), 0, limit - 1)
+        jobs = []
+        for job_id in job_ids:
+            job = await self.get(job_id)
+            if job:
+                jobs.append(job)
+        return jobs
+
+class ExecutionWorker:
+    """Consumes execution jobs with at most `concurrency` n8n calls in flight.
+
+    Jobs are acknowledged once their outcome is recorded. Jobs left pending
+    by a dead worker for longer than `claim_idle` seconds are claimed and
+    run again, so `claim_idle` must exceed the n8n request timeout.
+    """
+
+    def __init__(
+        self,
+        bot: Bot,
+        n8n: N8NClient,
+        queue: Optional[ExecutionQueue] = None,
+        concurrency: Optional[int] = None,
+        claim_idle: Optional[float] = None
+    ):
+        self.bot = bot
+        self.n8n = n8n
+        self.queue = queue or ExecutionQueue()
+        self.concurrency = concurrency or settings.execution_worker_concurrency
+        self.claim_idle = claim_idle or settings.execution_claim_idle
+        self.name = f"{socket.gethostname()}-{os.getpid()}"
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._running: Set[asyncio.Task] = set()
+        self._entries: Set[str] = set()
+        self._stopping = asyncio.Event()
+
+    @property
+    def client(self) -> redis.Redis:
+        return self.queue.client
+
+    def stop(self) -> None:
+        self._stopping.set()
+
+    async def run(self) -> None:
+        """Consume until stop(); in-flight jobs are allowed to finish"""
+        try:
+            await self.client.xgroup_create(STREAM, GROUP, id="0", mkstream=True)
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+        logger.info("Execution worker started", worker=self.name, concurrency=self.concurrency)
+        next_claim = 0.0
+        while not self._stopping.is_set():
+            try:
+                # Wait for a free slot before taking a job off the stream
+                await self._semaphore.acquire()
+                self._semaphore.release()
+
+                entries = []
+                if time.monotonic() >= next_claim:
+                    next_claim = time.monotonic() + self.claim_idle / 2
+                    _, entries, *_ = await self.client.xautoclaim(
+                        STREAM, GROUP, self.name, min_idle_time=int(self.claim_idle * 1000),
+                        start_id="0-0", count=self.concurrency
+                    )
+                if not entries:
+                    response = await self.client.xreadgroup(
+                        GROUP, self.name, {STREAM: ">"}, count=self._free_slots(), block=1000
+                    )
+                    entries = [entry for _, stream_entries in response for entry in stream_entries]
+
+                for entry_id, fields in entries:
+                    if entry_id in self._entries:
+                        # Our own long-running job came back through the claim
+                        continue
+                    await self._semaphore.acquire()
+                    self._entries.add(entry_id)
+                    task = asyncio.create_task(self._run_job(entry_id, fields))
+                    self._running.add(task)
+                    task.add_done_callback(self._running.discard)
+            except RedisError as e:
+                logger.error("Execution queue read failed", error=str(e))
+                await asyncio.sleep(1)
+
+        if self._running:
+            await asyncio.gather(*self._running, return_exceptions=True)
+        logger.info("Execution worker stopped", worker=self.name)
+
+    def _free_slots(self) -> int:
+        return max(1, self.concurrency - len(self._running))
+
+    async def _run_job(self, entry_id: str, fields: Optional[Dict[str, str]]) -> None:
+        try:
+            job = await self.queue.get(fields["job_id"]) if fields else None
+            if job is None:
+                # Trimmed entry or expired job: nothing left to do
+                await self.client.xack(STREAM, GROUP, entry_id)
+                return
+            if job.status == RUNNING and time.time() - job.started_at < self.claim_idle:
+                # Still being run by a live worker
+                return
+            if not job.finished:
+                await self._execute(job)
+            await self.client.xack(STREAM, GROUP, entry_id)
+        except Exception as e:
+            # Left pending: another worker claims it after claim_idle
+            logger.error("Execution job crashed", entry_id=entry_id, error=str(e))
+        finally:
+            self._entries.discard(entry_id)
+            self._semaphore.release()
+
+    async def _execute(self, job: ExecutionJob) -> None:
+        job.status = RUNNING
+        job.started_at = time.time()
+        await self.queue.update(job)
+        await self._notify(job)
+
+        try:
+            async with get_async_db() as db:
+                service = WorkflowService(db, self.n8n)
+                result = await service.execute_workflow(uuid.UUID(job.workflow_id), job.user_id, job.data)
+            job.status = SUCCEEDED
+            job.result = json.dumps(result, ensure_ascii=False, default=str)[:MAX_RESULT_CHARS]
+        except Exception as e:
+            job.status = FAILED
+            job.error = str(e)
+            logger.warning("Workflow execution failed", job_id=job.id, workflow_id=job.workflow_id, error=str(e))
+
+        job.finished_at = time.time()
+        await self.queue.update(job)
+        EXECUTION_JOBS.labels(job.status).inc()
+        EXECUTION_JOB_LATENCY.labels(job.status).observe(job.finished_at - job.created_at)
+        await self._notify(job)
+
+    async def _notify(self, job: ExecutionJob) -> None:
+        """Edit the job's status message (or send one) with its current state"""
+        try:
+            if not job.message_id:
+                # The handler attaches the message right after enqueueing
+                stored = await self.queue.get(job.id)
+                job.message_id = stored.message_id if stored else None
+            try:
+                await self._show(job, markdown=True)
+            except TelegramBadRequest as e:
+                if "message is not modified" in str(e):
+                    return
+                # Rejected despite the escaping: show the same state as plain text
+                try:
+                    await self._show(job, markdown=False)
+                except TelegramBadRequest:
+                    if not job.finished:
+                        raise
+                    # Status message gone: the outcome still has to reach the user
+                    await self.bot.send_message(job.chat_id, job.describe(markdown=False))
+        except Exception as e:
+            logger.warning("Could not report execution result", job_id=job.id, error=str(e))
+
+    async def _show(self, job: ExecutionJob, markdown: bool) -> None:
+        parse_mode = "Markdown" if markdown else None
+        if job.message_id:
+            await self.bot.edit_message_text(
+                job.describe(markdown),
+                chat_id=job.chat_id,
+                message_id=job.message_id,
+                parse_mode=parse_mode,
+                reply_markup=None if job.finished else job_status_keyboard(job.id)
+            )
+        elif job.finished:
+            await self.bot.send_message(job.chat_id, job.describe(markdown), parse_mode=parse_mode)
+
+class LocalExecutionQueue:
+    """In-process stand-in for ExecutionQueue when Redis is not used.
+
+    Jobs run as tasks of the bot process, at most
+    `execution_worker_concurrency` at a time. Their status is kept in
+    memory (the last `max_jobs` jobs) and is lost on restart.
+    """
+
+    def __init__(self, concurrency: Optional[int] = None, max_jobs: int = LOCAL_MAX_JOBS):
+        self.max_jobs = max_jobs
+        self._semaphore = asyncio.Semaphore(concurrency or settings.execution_worker_concurrency)
+        self._jobs: "OrderedDict[str, ExecutionJob]" = OrderedDict()
+        self._running: Set[asyncio.Task] = set()
+        self._worker: Optional[ExecutionWorker] = None
+
+    def start(self, bot: Bot, n8n: N8NClient) -> None:
+        """Run jobs with this bot and n8n client"""
+        self._worker = ExecutionWorker(bot, n8n, queue=self)
+
+    async def close(self) -> None:
+        """Let in-flight jobs finish"""
+        if self._running:
+            await asyncio.gather(*self._running, return_exceptions=True)
+
+    async def enqueue(
+        self,
+        workflow_id: str,
+        workflow_name: str,
+        user_id: int,
+        chat_id: int,
+        message_id: Optional[int] = None,
+        data: Optional[Dict[str, Any]] = None
+    ) -> ExecutionJob:
+        """Record a queued job and start it as soon as a slot is free"""
+        job = ExecutionJob.new(workflow_id, workflow_name, user_id, chat_id, message_id, data)
+        self._push(job)
+        return job
+
+    async def enqueue_many(
+        self,
+        workflows: List[Tuple[str, str]],
+        user_id: int,
+        chat_id: int
+    ) -> List[ExecutionJob]:
+        """Queue one job per (workflow_id, workflow_name)"""
+        jobs = [
+            ExecutionJob.new(workflow_id, workflow_name, user_id, chat_id)
+            for workflow_id, workflow_name in workflows
+        ]
+        for job in jobs:
+            self._push(job)
+        return jobs
+
+    def _push(self, job: ExecutionJob) -> None:
+        if self._worker is None:
+            raise RuntimeError("Execution queue not started")
+        self._jobs[job.id] = job
+        while len(self._jobs) > self.max_jobs:
+            self._jobs.popitem(last=False)
+        EXECUTION_JOBS.labels(QUEUED).inc()
+
+        task = asyncio.create_task(self._run(job))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _run(self, job: ExecutionJob) -> None:
+        async with self._semaphore:
+            try:
+                await self._worker._execute(job)
+            except Exception as e:
+                logger.error("Execution job crashed", job_id=job.id, error=str(e))
+
+    async def attach_message(self, job_id: str, message_id: int) -> None:
+        job = self._jobs.get(job_id)
+        if job:
+            job.message_id = message_id
+
+    async def get(self, job_id: str) -> Optional[ExecutionJob]:
+        return self._jobs.get(job_id)
+
+    async def update(self, job: ExecutionJob) -> None:
+        # Jobs are shared objects: only keep the record if it was not evicted
+        if job.id in self._jobs:
+            self._jobs[job.id] = job
+
+    async def list_for_user(self, user_id: int, limit: int = 10) -> List[ExecutionJob]:
+        """Most recent jobs of a user, newest first"""
+        jobs = [job for job in reversed(self._jobs.values()) if job.user_id == user_id]
+        return jobs[:limit]
+
+def create_execution_queue() -> Union[ExecutionQueue, LocalExecutionQueue]:
+    """Build the queue selected by `execution_backend`"""
+    backend = settings.execution_backend
+    if backend is None:
+        # Same rule as the FSM storage in create_bot
+        shared = (settings.environment == "production" or settings.web_workers != 1
+                  or settings.update_queue_enabled)
+        backend = "redis" if shared else "memory"
+
+    if backend == "redis":
+        return ExecutionQueue()
+    return LocalExecutionQueue()
+
+execution_queue = create_execution_queue()
+
+async def run_execution_workers() -> None:
+    """Dedicated worker process: a bot for callbacks and a shared n8n client"""
+    import signal
+    from prometheus_client import start_http_server
+
+    bot = Bot(token=settings.telegram_bot_token)
+    n8n = await N8NClient().start()
+    worker = ExecutionWorker(bot, n8n)
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, worker.stop)
+    if settings.metrics_enabled:
+        start_http_server(settings.execution_worker_metrics_port)
+
+    try:
+        await worker.run()
+    finally:
+        await n8n.close()
+        await bot.session.close()
+
+if __name__ == "__main__":
+    asyncio.run(run_execution_workers())
@@ -0,0 +1,250 @@
+"""Background reconciliation of local `Workflow` rows with n8n.
+
+Workflows can be switched on and off, renamed or deleted directly in n8n.
+Each pass pages through the n8n workflow list (`reconcile_page_size` per
+request) and writes every page's changes to Postgres in one
+`UPDATE ... FROM (VALUES ...)` statement keyed by `n8n_workflow_id`, which
+also keeps the `user_stats` active counters in step.
+
+Incremental passes only send workflows whose `updatedAt` is newer than the
+watermark stored in Redis by the previous complete pass; every
+`reconcile_full_every` passes all of them are sent, repairing local drift.
+Local rows whose workflow no longer exists in n8n are deactivated at the
+end of a complete pass. A Redis lock keeps concurrent instances from
+reconciling at the same time.
+
+Run with `python -m src.workers.reconciler`.
+"""
+import asyncio
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import redis.asyncio as redis
+from sqlalchemy import Boolean, String, all_, bindparam, column, or_, select, update, values
+from sqlalchemy.dialects.postgresql import ARRAY
+import structlog
+
+from src.core.cache.redis_client import get_redis
+from src.core.config import settings
+from src.core.database.connection import get_async_db
+from src.core.database.models import Workflow
+from src.core.metrics import RECONCILED_WORKFLOWS
+from src.core.services.stats_service import StatsService
+from src.integrations.n8n.client import N8NClient
+
+logger = structlog.get_logger()
+
+WATERMARK_KEY = "linklet:reconcile:watermark"
+LOCK_KEY = "linklet:reconcile:lock"
+LOCK_TTL = 600
+# Margin for clock skew between this host and n8n
+CLOCK_SKEW = timedelta(minutes=1)
+
+def _parse_time(value: Optional[str]) -> Optional[datetime]:
+    """n8n timestamp (ISO 8601, usually with a trailing Z) as naive UTC"""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+class WorkflowReconciler:
+    """Mirrors n8n's workflow state into the `workflows` table"""
+
+    def __init__(
+        self,
+        n8n: N8NClient,
+        client: Optional[redis.Redis] = None,
+        interval: Optional[float] = None,
+        page_size: Optional[int] = None,
+        full_every: Optional[int] = None
+    ):
+        self.n8n = n8n
+        self._client = client
+        self.interval = interval or settings.reconcile_interval
+        self.page_size = page_size or settings.reconcile_page_size
+        self.full_every = max(1, full_every or settings.reconcile_full_every)
+        self._passes = 0
+        self._stopping = asyncio.Event()
+
+    @property
+    def client(self) -> redis.Redis:
+        return self._client or get_redis()
+
+    def stop(self) -> None:
+        self._stopping.set()
+
+    async def run(self) -> None:
+        logger.info("Workflow reconciler started", interval=self.interval)
+        while not self._stopping.is_set():
+            try:
+                await self.reconcile(full=self._passes % self.full_every == 0)
+                self._passes += 1
+            except Exception as e:
+                logger.error("Reconciliation pass failed", error=str(e))
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+        logger.info("Workflow reconciler stopped")
+
+    async def reconcile(self, full: bool = False) -> Optional[Dict[str, int]]:
+        """Run one pass; None if another instance holds the lock"""
+        lock = self.client.lock(LOCK_KEY, timeout=LOCK_TTL)
+        if not await lock.acquire(blocking=False):
+            logger.info("Reconciliation already running elsewhere")
+            return None
+        try:
+            return await self._reconcile(lock, full)
+        finally:
+            try:
+                await lock.release()
+            except Exception:
+                # Expired during a very long pass: nothing left to release
+                pass
+
+    async def _reconcile(self, lock, full: bool) -> Dict[str, int]:
+        started = datetime.utcnow()
+        watermark = None if full else _parse_time(await self.client.get(WATERMARK_KEY))
+        seen: Set[str] = set()
+        counts = {"pages": 0, "fetched": 0, "sent": 0, "updated": 0, "orphaned": 0}
+
+        cursor = None
+        while True:
+            page = await self.n8n.list_workflows_page(limit=self.page_size, cursor=cursor)
+            items = page.get("data") or []
+            changes = []
+            for item in items:
+                n8n_id = str(item["id"])
+                seen.add(n8n_id)
+                updated_at = _parse_time(item.get("updatedAt"))
+                if watermark is None or updated_at is None or updated_at > watermark:
+                    changes.append((n8n_id, item.get("name") or n8n_id, bool(item.get("active"))))
+
+            counts["pages"] += 1
+            counts["fetched"] += len(items)
+            counts["sent"] += len(changes)
+            if changes:
+                counts["updated"] += await self._apply(changes)
+            await lock.reacquire()
+
+            cursor = page.get("nextCursor")
+            if not cursor or self._stopping.is_set():
+                break
+
+        if cursor:
+            # Interrupted: the pass is incomplete, so keep the old watermark
+            logger.info("Reconciliation interrupted", **counts)
+            return counts
+
+        # An empty listing is more likely a misconfigured API key than a wipe
+        if seen:
+            counts["orphaned"] = await self._deactivate_missing(seen)
+        # Anything changed after the pass started is resent next time
+        await self.client.set(WATERMARK_KEY, (started - CLOCK_SKEW).isoformat())
+
+        logger.info("Workflows reconciled", full=full, **counts)
+        return counts
+
+    async def _apply(self, changes: List[Tuple[str, str, bool]]) -> int:
+        """Write one page of n8n state; returns the number of rows changed
+
+        The page's rows are locked first, so the previous `is_active` the
+        counter deltas are computed from is the latest committed value, not
+        the statement snapshot a concurrent (de)activation may have raced.
+        """
+        remote = values(
+            column("n8n_workflow_id", String),
+            column("name", String),
+            column("is_active", Boolean),
+            name="remote"
+        ).data(changes)
+        async with get_async_db() as db:
+            locked = await db.execute(
+                select(Workflow.id, Workflow.is_active)
+                .where(Workflow.n8n_workflow_id.in_([n8n_id for n8n_id, _, _ in changes]))
+                # Stable lock order, so two writers locking overlapping pages cannot deadlock
+                .order_by(Workflow.id)
+                .with_for_update()
+            )
+            was_active = {workflow_id: bool(is_active) for workflow_id, is_active in locked.all()}
+            result = await db.execute(
+                update(Workflow)
+                .where(
+                    Workflow.n8n_workflow_id == remote.c.n8n_workflow_id,
+                    or_(
+                        Workflow.name.is_distinct_from(remote.c.name),
+                        Workflow.is_active.is_distinct_from(remote.c.is_active)
+                    )
+                )
+                .values(name=remote.c.name, is_active=remote.c.is_active)
+                .returning(Workflow.id, Workflow.user_id, Workflow.is_active)
+                .execution_options(synchronize_session=False)
+            )
+            rows = result.all()
+            await StatsService(db).adjust_many("active_workflows_count", self._active_deltas(
+                (user_id, was_active.get(workflow_id, False), is_active)
+                for workflow_id, user_id, is_active in rows
+            ))
+        RECONCILED_WORKFLOWS.labels("updated").inc(len(rows))
+        return len(rows)
+
+    async def _deactivate_missing(self, seen: Set[str]) -> int:
+        """Deactivate active local rows whose workflow is gone from n8n"""
+        async with get_async_db() as db:
+            result = await db.execute(
+                update(Workflow)
+                .where(
+                    Workflow.is_active.is_(True),
+                    Workflow.n8n_workflow_id.isnot(None),
+                    # One array parameter, however many workflows n8n has
+                    Workflow.n8n_workflow_id != all_(
+                        bindparam("seen", sorted(seen), type_=ARRAY(String))
+                    )
+                )
+                .values(is_active=False)
+                .returning(Workflow.user_id)
+                .execution_options(synchronize_session=False)
+            )
+            user_ids = result.scalars().all()
+            await StatsService(db).adjust_many("active_workflows_count", self._active_deltas(
+                (user_id, True, False) for user_id in user_ids
+            ))
+        if user_ids:
+            logger.warning("Deactivated workflows missing from n8n", count=len(user_ids))
+        RECONCILED_WORKFLOWS.labels("orphaned").inc(len(user_ids))
+        return len(user_ids)
+
+    @staticmethod
+    def _active_deltas(rows: Iterable[Tuple[int, bool, bool]]) -> Dict[int, int]:
+        deltas: Dict[int, int] = defaultdict(int)
+        for user_id, was_active, is_active in rows:
+            if was_active != is_active:
+                deltas[user_id] += 1 if is_active else -1
+        return deltas
+
+async def run_reconciler() -> None:
+    """Dedicated reconciler process"""
+    import signal
+    from prometheus_client import start_http_server
+
+    n8n = await N8NClient().start()
+    reconciler = WorkflowReconciler(n8n)
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, reconciler.stop)
+    if settings.metrics_enabled:
+        start_http_server(settings.reconcile_metrics_port)
+
+    try:
+        await reconciler.run()
+    finally:
+        await n8n.close()
+
+if __name__ == "__main__":
+    asyncio.run(run_reconciler())
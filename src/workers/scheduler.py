@@ -0,0 +1,288 @@
+"""Reminder scheduler for `Task.scheduled_at` / `Task.recurrence_rule`.
+
+Each instance keeps the tasks due within the next `scheduler_window`
+seconds in a min-heap, refilled from Postgres every
+`scheduler_refill_interval` seconds in keyset-paginated slices of the
+pending-by-`scheduled_at` index. Due tasks are claimed in batches with
+`SELECT ... FOR UPDATE SKIP LOCKED`, so several instances can run side by
+side without sending a reminder twice: whichever instance locks a task
+first advances it and commits, the others skip it. Reminders are sent
+after the claim commits; a task whose reminder failed is put back and
+retried after `scheduler_retry_delay` seconds.
+
+Times are naive UTC, like the rest of the schema.
+
+Run with `python -m src.workers.scheduler`.
+"""
+import asyncio
+import heapq
+import time
+from datetime import datetime, timedelta
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+from aiogram import Bot
+from aiogram.exceptions import TelegramForbiddenError, TelegramBadRequest
+from sqlalchemy import select, tuple_, update
+import structlog
+
+from src.core.config import settings
+from src.core.database.connection import get_async_db
+from src.core.database.models import Task, User
+from src.core.metrics import REMINDER_DELAY, REMINDERS_SENT
+from src.core.services.recurrence import next_occurrence
+
+logger = structlog.get_logger()
+
+@dataclass
+class _Claim:
+    """What a claimed task needs for sending, detached from the session"""
+    id: UUID
+    chat_id: int
+    title: str
+    description: Optional[str]
+    scheduled_at: datetime              # Before the claim advanced it
+    following: Optional[datetime]       # Next occurrence, None for one-off tasks
+
+class TaskScheduler:
+    """Fires task reminders from a near-term in-memory window"""
+
+    def __init__(
+        self,
+        bot: Bot,
+        window: Optional[float] = None,
+        refill_interval: Optional[float] = None,
+        slice_size: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        send_concurrency: Optional[int] = None,
+        retry_delay: Optional[float] = None
+    ):
+        self.bot = bot
+        self.window = timedelta(seconds=window or settings.scheduler_window)
+        self.refill_interval = refill_interval or settings.scheduler_refill_interval
+        self.slice_size = slice_size or settings.scheduler_slice_size
+        self.batch_size = batch_size or settings.scheduler_batch_size
+        self.retry_delay = timedelta(seconds=retry_delay or settings.scheduler_retry_delay)
+        self._send_semaphore = asyncio.Semaphore(send_concurrency or settings.scheduler_send_concurrency)
+        # (fire at, task id, scheduled_at it was queued for); entries whose
+        # scheduled_at no longer matches `_queued` are stale and skipped
+        self._heap: List[Tuple[datetime, UUID, datetime]] = []
+        self._queued: Dict[UUID, datetime] = {}
+        self._horizon = datetime.min
+        self._next_refill = 0.0
+        self._stopping = asyncio.Event()
+
+    def stop(self) -> None:
+        self._stopping.set()
+
+    async def run(self) -> None:
+        logger.info("Task scheduler started", window=self.window.total_seconds())
+        while not self._stopping.is_set():
+            try:
+                if time.monotonic() >= self._next_refill:
+                    await self.refill()
+                    self._next_refill = time.monotonic() + self.refill_interval
+
+                due = self._pop_due(datetime.utcnow())
+                if due:
+                    await self.fire(due)
+                    continue
+            except Exception as e:
+                logger.error("Scheduler iteration failed", error=str(e))
+
+            # Sleep until the next due task or refill, whichever comes first
+            delay = self._next_refill - time.monotonic()
+            if self._heap:
+                delay = min(delay, (self._heap[0][0] - datetime.utcnow()).total_seconds())
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=max(0.05, delay))
+            except asyncio.TimeoutError:
+                pass
+        logger.info("Task scheduler stopped")
+
+    def _push(self, task_id: UUID, scheduled_at: datetime, fire_at: Optional[datetime] = None) -> None:
+        """Queue a task for `scheduled_at`, replacing any entry it already has"""
+        self._queued[task_id] = scheduled_at
+        heapq.heappush(self._heap, (fire_at or scheduled_at, task_id, scheduled_at))
+
+    def _pop_due(self, now: datetime) -> List[UUID]:
+        due = []
+        while self._heap and self._heap[0][0] <= now and len(due) < self.batch_size:
+            _, task_id, scheduled_at = heapq.heappop(self._heap)
+            if self._queued.get(task_id) != scheduled_at:
+                continue
+            del self._queued[task_id]
+            due.append(task_id)
+        return due
+
+    async def refill(self) -> None:
+        """Queue every pending task due before now + window not queued for that time yet
+
+        The whole range is rescanned so tasks created or rescheduled inside
+        the current window (earlier or later), and overdue ones, are picked
+        up too.
+        """
+        horizon = datetime.utcnow() + self.window
+        cursor: Optional[Tuple[datetime, UUID]] = None
+        loaded = 0
+        async with get_async_db() as db:
+            while True:
+                query = (
+                    select(Task.scheduled_at, Task.id)
+                    .where(
+                        Task.completed_at.is_(None),
+                        Task.reminder_sent_at.is_(None),
+                        Task.scheduled_at < horizon
+                    )
+                    .order_by(Task.scheduled_at, Task.id)
+                    .limit(self.slice_size)
+                )
+                if cursor:
+                    query = query.where(tuple_(Task.scheduled_at, Task.id) > cursor)
+                rows = (await db.execute(query)).all()
+                for scheduled_at, task_id in rows:
+                    if self._queued.get(task_id) != scheduled_at:
+                        self._push(task_id, scheduled_at)
+                        loaded += 1
+                if len(rows) < self.slice_size:
+                    break
+                cursor = tuple(rows[-1])
+        self._horizon = horizon
+        if loaded:
+            logger.info("Scheduler window refilled", loaded=loaded, queued=len(self._heap))
+
+    async def fire(self, task_ids: List[UUID]) -> None:
+        """Claim due tasks, send their reminders and re-arm failed ones
+
+        Claiming advances each task (next occurrence, or `reminder_sent_at`)
+        in a short transaction committed before any message is sent, so no
+        row lock or pooled connection is held across Telegram calls.
+        """
+        now = datetime.utcnow()
+        claims = await self._claim(task_ids, now)
+        # Tasks missing here were completed, moved, or claimed elsewhere
+        outcomes = await asyncio.gather(*(self._send(claim) for claim in claims))
+
+        failed = []
+        for claim, delivered in zip(claims, outcomes):
+            if delivered is None:
+                failed.append(claim)
+                continue
+            REMINDER_DELAY.observe(max(0.0, (now - claim.scheduled_at).total_seconds()))
+            following = claim.following
+            if following is not None and following < self._horizon and claim.id not in self._queued:
+                self._push(claim.id, following)
+        if failed:
+            retry_at = datetime.utcnow() + self.retry_delay
+            for claim in await self._rearm(failed, now):
+                self._push(claim.id, claim.scheduled_at, fire_at=retry_at)
+
+        logger.info("Reminders dispatched", due=len(task_ids), claimed=len(claims), failed=len(failed))
+
+    async def _claim(self, task_ids: List[UUID], now: datetime) -> List[_Claim]:
+        """Lock the due tasks, advance them and commit"""
+        async with get_async_db() as db:
+            result = await db.execute(
+                select(Task, User.telegram_id)
+                .join(User, User.id == Task.user_id)
+                .where(
+                    Task.id.in_(task_ids),
+                    Task.completed_at.is_(None),
+                    Task.reminder_sent_at.is_(None),
+                    Task.scheduled_at <= now
+                )
+                .with_for_update(of=Task, skip_locked=True)
+            )
+            claims = []
+            for task, telegram_id in result.all():
+                following = next_occurrence(task.recurrence_rule, task.scheduled_at, now)
+                claims.append(_Claim(
+                    id=task.id,
+                    chat_id=telegram_id,
+                    title=task.title,
+                    description=task.description,
+                    scheduled_at=task.scheduled_at,
+                    following=following
+                ))
+                if following is None:
+                    task.reminder_sent_at = now
+                else:
+                    task.scheduled_at = following
+            # Flushed as one batch and committed on exit, releasing the locks
+        return claims
+
+    async def _rearm(self, claims: List[_Claim], now: datetime) -> List[_Claim]:
+        """Put tasks whose reminder could not be sent back as due
+
+        Only tasks still in the state the claim left them in are touched, so
+        edits made in the meantime win (the next refill queues those).
+
+        Returns:
+            The claims put back, for the caller to retry
+        """
+        rearmed = []
+        async with get_async_db() as db:
+            for claim in claims:
+                if claim.following is None:
+                    query = (
+                        update(Task)
+                        .where(Task.id == claim.id, Task.reminder_sent_at == now)
+                        .values(reminder_sent_at=None)
+                    )
+                else:
+                    query = (
+                        update(Task)
+                        .where(Task.id == claim.id, Task.scheduled_at == claim.following)
+                        .values(scheduled_at=claim.scheduled_at)
+                    )
+                result = await db.execute(query.execution_options(synchronize_session=False))
+                if result.rowcount:
+                    rearmed.append(claim)
+        return rearmed
+
+    async def _send(self, claim: _Claim) -> Optional[bool]:
+        """Send one reminder
+
+        Returns:
+            True if sent, False if it can never be delivered, None to retry later
+        """
+        # Plain text: titles are user input, not Markdown
+        text = f"⏰ Rappel : {claim.title}"
+        if claim.description:
+            text += f"\n\n{claim.description}"
+        async with self._send_semaphore:
+            try:
+                await self.bot.send_message(claim.chat_id, text)
+                REMINDERS_SENT.labels("sent").inc()
+                return True
+            except (TelegramForbiddenError, TelegramBadRequest) as e:
+                # Bot blocked or chat gone: retrying will not help
+                logger.warning("Reminder dropped", task_id=str(claim.id), error=str(e))
+                REMINDERS_SENT.labels("dropped").inc()
+                return False
+            except Exception as e:
+                logger.warning("Reminder failed", task_id=str(claim.id), error=str(e))
+                REMINDERS_SENT.labels("failed").inc()
+                return None
+
+async def run_scheduler() -> None:
+    """Dedicated scheduler process"""
+    import signal
+    from prometheus_client import start_http_server
+
+    bot = Bot(token=settings.telegram_bot_token)
+    scheduler = TaskScheduler(bot)
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, scheduler.stop)
+    if settings.metrics_enabled:
+        start_http_server(settings.scheduler_metrics_port)
+
+    try:
+        await scheduler.run()
+    finally:
+        await bot.session.close()
+
+if __name__ == "__main__":
+    asyncio.run(run_scheduler())
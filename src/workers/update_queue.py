@@ -0,0 +1,457 @@
+"""Durable update queue between the webhook ingress and update processing.
+
+The ingress validates each Telegram update, appends it to one of
+`update_queue_shards` Redis Streams (sharded by chat) and answers 200
+at once. Consumer processes feed the entries to `Dispatcher.feed_update`
+and acknowledge them only afterwards (at-least-once delivery).
+
+Per-chat ordering: a chat always lands on the same shard, and each shard
+is consumed by a single consumer, the holder of the shard's lease. Within
+a shard, different chats are processed concurrently while each chat's
+updates run one at a time, in stream order; a failed update is retried
+after a backoff before its chat's later updates, without holding up other
+chats. Leases are spread evenly over the live consumers and expire when a
+consumer dies; the next holder first replays the entries its predecessor
+left unacknowledged.
+
+Run the consumers with `python -m src.workers.update_queue`.
+"""
+import asyncio
+import json
+import os
+import socket
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Set, Tuple
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+from aiohttp import web
+import redis.asyncio as redis
+from redis.exceptions import RedisError, ResponseError
+import structlog
+
+from src.core.cache.redis_client import get_redis
+from src.core.config import settings
+from src.core.metrics import (
+    UPDATE_QUEUE_DELAY, UPDATE_QUEUE_EVENTS, UPDATE_QUEUE_LAG, UPDATE_QUEUE_PENDING
+)
+
+logger = structlog.get_logger()
+
+GROUP = "linklet-bot"
+
+# Extend the lease only if we still hold it
+RENEW_LEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+RELEASE_LEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+def _chat_id(data: Dict[str, Any]) -> int:
+    """Chat (or, failing that, user) an update belongs to; 0 if none"""
+    for key, event in data.items():
+        if key == "update_id" or not isinstance(event, dict):
+            continue
+        chat = event.get("chat") or (event.get("message") or {}).get("chat")
+        if chat:
+            return int(chat["id"])
+        user = event.get("from") or event.get("user")
+        if user:
+            return int(user["id"])
+    return 0
+
+def _entry_chat_id(fields: Optional[Dict[str, str]]) -> int:
+    """Chat of a stream entry; 0 if trimmed or unreadable"""
+    try:
+        return _chat_id(json.loads(fields["update"]))
+    except Exception:
+        return 0
+
+class UpdateQueue:
+    """Sharded Redis Streams holding raw Telegram updates"""
+
+    def __init__(self, client: Optional[redis.Redis] = None, stream: Optional[str] = None,
+                 shards: Optional[int] = None, maxlen: Optional[int] = None):
+        self._client = client
+        self.stream = stream or settings.update_queue_stream
+        self.shards = shards or settings.update_queue_shards
+        self.maxlen = maxlen or settings.update_queue_maxlen
+
+    @property
+    def client(self) -> redis.Redis:
+        return self._client or get_redis()
+
+    def shard_key(self, shard: int) -> str:
+        return f"{self.stream}:{shard}"
+
+    def dead_letter_key(self) -> str:
+        return f"{self.stream}:dead"
+
+    def shard_for(self, chat_id: int) -> int:
+        return abs(chat_id) % self.shards
+
+    async def enqueue(self, data: Dict[str, Any]) -> str:
+        """Append an update to its chat's shard
+
+        Returns:
+            Stream entry ID
+        """
+        entry_id = await self.client.xadd(
+            self.shard_key(self.shard_for(_chat_id(data))),
+            {"update": json.dumps(data, separators=(",", ":"))},
+            maxlen=self.maxlen,
+            approximate=True
+        )
+        UPDATE_QUEUE_EVENTS.labels("enqueued").inc()
+        return entry_id
+
+class QueueingRequestHandler:
+    """Webhook handler that enqueues updates instead of processing them.
+
+    Drop-in replacement for aiogram's SimpleRequestHandler in ingress
+    mode. If Redis is unavailable the request fails with 503, so Telegram
+    keeps the update and retries it later.
+    """
+
+    def __init__(self, bot: Bot, queue: Optional[UpdateQueue] = None,
+                 secret_token: Optional[str] = None):
+        self.bot = bot
+        self.queue = queue or UpdateQueue()
+        self.secret_token = secret_token
+
+    def register(self, app: web.Application, path: str) -> None:
+        app.router.add_post(path, self.handle)
+
+    async def handle(self, request: web.Request) -> web.Response:
+        if self.secret_token and request.headers.get(
+                "X-Telegram-Bot-Api-Secret-Token") != self.secret_token:
+            return web.Response(status=401)
+
+        try:
+            data = await request.json()
+            Update.model_validate(data, context={"bot": self.bot})
+        except Exception as e:
+            # Retrying would not help: drop the update
+            logger.warning("Rejected invalid update", error=str(e))
+            return web.Response(status=400)
+
+        try:
+            await self.queue.enqueue(data)
+        except RedisError as e:
+            logger.error("Could not enqueue update", update_id=data.get("update_id"), error=str(e))
+            return web.Response(status=503)
+        return web.Response()
+
+class UpdateConsumer:
+    """Consumes the update shards this process holds a lease on.
+
+    Every consumer heartbeats into a registry; the target share is
+    ceil(shards / live consumers), so leases rebalance as consumers come
+    and go. One task per leased shard reads entries and hands them to
+    per-chat lanes (`ShardLanes`); `update_queue_concurrency` bounds the
+    entries in flight across shards. Failed updates are retried with
+    backoff and moved to a dead-letter stream after `max_attempts`.
+    """
+
+    def __init__(
+        self,
+        bot: Bot,
+        dispatcher: Dispatcher,
+        queue: Optional[UpdateQueue] = None,
+        batch_size: Optional[int] = None,
+        max_attempts: Optional[int] = None,
+        lease_ttl: Optional[float] = None
+    ):
+        self.bot = bot
+        self.dispatcher = dispatcher
+        self.queue = queue or UpdateQueue()
+        self.batch_size = batch_size or settings.update_queue_batch_size
+        self.max_attempts = max_attempts or settings.update_queue_max_attempts
+        self.lease_ttl = lease_ttl or settings.update_queue_lease_ttl
+        self._slots = asyncio.Semaphore(settings.update_queue_concurrency)
+        self.name = f"{socket.gethostname()}-{os.getpid()}"
+        self._tasks: Dict[int, asyncio.Task] = {}
+        self._stopping = asyncio.Event()
+        self._groups: Set[int] = set()
+        self._renew = None
+        self._release = None
+
+    @property
+    def client(self) -> redis.Redis:
+        return self.queue.client
+
+    def _lease_key(self, shard: int) -> str:
+        return f"{self.queue.shard_key(shard)}:lease"
+
+    def _registry_key(self) -> str:
+        return f"{self.queue.stream}:consumers"
+
+    async def run(self) -> None:
+        """Hold leases and consume until stop() is called"""
+        self._renew = self.client.register_script(RENEW_LEASE_SCRIPT)
+        self._release = self.client.register_script(RELEASE_LEASE_SCRIPT)
+        logger.info("Update consumer started", consumer=self.name, shards=self.queue.shards)
+        try:
+            while not self._stopping.is_set():
+                try:
+                    await self._rebalance()
+                    await self._export_lag()
+                except RedisError as e:
+                    logger.error("Update consumer heartbeat failed", error=str(e))
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=self.lease_ttl / 3)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            for shard in list(self._tasks):
+                await self._drop(shard)
+            try:
+                await self.client.zrem(self._registry_key(), self.name)
+            except RedisError:
+                pass
+            logger.info("Update consumer stopped", consumer=self.name)
+
+    def stop(self) -> None:
+        self._stopping.set()
+
+    async def _rebalance(self) -> None:
+        """Heartbeat, renew held leases, then grab or give back shards"""
+        now = time.time()
+        registry = self._registry_key()
+        await self.client.zadd(registry, {self.name: now + self.lease_ttl})
+        await self.client.zremrangebyscore(registry, 0, now)
+        consumers = max(1, await self.client.zcard(registry))
+        target = -(-self.queue.shards // consumers)
+
+        ttl_ms = int(self.lease_ttl * 1000)
+        for shard, task in list(self._tasks.items()):
+            if task.done() or not await self._renew(keys=[self._lease_key(shard)], args=[self.name, ttl_ms]):
+                logger.warning("Lost update shard lease", shard=shard)
+                await self._drop(shard)
+
+        # Give back surplus shards so newcomers get their share
+        while len(self._tasks) > target:
+            await self._drop(max(self._tasks))
+
+        for shard in range(self.queue.shards):
+            if len(self._tasks) >= target:
+                break
+            if shard in self._tasks:
+                continue
+            if await self.client.set(self._lease_key(shard), self.name, nx=True, px=ttl_ms):
+                await self._ensure_group(shard)
+                self._tasks[shard] = asyncio.create_task(self._consume(shard))
+                logger.info("Acquired update shard", shard=shard, consumer=self.name)
+
+    async def _drop(self, shard: int) -> None:
+        """Stop consuming a shard; unacknowledged entries stay pending for the next holder"""
+        task = self._tasks.pop(shard)
+        task.cancel()
+        try:
+            await task
+        except (asyncio.CancelledError, Exception):
+            pass
+        try:
+            await self._release(keys=[self._lease_key(shard)], args=[self.name])
+        except RedisError:
+            pass
+
+    async def _ensure_group(self, shard: int) -> None:
+        if shard in self._groups:
+            return
+        try:
+            await self.client.xgroup_create(self.queue.shard_key(shard), GROUP, id="0", mkstream=True)
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+        self._groups.add(shard)
+
+    async def _consume(self, shard: int) -> None:
+        key = self.queue.shard_key(shard)
+        lanes = ShardLanes(self, key, self._slots)
+        try:
+            while True:
+                try:
+                    # Replay what a previous holder left unacknowledged, in order
+                    cursor = "0-0"
+                    while True:
+                        cursor, entries, *_ = await self.client.xautoclaim(
+                            key, GROUP, self.name, min_idle_time=0,
+                            start_id=cursor, count=self.batch_size
+                        )
+                        for entry_id, fields in entries:
+                            await lanes.submit(entry_id, fields)
+                        if cursor == "0-0":
+                            break
+
+                    while True:
+                        response = await self.client.xreadgroup(
+                            GROUP, self.name, {key: ">"}, count=self.batch_size, block=1000
+                        )
+                        for _, entries in response:
+                            for entry_id, fields in entries:
+                                await lanes.submit(entry_id, fields)
+                except RedisError as e:
+                    logger.error("Update shard read failed", shard=shard, error=str(e))
+                    await asyncio.sleep(1)
+        finally:
+            # Unfinished entries stay pending for the shard's next holder
+            await lanes.close()
+
+    async def _process(self, key: str, entry_id: str, fields: Optional[Dict[str, str]],
+                       attempt: int = 1) -> Optional[float]:
+        """Feed one entry to the dispatcher
+
+        Returns:
+            Seconds to wait before the next attempt, or None once the entry
+            is acknowledged (processed, dead-lettered or trimmed)
+        """
+        if not fields:
+            # Trimmed from the stream while pending
+            await self.client.xack(key, GROUP, entry_id)
+            return None
+
+        if attempt == 1:
+            enqueued_ms = int(entry_id.split("-", 1)[0])
+            UPDATE_QUEUE_DELAY.observe(max(0.0, time.time() - enqueued_ms / 1000))
+
+        try:
+            update = Update.model_validate_json(fields["update"], context={"bot": self.bot})
+            await self.dispatcher.feed_update(self.bot, update)
+            UPDATE_QUEUE_EVENTS.labels("processed").inc()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if attempt < self.max_attempts:
+                logger.warning("Update failed, retrying", entry_id=entry_id, attempt=attempt, error=str(e))
+                UPDATE_QUEUE_EVENTS.labels("retried").inc()
+                return min(0.5 * 2 ** (attempt - 1), 10)
+            logger.error("Update dead-lettered", entry_id=entry_id, error=str(e))
+            await self.client.xadd(
+                self.queue.dead_letter_key(),
+                {"source": key, "entry_id": entry_id, "update": fields.get("update", ""), "error": str(e)},
+                maxlen=self.queue.maxlen,
+                approximate=True
+            )
+            UPDATE_QUEUE_EVENTS.labels("dead_lettered").inc()
+
+        await self.client.xack(key, GROUP, entry_id)
+        return None
+
+    async def _export_lag(self) -> None:
+        """Undelivered (lag) and unacknowledged (pending) entries per held shard"""
+        for shard in list(self._tasks):
+            for group in await self.client.xinfo_groups(self.queue.shard_key(shard)):
+                if group["name"] != GROUP:
+                    continue
+                # `lag` needs Redis 7; older servers report None
+                if group.get("lag") is not None:
+                    UPDATE_QUEUE_LAG.labels(str(shard)).set(group["lag"])
+                UPDATE_QUEUE_PENDING.labels(str(shard)).set(group["pending"])
+
+class ShardLanes:
+    """Entries of one shard in flight, queued in per-chat FIFO lanes.
+
+    Each chat has at most one task, draining its lane in stream order, so
+    different chats run concurrently while a chat's updates never overlap.
+    A failed entry keeps its lane blocked through its backoff until it is
+    processed or dead-lettered. `slots` bounds the entries held (queued,
+    running or waiting to retry); `submit` waits for a free slot, which
+    stops the shard's reads.
+    """
+
+    def __init__(self, consumer: UpdateConsumer, key: str, slots: asyncio.Semaphore):
+        self.consumer = consumer
+        self.key = key
+        self.slots = slots
+        self._lanes: Dict[int, Deque[Tuple[str, Optional[Dict[str, str]]]]] = {}
+        self._entries: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def submit(self, entry_id: str, fields: Optional[Dict[str, str]]) -> None:
+        if entry_id in self._entries:
+            # Replayed by XAUTOCLAIM while still in flight here
+            return
+        await self.slots.acquire()
+        self._entries.add(entry_id)
+
+        chat_id = _entry_chat_id(fields)
+        lane = self._lanes.get(chat_id)
+        if lane is None:
+            lane = self._lanes[chat_id] = deque()
+            self._spawn(self._drain(chat_id, lane))
+        lane.append((entry_id, fields))
+
+    async def close(self) -> None:
+        """Cancel the lanes and free their slots"""
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        for _ in self._entries:
+            self.slots.release()
+        self._entries.clear()
+        self._lanes.clear()
+
+    async def _drain(self, chat_id: int, lane: Deque) -> None:
+        while lane:
+            entry_id, fields = lane.popleft()
+            attempt = 1
+            while True:
+                try:
+                    retry_in = await self.consumer._process(self.key, entry_id, fields, attempt)
+                except RedisError as e:
+                    # Not acknowledged: stays pending for the shard's next holder
+                    logger.error("Update acknowledgement failed", entry_id=entry_id, error=str(e))
+                    retry_in = None
+                if retry_in is None:
+                    break
+                # The chat's later updates wait until this one settles
+                await asyncio.sleep(retry_in)
+                attempt += 1
+            self._entries.discard(entry_id)
+            self.slots.release()
+        # No await since the loop test: nothing was appended in between
+        del self._lanes[chat_id]
+
+    def _spawn(self, coro) -> None:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+async def run_update_workers() -> None:
+    """Consumer process: bot, dispatcher and handlers without a web server"""
+    import signal
+    from prometheus_client import start_http_server
+    from src.bot.main import create_bot, on_shutdown, on_startup
+
+    bot, dp = await create_bot()
+    # Webhook registration and table creation belong to the ingress
+    dp["primary"] = False
+    dp.startup.register(on_startup)
+    dp.shutdown.register(on_shutdown)
+
+    if settings.metrics_enabled:
+        start_http_server(settings.update_queue_metrics_port)
+
+    consumer = UpdateConsumer(bot, dp)
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, consumer.stop)
+
+    workflow_data = {"dispatcher": dp, "bots": [bot], **dp.workflow_data}
+    await dp.emit_startup(bot=bot, **workflow_data)
+    try:
+        await consumer.run()
+    finally:
+        await dp.emit_shutdown(bot=bot, **workflow_data)
+
+if __name__ == "__main__":
+    asyncio.run(run_update_workers())
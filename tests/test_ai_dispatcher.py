@@ -0,0 +1,100 @@
+"""AI call bulkhead: global and per-user limits, tier fairness, deadlines."""
+import asyncio
+
+import pytest
+
+from src.core.services.ai.dispatcher import BACKGROUND_TIER, AIDispatcher, AIQueueTimeout
+
+def dispatcher(max_concurrency=1, per_user_limit=10, deadline=5.0):
+    return AIDispatcher(max_concurrency, per_user_limit, {"free": 1, "premium": 2}, deadline)
+
+class Probe:
+    """Records the grant order and peak concurrency of slot holders"""
+
+    def __init__(self):
+        self.order = []
+        self.active = {}
+        self.peak = {}
+
+    async def call(self, dispatcher, user_id, tier=None, hold=0.01):
+        async with dispatcher.slot(user_id, tier):
+            self.order.append(tier)
+            self.active[user_id] = self.active.get(user_id, 0) + 1
+            total = sum(self.active.values())
+            self.peak["total"] = max(self.peak.get("total", 0), total)
+            self.peak[user_id] = max(self.peak.get(user_id, 0), self.active[user_id])
+            await asyncio.sleep(hold)
+            self.active[user_id] -= 1
+
+async def queued_behind_a_held_slot(dispatcher, probe, requests):
+    """Run `requests` ((user_id, tier) pairs), all queued before any is granted"""
+    blocker = asyncio.Event()
+
+    async def hold():
+        async with dispatcher.slot(0):
+            await blocker.wait()
+
+    holder = asyncio.create_task(hold())
+    await asyncio.sleep(0)
+    calls = [asyncio.create_task(probe.call(dispatcher, user_id, tier)) for user_id, tier in requests]
+    await asyncio.sleep(0)
+    blocker.set()
+    await asyncio.gather(holder, *calls)
+
+@pytest.mark.asyncio
+async def test_global_cap_bounds_in_flight_calls():
+    ai = dispatcher(max_concurrency=2)
+    probe = Probe()
+
+    await asyncio.gather(*(probe.call(ai, user_id) for user_id in range(6)))
+
+    assert probe.peak["total"] == 2
+    assert ai.stats()["completed"] == 6 and ai.stats()["active"] == 0
+
+@pytest.mark.asyncio
+async def test_per_user_limit_does_not_hold_back_other_users():
+    ai = dispatcher(max_concurrency=10, per_user_limit=1)
+    probe = Probe()
+
+    await asyncio.gather(*(probe.call(ai, 1) for _ in range(3)), *(probe.call(ai, user_id) for user_id in (2, 3)))
+
+    assert probe.peak[1] == 1
+    assert probe.peak["total"] == 3
+    # Per-user semaphores are dropped once unused
+    assert ai._user_semaphores == {}
+
+@pytest.mark.asyncio
+async def test_freed_slots_follow_tier_weights_without_starving_free():
+    ai = dispatcher()
+    probe = Probe()
+    requests = [(i, "premium") for i in range(1, 7)] + [(i, "free") for i in range(7, 13)]
+
+    await queued_behind_a_held_slot(ai, probe, requests)
+
+    assert probe.order[:6] == ["premium", "free", "premium", "premium", "free", "premium"]
+    assert sorted(probe.order) == sorted(tier for _, tier in requests)
+
+@pytest.mark.asyncio
+async def test_background_tier_waits_for_interactive_requests():
+    ai = dispatcher()
+    probe = Probe()
+
+    await queued_behind_a_held_slot(ai, probe, [(1, BACKGROUND_TIER), (2, "free"), (3, "free")])
+
+    assert probe.order == ["free", "free", BACKGROUND_TIER]
+
+@pytest.mark.asyncio
+async def test_deadline_rejects_and_frees_the_user_slot():
+    ai = dispatcher(deadline=0.05)
+
+    async with ai.slot(1):
+        with pytest.raises(AIQueueTimeout):
+            async with ai.slot(2):
+                pass
+        assert ai.waiting() == 0
+
+    assert ai.stats()["rejected"] == 1
+    assert ai._user_semaphores == {}
+    # The cap is intact after the rejection
+    async with ai.slot(2):
+        assert ai.stats()["active"] == 1
@@ -0,0 +1,58 @@
+"""AI chat helpers, with the provider router and Redis faked."""
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+
+from src.bot.handlers import ai
+from src.core.cache import ai_cache
+from src.core.cache.ai_cache import AIResponseCache
+from src.core.services.ai.conversation import Conversation
+
+class FakeRedis:
+    def __init__(self):
+        self.values = {}
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    def register_script(self, script):
+        async def set_and_evict(keys, args):
+            self.values[keys[1]] = args[0]
+        return set_and_evict
+
+@pytest.fixture
+def provider(monkeypatch):
+    cache = AIResponseCache(ttl=60, max_entries=10, max_temperature=0.0)
+    router = SimpleNamespace(
+        providers=[SimpleNamespace(model="gpt-test")],
+        complete=AsyncMock(return_value="Utilisez un déclencheur Cron.")
+    )
+    redis = FakeRedis()
+    monkeypatch.setattr(ai_cache, "get_redis", lambda: redis)
+    monkeypatch.setattr(ai, "ai_response_cache", cache)
+    monkeypatch.setattr(ai, "ai_router", router)
+    return SimpleNamespace(cache=cache, router=router, redis=redis)
+
+@pytest.mark.asyncio
+async def test_standalone_prompt_is_answered_from_cache(provider):
+    first = await ai.get_ai_response("Comment planifier un workflow ?", use_cache=True)
+    # Same question, normalized: no second provider call
+    cached = await ai.get_cached_ai_response("comment planifier   un workflow")
+
+    assert cached == first == "Utilisez un déclencheur Cron."
+    provider.router.complete.assert_awaited_once()
+    _, temperature, _ = provider.router.complete.await_args.args
+    assert temperature == ai.CACHED_TEMPERATURE == 0.0
+    assert provider.cache.stats()["hits"] == 1
+
+@pytest.mark.asyncio
+async def test_prompt_with_history_is_sampled_and_not_cached(provider):
+    conversation = Conversation(turns=[("user", "Bonjour"), ("assistant", "Bonjour !")])
+
+    await ai.get_ai_response("Et ensuite ?", use_cache=True, conversation=conversation)
+
+    assert await ai.get_cached_ai_response("Et ensuite ?", conversation) is None
+    _, temperature, _ = provider.router.complete.await_args.args
+    assert temperature == ai.AI_TEMPERATURE
+    assert provider.redis.values == {}
@@ -0,0 +1,68 @@
+"""Provider routing health windows, with providers faked."""
+import pytest
+
+from src.core.services.ai.providers import AIProvider
+from src.core.services.ai.router import ProviderRouter
+
+class FakeProvider(AIProvider):
+    def __init__(self, name, chunks=("Bon", "jour"), fail_after=None):
+        super().__init__(model=f"{name}-model")
+        self.name = name
+        self.chunks = chunks
+        self.fail_after = fail_after
+
+    async def complete(self, messages, temperature, max_tokens):
+        return "".join(self.chunks)
+
+    async def stream(self, messages, temperature, max_tokens):
+        for index, chunk in enumerate(self.chunks):
+            if index == self.fail_after:
+                raise ConnectionError("stream cut")
+            yield chunk
+
+async def consume(router):
+    return [chunk async for chunk in router.stream([], 0.0, 10)]
+
+@pytest.mark.asyncio
+async def test_stream_ttft_stays_out_of_the_completion_window():
+    router = ProviderRouter([FakeProvider("a")])
+
+    await consume(router)
+    await router.complete([], 0.0, 10)
+
+    health = router.health["a"]
+    assert len(health.ttfts) == 1
+    assert len(health.latencies) == 1
+    assert list(health.outcomes) == [True, True]
+
+@pytest.mark.asyncio
+async def test_stream_failure_after_first_chunk_is_recorded():
+    router = ProviderRouter([FakeProvider("a", fail_after=1), FakeProvider("b")])
+
+    with pytest.raises(ConnectionError):
+        await consume(router)
+
+    # Too late to fail over, but the error still counts against the provider
+    assert list(router.health["a"].outcomes) == [False]
+    assert not router.health["a"].ttfts
+    assert not router.health["b"].outcomes
+
+@pytest.mark.asyncio
+async def test_stream_fails_over_before_first_chunk():
+    router = ProviderRouter([FakeProvider("a", fail_after=0), FakeProvider("b")])
+
+    assert await consume(router) == ["Bon", "jour"]
+    assert list(router.health["a"].outcomes) == [False]
+    assert list(router.health["b"].outcomes) == [True]
+
+def test_streams_and_completions_are_ranked_on_their_own_window():
+    slow_ttft, slow_completion = FakeProvider("a"), FakeProvider("b")
+    router = ProviderRouter([slow_ttft, slow_completion], min_samples=2)
+    for _ in range(2):
+        router.health["a"].record(0.1, True)
+        router.health["a"].record(3.0, True, streamed=True)
+        router.health["b"].record(2.0, True)
+        router.health["b"].record(0.2, True, streamed=True)
+
+    assert router.ranked() == [slow_ttft, slow_completion]
+    assert router.ranked(streamed=True) == [slow_completion, slow_ttft]
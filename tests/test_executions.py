@@ -0,0 +1,150 @@
+"""Execution jobs and their status messages, with n8n, storage and Telegram faked."""
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock
+from uuid import uuid4
+
+import pytest
+from aiogram.exceptions import TelegramBadRequest
+
+from src.workers import executions
+from src.workers.executions import (
+    FAILED, RUNNING, STREAM, SUCCEEDED, ExecutionJob, ExecutionQueue, ExecutionWorker, LocalExecutionQueue
+)
+
+@pytest.fixture
+def workflow_service(monkeypatch):
+    calls = []
+
+    class FakeService:
+        def __init__(self, db, n8n=None):
+            pass
+
+        async def execute_workflow(self, workflow_id, user_id, data=None):
+            calls.append((workflow_id, user_id, data))
+            if data and data.get("fail"):
+                raise ValueError("n8n exploded")
+            return {"ok": True}
+
+    @asynccontextmanager
+    async def fake_db():
+        yield None
+
+    monkeypatch.setattr(executions, "WorkflowService", FakeService)
+    monkeypatch.setattr(executions, "get_async_db", fake_db)
+    return calls
+
+@pytest.mark.asyncio
+async def test_local_queue_runs_jobs_without_redis(workflow_service):
+    bot = AsyncMock()
+    queue = LocalExecutionQueue()
+    queue.start(bot, n8n=object())
+
+    done = await queue.enqueue(uuid4(), "Backup", user_id=7, chat_id=42)
+    failed = await queue.enqueue(uuid4(), "Report", user_id=7, chat_id=42, data={"fail": True})
+    await queue.attach_message(done.id, 99)
+    await queue.close()
+
+    assert (await queue.get(done.id)).status == SUCCEEDED
+    assert (await queue.get(failed.id)).status == FAILED
+    assert [job.id for job in await queue.list_for_user(7)] == [failed.id, done.id]
+    assert await queue.list_for_user(8) == []
+    assert [user_id for _, user_id, _ in workflow_service] == [7, 7]
+
+@pytest.mark.asyncio
+async def test_local_queue_forgets_oldest_jobs(workflow_service):
+    queue = LocalExecutionQueue(max_jobs=2)
+    queue.start(AsyncMock(), n8n=object())
+
+    jobs = [await queue.enqueue(uuid4(), f"W{i}", user_id=7, chat_id=42) for i in range(3)]
+    await queue.close()
+
+    assert await queue.get(jobs[0].id) is None
+    assert [job.id for job in await queue.list_for_user(7)] == [jobs[2].id, jobs[1].id]
+
+@pytest.mark.asyncio
+async def test_local_queue_runs_a_batch(workflow_service):
+    queue = LocalExecutionQueue()
+    queue.start(AsyncMock(), n8n=object())
+
+    jobs = await queue.enqueue_many([(uuid4(), "A"), (uuid4(), "B")], user_id=7, chat_id=42)
+    await queue.close()
+
+    assert [(await queue.get(job.id)).status for job in jobs] == [SUCCEEDED, SUCCEEDED]
+    assert len(workflow_service) == 2
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.commands.append((name, args[0]))
+
+    async def execute(self):
+        self.redis.round_trips.append(self.commands)
+
+@pytest.mark.asyncio
+async def test_redis_batch_is_queued_in_one_round_trip():
+    redis = MagicMock(round_trips=[])
+    redis.pipeline = lambda transaction: FakePipeline(redis)
+    queue = ExecutionQueue(client=redis)
+
+    jobs = await queue.enqueue_many([(uuid4(), "A"), (uuid4(), "B")], user_id=7, chat_id=42)
+
+    [commands] = redis.round_trips
+    assert [key for name, key in commands if name == "xadd"] == [STREAM, STREAM]
+    assert [key for name, key in commands if name == "hset"] == [queue._job_key(job.id) for job in jobs]
+    assert await queue.enqueue_many([], user_id=7, chat_id=42) == []
+    assert len(redis.round_trips) == 1
+
+def markdown_rejected(*args, parse_mode=None, **kwargs):
+    if parse_mode == "Markdown":
+        raise TelegramBadRequest(method=MagicMock(), message="can't parse entities")
+
+@pytest.mark.asyncio
+async def test_running_state_is_edited_as_plain_text_when_markdown_is_rejected():
+    bot = AsyncMock()
+    bot.edit_message_text.side_effect = markdown_rejected
+    job = ExecutionJob.new(uuid4(), "Backup", user_id=7, chat_id=42, message_id=99)
+    job.status = RUNNING
+    worker = ExecutionWorker(bot, n8n=object(), queue=LocalExecutionQueue())
+
+    await worker._notify(job)
+
+    assert [call.kwargs["parse_mode"] for call in bot.edit_message_text.await_args_list] == ["Markdown", None]
+    bot.send_message.assert_not_awaited()
+
+@pytest.mark.asyncio
+async def test_finished_job_is_sent_anew_only_if_its_message_is_gone():
+    bot = AsyncMock()
+    bot.edit_message_text.side_effect = TelegramBadRequest(method=MagicMock(), message="message to edit not found")
+    job = ExecutionJob.new(uuid4(), "Backup", user_id=7, chat_id=42, message_id=99)
+    worker = ExecutionWorker(bot, n8n=object(), queue=LocalExecutionQueue())
+
+    job.status = RUNNING
+    await worker._notify(job)
+    bot.send_message.assert_not_awaited()
+
+    job.status = SUCCEEDED
+    await worker._notify(job)
+    bot.send_message.assert_awaited_once()
+
+def test_describe_escapes_markdown():
+    job = ExecutionJob.new(uuid4(), "my_daily *backup*", user_id=7, chat_id=42)
+    job.status = SUCCEEDED
+    job.result = '{"out": "```rm -rf```"}'
+
+    text = job.describe()
+    assert "my\\_daily \\*backup\\*" in text
+    assert text.count("```") == 2
+
+    job.status = FAILED
+    job.error = "bad [link"
+    assert job.describe().endswith("bad \\[link")
+    assert job.describe(markdown=False).endswith("bad [link")
@@ -0,0 +1,46 @@
+"""Bot startup and shutdown hooks, with external services faked."""
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from aiogram import Dispatcher
+
+from src.bot import main
+
+@pytest.mark.asyncio
+async def test_shutdown_cleans_up_after_a_dead_execution_worker(monkeypatch):
+    async def crashed():
+        raise ConnectionError("Redis unreachable")
+
+    dp = Dispatcher()
+    dp["execution_worker"] = MagicMock()
+    dp["execution_worker_task"] = asyncio.create_task(crashed())
+    dp["n8n_client"] = AsyncMock()
+    await asyncio.sleep(0)
+
+    cleanup = {name: AsyncMock() for name in ("dispose_engines", "close_redis")}
+    for name, mock in cleanup.items():
+        monkeypatch.setattr(main, name, mock)
+    monkeypatch.setattr(main.ai_router, "close", AsyncMock())
+    bot = MagicMock(session=AsyncMock())
+
+    await main.on_shutdown(bot, dp)
+
+    dp["execution_worker"].stop.assert_called_once()
+    dp["n8n_client"].close.assert_awaited_once()
+    main.ai_router.close.assert_awaited_once()
+    for mock in cleanup.values():
+        mock.assert_awaited_once()
+    bot.session.close.assert_awaited_once()
+
+@pytest.mark.parametrize("metrics", [True, False])
+def test_metrics_route_only_on_single_process_webhook_app(monkeypatch, metrics):
+    monkeypatch.setattr(main.settings, "metrics_enabled", True)
+    monkeypatch.setattr(main.settings, "update_queue_enabled", False)
+    bot = MagicMock(id=42)
+
+    app = main.build_webhook_app(bot, Dispatcher(), metrics=metrics)
+
+    paths = {route.resource.canonical for route in app.router.routes()}
+    assert ("/metrics" in paths) is metrics
+    assert "/webhook" in paths
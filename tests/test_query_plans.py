@@ -0,0 +1,218 @@
+"""Query-plan regression tests for the queries the bot issues.
+
+Seeds a large synthetic dataset (PLAN_TEST_USERS users, 20000 by default;
+one power user owns thousands of rows), then runs EXPLAIN (ANALYZE) for
+each hot query and fails if it stops using its index, falls back to a
+sequential scan of a large table, or exceeds its latency budget.
+"""
+import json
+import os
+from dataclasses import dataclass
+from typing import Dict, Iterator, Optional
+
+import pytest
+from sqlalchemy import text
+
+pytestmark = pytest.mark.postgres
+
+LARGE_TABLES = ("users", "workflows", "tasks", "integrations", "user_stats")
+
+@dataclass
+class PlanCase:
+    name: str
+    sql: str
+    index: Optional[str]      # Index the plan must use
+    budget_ms: float          # Execution time budget (EXPLAIN ANALYZE)
+
+# Mirrors of the statements issued by handlers, services and workers
+CASES = [
+    PlanCase(
+        "auth_user_lookup",
+        "SELECT id FROM users WHERE telegram_id = :telegram_id",
+        "users_telegram_id_key", 2
+    ),
+    PlanCase(
+        "status_stats",
+        "SELECT * FROM user_stats WHERE user_id = :user_id",
+        "user_stats_pkey", 2
+    ),
+    PlanCase(
+        "status_counts_fallback",
+        """
+        SELECT 'workflows', count(*), count(*) FILTER (WHERE is_active IS true)
+        FROM workflows WHERE user_id = :user_id
+        UNION ALL
+        SELECT 'tasks', count(*), 0 FROM tasks WHERE user_id = :user_id AND completed_at IS NULL
+        UNION ALL
+        SELECT 'integrations', count(*), count(*) FILTER (WHERE is_active IS true)
+        FROM integrations WHERE user_id = :user_id
+        """,
+        "ix_workflows_user_id_is_active", 20
+    ),
+    PlanCase(
+        "list_user_workflows",
+        "SELECT * FROM workflows WHERE user_id = :user_id",
+        "ix_workflows_user_id_is_active", 20
+    ),
+    PlanCase(
+        "list_user_workflows_page",
+        """
+        SELECT * FROM workflows
+        WHERE user_id = :user_id AND (created_at, id) > (now() - interval '1 year', CAST(:workflow_id AS uuid))
+        ORDER BY created_at, id LIMIT 11
+        """,
+        "ix_workflows_user_id_created_at_id", 5
+    ),
+    PlanCase(
+        "get_user_workflow",
+        "SELECT * FROM workflows WHERE id = CAST(:workflow_id AS uuid) AND user_id = :user_id",
+        "workflows_pkey", 2
+    ),
+    PlanCase(
+        "workflow_by_n8n_id",
+        "SELECT id FROM workflows WHERE n8n_workflow_id = :n8n_workflow_id",
+        "ix_workflows_n8n_workflow_id", 2
+    ),
+    PlanCase(
+        "tasks_agenda",
+        """
+        SELECT id, title, scheduled_at, recurrence_rule FROM tasks
+        WHERE user_id = :user_id AND completed_at IS NULL AND reminder_sent_at IS NULL
+          AND scheduled_at < now() + interval '7 days'
+        ORDER BY scheduled_at LIMIT 50
+        """,
+        "ix_tasks_user_id_pending", 10
+    ),
+    PlanCase(
+        "scheduler_refill",
+        """
+        SELECT scheduled_at, id FROM tasks
+        WHERE completed_at IS NULL AND reminder_sent_at IS NULL
+          AND scheduled_at < now() + interval '5 minutes'
+        ORDER BY scheduled_at, id LIMIT 1000
+        """,
+        "ix_tasks_pending_scheduled_at", 50
+    ),
+    PlanCase(
+        "scheduler_claim",
+        """
+        SELECT tasks.*, users.telegram_id FROM tasks JOIN users ON users.id = tasks.user_id
+        WHERE tasks.id = ANY(CAST(:task_ids AS uuid[]))
+          AND completed_at IS NULL AND reminder_sent_at IS NULL AND scheduled_at <= now()
+        FOR UPDATE OF tasks SKIP LOCKED
+        """,
+        "tasks_pkey", 20
+    ),
+]
+
+SEED_SQL = [
+    """
+    INSERT INTO users (telegram_id, username, first_name, subscription_tier)
+    SELECT 1000000000 + g, 'user' || g, 'User ' || g,
+           (ARRAY['free', 'pro', 'business'])[1 + g % 3]
+    FROM generate_series(1, :users) g
+    """,
+    # Everyone gets a few rows, user 1 is a power user with thousands
+    """
+    INSERT INTO workflows (id, user_id, name, n8n_workflow_id, is_active)
+    SELECT gen_random_uuid(),
+           CASE WHEN g <= 5000 THEN 1 ELSE 1 + (random() * (:users - 1))::int END,
+           'Workflow ' || g, 'wf-' || g, random() < 0.6
+    FROM generate_series(1, :users * 5) g
+    """,
+    """
+    INSERT INTO tasks (id, user_id, title, scheduled_at, completed_at, reminder_sent_at, recurrence_rule)
+    SELECT gen_random_uuid(),
+           CASE WHEN g <= 20000 THEN 1 ELSE 1 + (random() * (:users - 1))::int END,
+           'Task ' || g,
+           now() + (random() * 60 - 30) * interval '1 day',
+           CASE WHEN random() < 0.7 THEN now() END,
+           CASE WHEN random() < 0.1 THEN now() END,
+           CASE WHEN random() < 0.2 THEN 'daily' END
+    FROM generate_series(1, :users * 20) g
+    """,
+    """
+    INSERT INTO integrations (user_id, service_name, is_active)
+    SELECT CASE WHEN g <= 500 THEN 1 ELSE 1 + (random() * (:users - 1))::int END,
+           (ARRAY['gmail', 'notion', 'github', 'drive'])[1 + g % 4], random() < 0.8
+    FROM generate_series(1, :users * 2) g
+    """,
+    # Counter values do not matter for plans, only the row count
+    """
+    INSERT INTO user_stats (user_id, workflows_count, active_workflows_count,
+                            pending_tasks_count, integrations_count)
+    SELECT id, 0, 0, 0, 0 FROM users
+    """,
+]
+
+def _sample_params(conn) -> Dict:
+    """Parameters hitting the busiest user, so plans reflect the worst case"""
+    user_id, telegram_id = conn.execute(text(
+        "SELECT u.id, u.telegram_id FROM users u "
+        "JOIN workflows w ON w.user_id = u.id GROUP BY u.id ORDER BY count(*) DESC LIMIT 1"
+    )).one()
+    workflow_id, n8n_workflow_id = conn.execute(text(
+        "SELECT id, n8n_workflow_id FROM workflows WHERE user_id = :user_id LIMIT 1"
+    ), {"user_id": user_id}).one()
+    task_ids = conn.execute(text(
+        "SELECT id FROM tasks WHERE completed_at IS NULL LIMIT 100"
+    )).scalars().all()
+    return {
+        "user_id": user_id,
+        "telegram_id": telegram_id,
+        "workflow_id": str(workflow_id),
+        "n8n_workflow_id": n8n_workflow_id,
+        "task_ids": [str(task_id) for task_id in task_ids],
+    }
+
+def _nodes(plan: Dict) -> Iterator[Dict]:
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from _nodes(child)
+
+@pytest.fixture(scope="module")
+def conn():
+    """Connection to the seeded, analyzed test database"""
+    if not os.environ.get("TEST_DATABASE_URL"):
+        pytest.skip("TEST_DATABASE_URL is not set")
+    from src.core.database.connection import engine
+    from src.core.database.models import Base
+
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    users = int(os.environ.get("PLAN_TEST_USERS", "20000"))
+    with engine.begin() as seeding:
+        for statement in SEED_SQL:
+            seeding.execute(text(statement), {"users": users})
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as analyzing:
+        analyzing.execute(text("ANALYZE"))
+
+    with engine.connect() as connection:
+        yield connection
+    engine.dispose()
+
+@pytest.fixture(scope="module")
+def params(conn) -> Dict:
+    return _sample_params(conn)
+
+@pytest.mark.parametrize("case", CASES, ids=[case.name for case in CASES])
+def test_query_plan(case: PlanCase, conn, params):
+    try:
+        raw = conn.execute(text(f"EXPLAIN (ANALYZE, FORMAT JSON) {case.sql}"), params).scalar()
+    finally:
+        # Rolled back so the FOR UPDATE case does not keep its locks
+        conn.rollback()
+    explained = (raw if isinstance(raw, list) else json.loads(raw))[0]
+    nodes = list(_nodes(explained["Plan"]))
+
+    scans = [
+        node["Relation Name"] for node in nodes
+        if node["Node Type"] == "Seq Scan" and node.get("Relation Name") in LARGE_TABLES
+    ]
+    assert not scans, f"sequential scan on {scans}"
+    used = sorted({node["Index Name"] for node in nodes if node.get("Index Name")})
+    if case.index:
+        assert case.index in used, f"expected index {case.index}, plan uses {used or 'none'}"
+    assert explained["Execution Time"] <= case.budget_ms, (
+        f"{explained['Execution Time']:.1f} ms over the {case.budget_ms} ms budget"
+    )
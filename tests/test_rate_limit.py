@@ -0,0 +1,58 @@
+"""In-process token-bucket rate limiter, on a fake clock."""
+from types import SimpleNamespace
+
+import pytest
+
+from src.bot.middleware import rate_limit
+from src.bot.middleware.rate_limit import MemoryRateLimiter
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = SimpleNamespace(value=1000.0)
+    monkeypatch.setattr(rate_limit, "time", SimpleNamespace(monotonic=lambda: now.value))
+    return now
+
+@pytest.mark.asyncio
+async def test_bucket_limits_then_refills(clock):
+    limiter = MemoryRateLimiter(limit=2, window=10.0)
+
+    assert [await limiter.hit(1) for _ in range(3)] == [True, True, False]
+    clock.value += 5.0          # one token back
+    assert [await limiter.hit(1) for _ in range(2)] == [True, False]
+
+@pytest.mark.asyncio
+async def test_cap_evicts_the_least_recently_active_user(clock):
+    limiter = MemoryRateLimiter(limit=5, window=10.0, max_tracked=2)
+
+    await limiter.hit(1)
+    await limiter.hit(2)
+    await limiter.hit(1)        # 1 is now the most recent
+    await limiter.hit(3)
+
+    assert list(limiter._buckets) == [1, 3]
+    assert limiter.stats()["tracked_users"] == 2
+    assert limiter.stats()["evictions"] == 1
+
+@pytest.mark.asyncio
+async def test_sweep_drops_only_idle_buckets(clock):
+    limiter = MemoryRateLimiter(limit=5, window=10.0, sweep_interval=60.0)
+    await limiter.hit(1)
+    clock.value += 6.0
+    await limiter.hit(2)
+    clock.value += 5.0          # 1 idle for a full window, 2 not
+
+    assert limiter.sweep() == 1
+    assert list(limiter._buckets) == [2]
+
+@pytest.mark.asyncio
+async def test_hits_sweep_periodically(clock):
+    limiter = MemoryRateLimiter(limit=5, window=10.0, sweep_interval=60.0)
+    for user_id in range(100):
+        await limiter.hit(user_id)
+    clock.value += 61.0
+
+    await limiter.hit(500)
+
+    # Swept back to the one active user, without ever reaching the cap
+    assert list(limiter._buckets) == [500]
+    assert limiter.evictions == 0
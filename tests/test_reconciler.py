@@ -0,0 +1,141 @@
+"""n8n reconciliation passes, with n8n and Redis faked."""
+import asyncio
+from datetime import datetime
+from unittest.mock import AsyncMock
+
+import pytest
+from sqlalchemy import select, update
+
+from src.core.database.connection import AsyncSessionLocal
+from src.core.database.models import User, UserStats, Workflow
+from src.core.services.stats_service import StatsService
+from src.workers.reconciler import WATERMARK_KEY, WorkflowReconciler
+
+class FakeLock:
+    async def acquire(self, blocking=True):
+        return True
+
+    async def reacquire(self):
+        pass
+
+    async def release(self):
+        pass
+
+class FakeRedis:
+    def __init__(self, watermark=None):
+        self.values = {WATERMARK_KEY: watermark} if watermark else {}
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def set(self, key, value):
+        self.values[key] = value
+
+    def lock(self, key, timeout=None):
+        return FakeLock()
+
+def fake_n8n(*pages):
+    """n8n listing `pages` (lists of workflow dicts), chained by cursor"""
+    def page(limit, cursor=None):
+        index = int(cursor or 0)
+        data = {"data": pages[index]}
+        if index + 1 < len(pages):
+            data["nextCursor"] = str(index + 1)
+        return data
+    return AsyncMock(list_workflows_page=AsyncMock(side_effect=page))
+
+def item(n8n_id, active=True, updated_at="2024-05-01T10:00:00.000Z"):
+    return {"id": n8n_id, "name": f"Workflow {n8n_id}", "active": active, "updatedAt": updated_at}
+
+@pytest.fixture
+def writes(monkeypatch):
+    """Records what a pass would write instead of touching Postgres"""
+    calls = {"apply": [], "missing": []}
+
+    async def apply(self, changes):
+        calls["apply"].append(changes)
+        return len(changes)
+
+    async def deactivate_missing(self, seen):
+        calls["missing"].append(seen)
+        return 0
+
+    monkeypatch.setattr(WorkflowReconciler, "_apply", apply)
+    monkeypatch.setattr(WorkflowReconciler, "_deactivate_missing", deactivate_missing)
+    return calls
+
+def test_active_deltas_count_only_flips_per_user():
+    deltas = WorkflowReconciler._active_deltas([
+        (1, False, True),
+        (1, False, True),
+        (1, True, False),
+        (2, True, True),
+        (3, True, False),
+    ])
+
+    assert dict(deltas) == {1: 1, 3: -1}
+
+@pytest.mark.asyncio
+async def test_complete_pass_moves_the_watermark_and_deactivates_missing(writes):
+    redis = FakeRedis()
+    worker = WorkflowReconciler(fake_n8n([item("a")], [item("b")]), client=redis, page_size=1)
+    started = datetime.utcnow()
+
+    counts = await worker.reconcile(full=True)
+
+    assert counts["pages"] == 2 and counts["updated"] == 2
+    assert writes["missing"] == [{"a", "b"}]
+    watermark = datetime.fromisoformat(redis.values[WATERMARK_KEY])
+    assert watermark < started
+
+@pytest.mark.asyncio
+async def test_incremental_pass_sends_only_newer_workflows(writes):
+    redis = FakeRedis("2024-05-01T12:00:00")
+    pages = [[item("old"), item("new", updated_at="2024-05-01T13:00:00Z"), item("undated", updated_at=None)]]
+    worker = WorkflowReconciler(fake_n8n(*pages), client=redis)
+
+    await worker.reconcile()
+
+    assert [n8n_id for n8n_id, _, _ in writes["apply"][0]] == ["new", "undated"]
+    # Unchanged workflows still count as present in n8n
+    assert writes["missing"] == [{"old", "new", "undated"}]
+
+@pytest.mark.asyncio
+async def test_interrupted_pass_keeps_the_old_watermark(writes):
+    redis = FakeRedis("2024-05-01T12:00:00")
+    worker = WorkflowReconciler(fake_n8n([item("a")], [item("b")]), client=redis, page_size=1)
+    worker.stop()
+
+    counts = await worker.reconcile(full=True)
+
+    assert counts["pages"] == 1
+    assert redis.values[WATERMARK_KEY] == "2024-05-01T12:00:00"
+    # Workflows on unread pages must not be taken for deleted
+    assert writes["missing"] == []
+
+@pytest.mark.postgres
+@pytest.mark.asyncio
+async def test_apply_counts_from_the_latest_committed_state(pg_engine):
+    async with AsyncSessionLocal() as db:
+        user = User(telegram_id=42, first_name="Test")
+        db.add(user)
+        await db.flush()
+        db.add(Workflow(user_id=user.id, name="Backup", n8n_workflow_id="wf-1", is_active=False))
+        await db.flush()
+        await StatsService(db).get(user.id)
+        await db.commit()
+        user_id = user.id
+
+    async with AsyncSessionLocal() as racing:
+        # A user activation holds the row while the reconciler starts
+        await racing.execute(update(Workflow).values(is_active=True))
+        await StatsService(racing).adjust(user_id, active_workflows=1)
+        # n8n has it renamed and inactive: the row is updated, flipping it back
+        apply = asyncio.create_task(WorkflowReconciler(AsyncMock())._apply([("wf-1", "Nightly backup", False)]))
+        await asyncio.sleep(0.2)
+        await racing.commit()
+    assert await apply == 1
+
+    async with AsyncSessionLocal() as db:
+        count = await db.scalar(select(UserStats.active_workflows_count).where(UserStats.user_id == user_id))
+    assert count == 0
@@ -0,0 +1,108 @@
+"""Recurrence rules: RRULE subset, cron, and batched window evaluation."""
+from datetime import datetime
+
+import pytest
+
+from src.core.services.recurrence import Schedule, compile_rule, next_occurrence, occurrences_between
+
+def occurrences(rule: str, anchor: datetime, n: int):
+    return compile_rule(rule).resolve(anchor).next_n(anchor, n)
+
+def test_interval_is_counted_from_the_previous_run():
+    # Every other week, re-anchored at each run
+    rule = "FREQ=WEEKLY;INTERVAL=2"
+    first = next_occurrence(rule, datetime(2024, 1, 1, 9, 0), datetime(2024, 1, 1, 9, 0))
+    second = next_occurrence(rule, first, first)
+
+    assert (first, second) == (datetime(2024, 1, 15, 9, 0), datetime(2024, 1, 29, 9, 0))
+
+def test_interval_keeps_every_byday_of_a_qualifying_week():
+    rule = "FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,WE"
+    monday = datetime(2024, 1, 1, 9, 0)
+
+    wednesday = next_occurrence(rule, monday, monday)
+    # Wednesday's run anchors the next lookup in the same (qualifying) week
+    assert wednesday == datetime(2024, 1, 3, 9, 0)
+    assert next_occurrence(rule, wednesday, wednesday) == datetime(2024, 1, 15, 9, 0)
+
+def test_interval_skips_missed_runs_to_a_qualifying_period():
+    now = datetime(2024, 2, 10, 12, 0)
+
+    assert next_occurrence("FREQ=MONTHLY;INTERVAL=3", datetime(2024, 1, 5, 8, 0), now) == datetime(2024, 4, 5, 8, 0)
+
+def test_negative_bymonthday_is_the_last_day_of_each_month():
+    runs = occurrences("FREQ=MONTHLY;BYMONTHDAY=-1", datetime(2024, 1, 31, 18, 0), 4)
+
+    assert [run.date() for run in runs] == [
+        datetime(2024, 2, 29).date(),
+        datetime(2024, 3, 31).date(),
+        datetime(2024, 4, 30).date(),
+        datetime(2024, 5, 31).date(),
+    ]
+    assert all(run.time() == datetime(2024, 1, 31, 18, 0).time() for run in runs)
+
+def test_yearly_from_february_29_waits_for_the_next_leap_year():
+    anchor = datetime(2024, 2, 29, 10, 0)
+
+    assert next_occurrence("FREQ=YEARLY", anchor, anchor) == datetime(2028, 2, 29, 10, 0)
+
+@pytest.mark.parametrize("weekday", ["0", "7", "SUN"])
+def test_cron_sunday_is_0_or_7(weekday):
+    saturday = datetime(2024, 6, 1, 12, 0)
+
+    assert next_occurrence(f"0 8 * * {weekday}", saturday, saturday) == datetime(2024, 6, 2, 8, 0)
+
+def test_cron_day_of_month_or_day_of_week():
+    # The 15th *or* any Monday, as in cron when both fields are restricted
+    runs = occurrences("0 8 15 * 1", datetime(2024, 7, 1, 9, 0), 4)
+
+    assert runs == [
+        datetime(2024, 7, 8, 8, 0),
+        datetime(2024, 7, 15, 8, 0),
+        datetime(2024, 7, 22, 8, 0),
+        datetime(2024, 7, 29, 8, 0),
+    ]
+    assert datetime(2024, 8, 15, 8, 0) in occurrences("0 8 15 * 1", datetime(2024, 8, 1), 6)
+
+def test_cron_single_restricted_day_field_is_not_or_ed():
+    runs = occurrences("0 8 15 * *", datetime(2024, 7, 1), 2)
+
+    assert runs == [datetime(2024, 7, 15, 8, 0), datetime(2024, 8, 15, 8, 0)]
+
+def test_until_ends_the_rule():
+    rule = "FREQ=DAILY;UNTIL=20240103T090000Z"
+    anchor = datetime(2024, 1, 1, 9, 0)
+
+    assert occurrences(rule, anchor, 5) == [datetime(2024, 1, 2, 9, 0), datetime(2024, 1, 3, 9, 0)]
+    assert next_occurrence(rule, datetime(2024, 1, 3, 9, 0), datetime(2024, 1, 3, 9, 0)) is None
+
+def test_unsupported_rules_yield_no_next_run():
+    assert next_occurrence("FREQ=DAILY;COUNT=3", datetime(2024, 1, 1), datetime(2024, 1, 1)) is None
+    assert next_occurrence("61 * * * *", datetime(2024, 1, 1), datetime(2024, 1, 1)) is None
+
+def test_occurrences_between_groups_tasks_and_cuts_at_each_next_run(monkeypatch):
+    windows = []
+    between = Schedule.between
+    monkeypatch.setattr(Schedule, "between", lambda self, *args: windows.append(self) or between(self, *args))
+    start, end = datetime(2024, 3, 4), datetime(2024, 3, 8)
+    tasks = [
+        ("a", "FREQ=DAILY", datetime(2024, 3, 4, 9, 0)),
+        # Same schedule (daily at 09:00), later next run: shares the window
+        ("b", "FREQ=DAILY", datetime(2024, 3, 6, 9, 0)),
+        ("once", None, datetime(2024, 3, 5, 12, 0)),
+        ("outside", None, datetime(2024, 3, 9, 12, 0)),
+        ("bad", "FREQ=SOMETIMES", datetime(2024, 3, 5, 12, 0)),
+        ("unscheduled", "FREQ=DAILY", None),
+    ]
+
+    results = occurrences_between(tasks, start, end)
+
+    days = [datetime(2024, 3, day, 9, 0) for day in (4, 5, 6, 7)]
+    assert results["a"] == days
+    assert results["b"] == days[2:]
+    assert results["once"] == [datetime(2024, 3, 5, 12, 0)]
+    assert results["outside"] == []
+    assert results["bad"] == [datetime(2024, 3, 5, 12, 0)]
+    assert results["unscheduled"] == []
+    # "a" and "b" share one window evaluation
+    assert len(windows) == 1
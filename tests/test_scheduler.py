@@ -0,0 +1,91 @@
+"""Reminder scheduler against PostgreSQL, with Telegram faked."""
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock
+
+import pytest
+from sqlalchemy import select
+
+from src.core.database.connection import AsyncSessionLocal
+from src.core.database.models import Task, User
+from src.workers.scheduler import TaskScheduler
+
+pytestmark = pytest.mark.postgres
+
+async def seed_task(scheduled_at: datetime, recurrence_rule=None):
+    async with AsyncSessionLocal() as db:
+        user = (await db.execute(select(User).where(User.telegram_id == 42))).scalar_one_or_none()
+        if user is None:
+            user = User(telegram_id=42, first_name="Test")
+            db.add(user)
+            await db.flush()
+        task = Task(user_id=user.id, title="Backup", scheduled_at=scheduled_at, recurrence_rule=recurrence_rule)
+        db.add(task)
+        await db.commit()
+        return task.id
+
+async def load(task_id) -> Task:
+    async with AsyncSessionLocal() as db:
+        return await db.get(Task, task_id)
+
+async def move(task_id, scheduled_at: datetime) -> None:
+    async with AsyncSessionLocal() as db:
+        (await db.get(Task, task_id)).scheduled_at = scheduled_at
+        await db.commit()
+
+def scheduler(bot=None) -> TaskScheduler:
+    return TaskScheduler(bot or AsyncMock(), window=300, retry_delay=30)
+
+def minute(t: datetime) -> datetime:
+    return t.replace(second=0, microsecond=0)
+
+@pytest.mark.asyncio
+async def test_claim_advances_tasks_and_sends_once(pg_engine):
+    due = minute(datetime.utcnow()) - timedelta(minutes=5)
+    one_off = await seed_task(due)
+    daily = await seed_task(due, "FREQ=DAILY")
+    first, second = scheduler(), scheduler()
+
+    await first.fire([one_off, daily])
+    # Already advanced: another instance claims nothing
+    await second.fire([one_off, daily])
+
+    assert first.bot.send_message.await_count == 2
+    second.bot.send_message.assert_not_awaited()
+    assert (await load(one_off)).reminder_sent_at is not None
+    assert (await load(daily)).scheduled_at == due + timedelta(days=1)
+
+@pytest.mark.asyncio
+async def test_failed_send_is_rearmed_and_retried_after_the_delay(pg_engine):
+    due = minute(datetime.utcnow()) - timedelta(minutes=5)
+    task_id = await seed_task(due, "FREQ=DAILY")
+    bot = AsyncMock()
+    bot.send_message.side_effect = [ConnectionError("Telegram down"), None]
+    tasks = scheduler(bot)
+
+    await tasks.fire([task_id])
+
+    assert (await load(task_id)).scheduled_at == due
+    # Queued for its retry time, which a refill does not bring forward
+    await tasks.refill()
+    now = datetime.utcnow()
+    assert tasks._pop_due(now) == []
+    assert tasks._pop_due(now + timedelta(seconds=31)) == [task_id]
+
+    await tasks.fire([task_id])
+    assert bot.send_message.await_count == 2
+    assert (await load(task_id)).scheduled_at == due + timedelta(days=1)
+
+@pytest.mark.asyncio
+async def test_refill_requeues_a_task_moved_earlier(pg_engine):
+    now = datetime.utcnow()
+    task_id = await seed_task(now + timedelta(minutes=4))
+    tasks = scheduler()
+    await tasks.refill()
+    assert tasks._pop_due(now) == []
+
+    await move(task_id, now - timedelta(seconds=1))
+    await tasks.refill()
+
+    assert tasks._pop_due(datetime.utcnow()) == [task_id]
+    # The entry for the old time is stale and never fires
+    assert tasks._pop_due(now + timedelta(minutes=5)) == []
@@ -0,0 +1,55 @@
+"""Rolling restarts of the multi-process webhook server, with processes faked."""
+import threading
+
+from src.bot.server import WorkerSupervisor
+
+class FakeProcess:
+    def __init__(self, index, ready=True):
+        self.index = index
+        self.ready = threading.Event()
+        if ready:
+            self.ready.set()
+        self.alive = True
+
+    def is_alive(self):
+        return self.alive
+
+def supervisor(events, ready=True, workers=2):
+    server = WorkerSupervisor(workers, shutdown_timeout=1.0, startup_timeout=0.3)
+
+    def spawn(index):
+        process = FakeProcess(index, ready)
+        events.append(("spawn", index, process.ready.is_set()))
+        return process
+
+    def stop(process):
+        events.append(("stop", process.index))
+        process.alive = False
+
+    server._spawn = spawn
+    server._stop = stop
+    return server
+
+def test_old_worker_is_stopped_once_its_replacement_is_ready():
+    events = []
+    server = supervisor(events)
+    for index in range(2):
+        server._processes[index] = FakeProcess(index)
+    old = dict(server._processes)
+
+    server._rolling_restart()
+
+    assert events == [("spawn", 0, True), ("stop", 0), ("spawn", 1, True), ("stop", 1)]
+    assert all(server._processes[index] is not old[index] for index in range(2))
+
+def test_restart_stops_when_a_replacement_never_gets_ready():
+    events = []
+    server = supervisor(events, ready=False)
+    old = FakeProcess(0)
+    server._processes = {0: old, 1: FakeProcess(1)}
+
+    server._rolling_restart()
+
+    # The replacement is discarded and the old worker keeps serving
+    assert events == [("spawn", 0, False), ("stop", 0)]
+    assert server._processes[0] is old and old.alive
@@ -0,0 +1,49 @@
+"""Coalescing of duplicate in-flight calls and streams."""
+import asyncio
+
+import pytest
+
+from src.core.cache.singleflight import StreamFlight
+
+def provider_stream(calls, chunks, fail=False):
+    async def stream():
+        calls.append(1)
+        for chunk in chunks:
+            await asyncio.sleep(0.01)
+            yield chunk
+        if fail:
+            raise RuntimeError("provider down")
+    return stream
+
+async def collect(stream):
+    return [chunk async for chunk in stream]
+
+@pytest.mark.asyncio
+async def test_concurrent_streams_share_one_provider_stream():
+    flight = StreamFlight("test")
+    calls = []
+    fn = provider_stream(calls, ["Bon", "jour", " !"])
+
+    first = asyncio.ensure_future(collect(flight.stream("k", fn)))
+    await asyncio.sleep(0.015)
+    # Joins mid-stream: still gets the chunks already sent
+    late = await collect(flight.stream("k", fn))
+
+    assert await first == late == ["Bon", "jour", " !"]
+    assert calls == [1]
+    assert flight.stats() == {"executed": 1, "collapsed": 1, "inflight": 0}
+
+@pytest.mark.asyncio
+async def test_stream_error_reaches_every_subscriber():
+    flight = StreamFlight("test")
+    calls = []
+    fn = provider_stream(calls, ["a"], fail=True)
+
+    results = await asyncio.gather(
+        collect(flight.stream("k", fn)), collect(flight.stream("k", fn)), return_exceptions=True
+    )
+
+    assert [type(result) for result in results] == [RuntimeError, RuntimeError]
+    assert calls == [1]
+    # Finished streams are not replayed
+    assert await collect(flight.stream("k", provider_stream(calls, ["b"]))) == ["b"]
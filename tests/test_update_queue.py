@@ -0,0 +1,58 @@
+"""Per-chat lanes of the update queue consumer, with processing faked."""
+import asyncio
+import json
+
+import pytest
+
+from src.workers.update_queue import ShardLanes
+
+def entry(chat_id: int, text: str):
+    update = {"update_id": 1, "message": {"chat": {"id": chat_id}, "text": text}}
+    return {"update": json.dumps(update)}
+
+class FakeConsumer:
+    """Fails the given entries' first attempt, records every attempt"""
+
+    def __init__(self, failing=(), retry_in=0.05):
+        self.failing = set(failing)
+        self.retry_in = retry_in
+        self.calls = []
+
+    async def _process(self, key, entry_id, fields, attempt=1):
+        self.calls.append((entry_id, attempt))
+        await asyncio.sleep(0)
+        if entry_id in self.failing and attempt == 1:
+            return self.retry_in
+        return None
+
+async def drain(lanes: ShardLanes) -> None:
+    while lanes._tasks:
+        await asyncio.gather(*lanes._tasks)
+
+@pytest.mark.asyncio
+async def test_retry_blocks_only_its_own_chat():
+    consumer = FakeConsumer(failing={"1-0"})
+    slots = asyncio.Semaphore(10)
+    lanes = ShardLanes(consumer, "updates:0", slots)
+
+    await lanes.submit("1-0", entry(1, "first"))
+    await lanes.submit("2-0", entry(1, "second"))
+    await lanes.submit("3-0", entry(2, "other chat"))
+    await drain(lanes)
+
+    chat_1 = [call for call in consumer.calls if call[0] in ("1-0", "2-0")]
+    assert chat_1 == [("1-0", 1), ("1-0", 2), ("2-0", 1)]
+    # The other chat did not wait for the backoff
+    assert consumer.calls.index(("3-0", 1)) < consumer.calls.index(("1-0", 2))
+    assert slots._value == 10 and not lanes._lanes
+
+@pytest.mark.asyncio
+async def test_replayed_entry_in_flight_is_ignored():
+    consumer = FakeConsumer()
+    lanes = ShardLanes(consumer, "updates:0", asyncio.Semaphore(10))
+
+    await lanes.submit("1-0", entry(1, "first"))
+    await lanes.submit("1-0", entry(1, "first"))
+    await drain(lanes)
+
+    assert consumer.calls == [("1-0", 1)]
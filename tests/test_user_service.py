@@ -0,0 +1,86 @@
+"""Batched user registration, with the upsert faked."""
+import asyncio
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+import pytest
+
+from src.core.cache.user_cache import CachedUser
+from src.core.services import user_service
+from src.core.services.user_service import UserRegistrar
+
+@pytest.fixture
+def upserts(monkeypatch):
+    """Batches passed to upsert_users; a batch naming "boom" fails"""
+    batches = []
+
+    class FakeService:
+        def __init__(self, db):
+            pass
+
+        async def upsert_users(self, rows):
+            batches.append(rows)
+            await asyncio.sleep(0)
+            if any(row["first_name"] == "boom" for row in rows):
+                raise ConnectionError("database down")
+            return [
+                CachedUser(i, row["telegram_id"], row["username"], row["first_name"], "free", None)
+                for i, row in enumerate(rows, 1)
+            ]
+
+    @asynccontextmanager
+    async def fake_db():
+        yield None
+
+    monkeypatch.setattr(user_service, "UserService", FakeService)
+    monkeypatch.setattr(user_service, "get_async_db", fake_db)
+    return batches
+
+def telegram_user(telegram_id, first_name="Ada"):
+    return SimpleNamespace(id=telegram_id, username=f"user{telegram_id}", first_name=first_name)
+
+@pytest.mark.asyncio
+async def test_concurrent_registrations_of_one_user_share_one_row(upserts):
+    registrar = UserRegistrar(max_batch=100, batch_window=0.01)
+
+    users = await asyncio.gather(*(registrar.register(telegram_user(42)) for _ in range(3)))
+
+    assert [len(batch) for batch in upserts] == [1]
+    assert users[0] is users[1] is users[2]
+    assert users[0].telegram_id == 42
+
+@pytest.mark.asyncio
+async def test_registrations_within_the_window_are_one_upsert(upserts):
+    registrar = UserRegistrar(max_batch=100, batch_window=0.01)
+
+    users = await asyncio.gather(*(registrar.register(telegram_user(i)) for i in (1, 2, 3)))
+
+    assert [[row["telegram_id"] for row in batch] for batch in upserts] == [[1, 2, 3]]
+    assert [user.telegram_id for user in users] == [1, 2, 3]
+
+@pytest.mark.asyncio
+async def test_full_batch_is_flushed_without_waiting_for_the_window(upserts):
+    registrar = UserRegistrar(max_batch=2, batch_window=60.0)
+
+    first = await asyncio.wait_for(
+        asyncio.gather(registrar.register(telegram_user(1)), registrar.register(telegram_user(2))),
+        timeout=1.0
+    )
+
+    assert [user.telegram_id for user in first] == [1, 2]
+    assert registrar._timer is None
+
+@pytest.mark.asyncio
+async def test_failed_batch_fails_every_waiter_and_is_retried_next_time(upserts):
+    registrar = UserRegistrar(max_batch=100, batch_window=0.01)
+
+    results = await asyncio.gather(
+        registrar.register(telegram_user(1, "boom")), registrar.register(telegram_user(2)),
+        return_exceptions=True
+    )
+
+    assert [type(result) for result in results] == [ConnectionError, ConnectionError]
+    # Nothing is left pending: the next registration starts a new batch
+    user = await registrar.register(telegram_user(2))
+    assert user.telegram_id == 2
+    assert len(upserts) == 2
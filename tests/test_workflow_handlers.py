@@ -0,0 +1,237 @@
+"""Workflow handlers driven through the dispatcher, with Telegram and storage faked."""
+from contextlib import asynccontextmanager
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+from uuid import uuid4
+
+import pytest
+from aiogram import Bot, Dispatcher
+from aiogram.client.session.base import BaseSession
+from aiogram.methods import AnswerCallbackQuery, EditMessageText, SendMessage
+from aiogram.types import CallbackQuery, Chat, Message, Update, User
+
+from src.bot.handlers import workflows
+from src.core.cache.user_cache import CachedUser
+from src.workers.executions import ExecutionJob
+
+TELEGRAM_ID = 42
+DB_USER_ID = 7
+
+class RecordingSession(BaseSession):
+    """Records Bot API calls instead of sending them"""
+
+    def __init__(self):
+        super().__init__()
+        self.requests = []
+
+    async def make_request(self, bot, method, timeout=None):
+        self.requests.append(method)
+        if isinstance(method, SendMessage):
+            return Message(
+                message_id=99,
+                date=datetime.now(),
+                chat=Chat(id=method.chat_id, type="private"),
+                text=method.text
+            )
+        return True
+
+    async def stream_content(self, *args, **kwargs):
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+@pytest.fixture
+def dispatcher():
+    dp = Dispatcher()
+    dp.include_router(workflows.router)
+    yield dp
+    # The module-level router can only have one parent at a time
+    workflows.router._parent_router = None
+
+@pytest.fixture
+def bot():
+    return Bot(token="42:TEST", session=RecordingSession())
+
+def db_user() -> CachedUser:
+    return CachedUser(
+        id=DB_USER_ID,
+        telegram_id=TELEGRAM_ID,
+        username="test",
+        first_name="Test",
+        subscription_tier="free",
+        created_at=None
+    )
+
+def callback_update(data: str) -> Update:
+    user = User(id=TELEGRAM_ID, is_bot=False, first_name="Test")
+    chat = Chat(id=TELEGRAM_ID, type="private")
+    return Update(
+        update_id=1,
+        callback_query=CallbackQuery(
+            id="1",
+            from_user=user,
+            chat_instance="1",
+            data=data,
+            message=Message(message_id=1, date=datetime.now(), chat=chat, text="Workflows")
+        )
+    )
+
+@pytest.mark.asyncio
+async def test_execute_callback_enqueues_job_for_db_user(dispatcher, bot, monkeypatch):
+    workflow = SimpleNamespace(id=uuid4(), name="Backup", is_active=True)
+    owners = []
+
+    class FakeService:
+        def __init__(self, db, n8n=None):
+            pass
+
+        async def get_user_workflow(self, workflow_id, user_id):
+            owners.append(user_id)
+            return workflow
+
+    @asynccontextmanager
+    async def fake_db():
+        yield None
+
+    job = ExecutionJob(
+        id="abc123",
+        workflow_id=str(workflow.id),
+        workflow_name=workflow.name,
+        user_id=DB_USER_ID,
+        chat_id=TELEGRAM_ID
+    )
+    enqueue = AsyncMock(return_value=job)
+    attach_message = AsyncMock()
+    monkeypatch.setattr(workflows, "WorkflowService", FakeService)
+    monkeypatch.setattr(workflows, "get_async_db", fake_db)
+    monkeypatch.setattr(workflows.execution_queue, "enqueue", enqueue)
+    monkeypatch.setattr(workflows.execution_queue, "attach_message", attach_message)
+
+    await dispatcher.feed_update(
+        bot,
+        callback_update(f"workflow:{workflow.id}:execute"),
+        db_user=db_user(),
+        n8n_client=object()
+    )
+
+    # Ownership and the job use users.id, never the Telegram ID
+    assert owners == [DB_USER_ID]
+    assert enqueue.await_args.kwargs["user_id"] == DB_USER_ID
+    assert enqueue.await_args.kwargs["chat_id"] == TELEGRAM_ID
+    attach_message.assert_awaited_once_with("abc123", 99)
+
+    requests = bot.session.requests
+    assert any(isinstance(r, AnswerCallbackQuery) and r.text == "▶️ Exécution lancée" for r in requests)
+    status = next(r for r in requests if isinstance(r, SendMessage))
+    assert "abc123" in status.text
+    assert status.reply_markup.inline_keyboard[0][0].callback_data == "job:abc123"
+
+@pytest.mark.asyncio
+async def test_job_status_hides_other_users_jobs(dispatcher, bot, monkeypatch):
+    job = ExecutionJob(
+        id="abc123",
+        workflow_id=str(uuid4()),
+        workflow_name="Backup",
+        user_id=DB_USER_ID + 1,
+        chat_id=TELEGRAM_ID
+    )
+    monkeypatch.setattr(workflows.execution_queue, "get", AsyncMock(return_value=job))
+
+    await dispatcher.feed_update(bot, callback_update("job:abc123"), db_user=db_user())
+
+    answer = next(r for r in bot.session.requests if isinstance(r, AnswerCallbackQuery))
+    assert answer.text == "❌ Exécution introuvable ou expirée"
+
+def message_update(text: str) -> Update:
+    user = User(id=TELEGRAM_ID, is_bot=False, first_name="Test")
+    return Update(
+        update_id=2,
+        message=Message(
+            message_id=2,
+            date=datetime.now(),
+            chat=Chat(id=TELEGRAM_ID, type="private"),
+            from_user=user,
+            text=text
+        )
+    )
+
+@pytest.fixture
+def fake_service(monkeypatch):
+    """WorkflowService owning one workflow, with the database faked"""
+    workflow = SimpleNamespace(
+        id=uuid4(), name="Backup", description="Nightly", is_active=True, n8n_workflow_id="wf-1"
+    )
+
+    class FakeService:
+        def __init__(self, db, n8n=None):
+            pass
+
+        async def get_user_workflow(self, workflow_id, user_id):
+            assert user_id == DB_USER_ID
+            return workflow
+
+        async def list_user_workflows_page(self, user_id, after=None, before=None):
+            return SimpleNamespace(workflows=[workflow], prev_cursor=None, next_cursor=None)
+
+    @asynccontextmanager
+    async def fake_db():
+        yield None
+
+    monkeypatch.setattr(workflows, "WorkflowService", FakeService)
+    monkeypatch.setattr(workflows, "get_async_db", fake_db)
+    return workflow
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("text", ["/create", "/list", "/templates"])
+async def test_other_commands_are_not_taken_over(dispatcher, bot, fake_service, text):
+    await dispatcher.feed_update(bot, message_update(text), db_user=db_user())
+
+    assert not any(isinstance(r, SendMessage) for r in bot.session.requests)
+
+@pytest.mark.asyncio
+async def test_workflow_subcommands(dispatcher, bot, fake_service):
+    await dispatcher.feed_update(bot, message_update("/workflow"), db_user=db_user())
+    await dispatcher.feed_update(bot, message_update("/workflow list"), db_user=db_user())
+
+    menu, listing = [r for r in bot.session.requests if isinstance(r, SendMessage)]
+    assert "Menu des Workflows" in menu.text
+    assert "Backup" in listing.text
+
+@pytest.mark.asyncio
+async def test_details_callback_opens_action_keyboard(dispatcher, bot, fake_service):
+    await dispatcher.feed_update(
+        bot, callback_update(f"workflow:{fake_service.id}:details"), db_user=db_user(), n8n_client=object()
+    )
+
+    edit = next(r for r in bot.session.requests if isinstance(r, EditMessageText))
+    assert "Backup" in edit.text
+    buttons = [button.callback_data for row in edit.reply_markup.inline_keyboard for button in row]
+    assert f"workflow:{fake_service.id}:execute" in buttons
+    assert any(isinstance(r, AnswerCallbackQuery) for r in bot.session.requests)
+    assert not any(isinstance(r, SendMessage) for r in bot.session.requests)
+
+@pytest.mark.asyncio
+async def test_configure_then_schedule_updates_n8n_with_a_cron(dispatcher, bot, fake_service):
+    n8n = AsyncMock()
+    await dispatcher.feed_update(
+        bot, callback_update(f"workflow:{fake_service.id}:configure"), db_user=db_user(), n8n_client=n8n
+    )
+    await dispatcher.feed_update(bot, callback_update("trigger:schedule"), db_user=db_user(), n8n_client=n8n)
+    await dispatcher.feed_update(bot, message_update("9:30 tous les jours"), db_user=db_user(), n8n_client=n8n)
+
+    n8n.update_workflow.assert_awaited_once_with(
+        "wf-1", {"trigger": {"type": "schedule", "cron": "30 9 * * *"}}
+    )
+
+@pytest.mark.asyncio
+async def test_webhook_trigger_shows_the_n8n_webhook_url(dispatcher, bot, fake_service, monkeypatch):
+    monkeypatch.setattr(workflows.settings, "n8n_base_url", "https://n8n.example.com")
+    await dispatcher.feed_update(
+        bot, callback_update(f"workflow:{fake_service.id}:configure"), db_user=db_user(), n8n_client=object()
+    )
+    await dispatcher.feed_update(bot, callback_update("trigger:webhook"), db_user=db_user(), n8n_client=object())
+
+    edit = [r for r in bot.session.requests if isinstance(r, EditMessageText)][-1]
+    assert "https://n8n.example.com/webhook/wf-1" in edit.text
@@ -0,0 +1,130 @@
+"""WorkflowService, against PostgreSQL where marked, with n8n faked."""
+import asyncio
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import select
+
+from src.core.database.connection import AsyncSessionLocal
+from src.core.database.models import User, UserStats, Workflow
+from src.core.services.stats_service import StatsService
+from src.core.services.workflow_service import WorkflowService, decode_cursor, encode_cursor
+
+async def seed_workflow(is_active: bool = False):
+    async with AsyncSessionLocal() as db:
+        user = User(telegram_id=42, first_name="Test")
+        db.add(user)
+        await db.flush()
+        workflow = Workflow(user_id=user.id, name="Backup", n8n_workflow_id="wf-1", is_active=is_active)
+        db.add(workflow)
+        await db.flush()
+        await StatsService(db).get(user.id)
+        await db.commit()
+        return user.id, workflow.id
+
+async def active_count(user_id: int) -> int:
+    async with AsyncSessionLocal() as db:
+        return await db.scalar(
+            select(UserStats.active_workflows_count).where(UserStats.user_id == user_id)
+        )
+
+def fake_n8n():
+    return AsyncMock(
+        activate_workflow=AsyncMock(), deactivate_workflow=AsyncMock(), execute_workflow=AsyncMock()
+    )
+
+@pytest.mark.postgres
+@pytest.mark.asyncio
+async def test_double_activate_counts_once(pg_engine):
+    user_id, workflow_id = await seed_workflow()
+
+    async with AsyncSessionLocal() as first, AsyncSessionLocal() as second:
+        # Both taps read the row as inactive before either writes it
+        stale = await WorkflowService(second, fake_n8n()).get_user_workflow(workflow_id, user_id)
+        assert not stale.is_active
+
+        await WorkflowService(first, fake_n8n()).activate_workflow(workflow_id, user_id)
+        workflow = await WorkflowService(second, fake_n8n()).activate_workflow(workflow_id, user_id)
+
+    assert workflow.is_active
+    assert await active_count(user_id) == 1
+
+@pytest.mark.postgres
+@pytest.mark.asyncio
+async def test_bulk_deactivate_counts_only_flipped_rows(pg_engine):
+    user_id, workflow_id = await seed_workflow(is_active=True)
+
+    async with AsyncSessionLocal() as first, AsyncSessionLocal() as second:
+        stale = await WorkflowService(second, fake_n8n()).get_user_workflows([workflow_id], user_id)
+        assert stale[workflow_id].is_active
+        await WorkflowService(first, fake_n8n()).deactivate_workflow(workflow_id, user_id)
+        results = await WorkflowService(second, fake_n8n()).deactivate_many([workflow_id], user_id)
+
+    assert [result.ok for result in results] == [True]
+    assert await active_count(user_id) == 0
+
+@pytest.mark.postgres
+@pytest.mark.asyncio
+async def test_concurrent_executions_are_not_coalesced(pg_engine):
+    user_id, workflow_id = await seed_workflow(is_active=True)
+    n8n = fake_n8n()
+
+    async def run(n8n_workflow_id, data):
+        # Both runs are in n8n at the same time
+        await asyncio.sleep(0.05)
+        return {"ok": True}
+    n8n.execute_workflow.side_effect = run
+
+    async def execute():
+        async with AsyncSessionLocal() as db:
+            return await WorkflowService(db, n8n).execute_workflow(workflow_id, user_id, {"x": 1})
+
+    await asyncio.gather(execute(), execute())
+
+    assert n8n.execute_workflow.await_count == 2
+
+def test_cursor_round_trip_fits_callback_data():
+    workflow = Workflow(id=uuid4(), created_at=datetime(2024, 5, 1, 10, 30, 15, 123456))
+
+    cursor = encode_cursor(workflow)
+
+    assert decode_cursor(cursor) == (workflow.created_at, workflow.id)
+    # Sent as callback data next to a short prefix, within Telegram's 64 bytes
+    assert len(cursor.encode()) <= 40
+
+@pytest.mark.parametrize("cursor", ["", "nodot", "zz.AAAA", "1a2b.!!!", "1a2b.AAAA"])
+def test_malformed_cursor_raises_value_error(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+def names(page):
+    return [workflow.name for workflow in page.workflows]
+
+@pytest.mark.postgres
+@pytest.mark.asyncio
+async def test_pages_walk_forward_and_back(pg_engine):
+    async with AsyncSessionLocal() as db:
+        user = User(telegram_id=42, first_name="Test")
+        db.add(user)
+        await db.flush()
+        start = datetime(2024, 5, 1)
+        for i in range(5):
+            db.add(Workflow(user_id=user.id, name=f"W{i}", created_at=start + timedelta(minutes=i)))
+        await db.commit()
+        user_id = user.id
+
+    async with AsyncSessionLocal() as db:
+        service = WorkflowService(db)
+        first = await service.list_user_workflows_page(user_id, limit=2)
+        second = await service.list_user_workflows_page(user_id, after=first.next_cursor, limit=2)
+        last = await service.list_user_workflows_page(user_id, after=second.next_cursor, limit=2)
+        back = await service.list_user_workflows_page(user_id, before=last.prev_cursor, limit=2)
+        front = await service.list_user_workflows_page(user_id, before=back.prev_cursor, limit=2)
+
+    assert names(first) == ["W0", "W1"] and first.prev_cursor is None and first.next_cursor
+    assert names(second) == ["W2", "W3"] and second.prev_cursor and second.next_cursor
+    assert names(last) == ["W4"] and last.prev_cursor and last.next_cursor is None
+    assert names(back) == ["W2", "W3"] and back.prev_cursor and back.next_cursor
+    assert names(front) == ["W0", "W1"] and front.prev_cursor is None and front.next_cursor